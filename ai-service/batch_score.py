@@ -0,0 +1,309 @@
+"""
+batch_score.py — Offline bulk scoring of simulator telemetry logs.
+──────────────────────────────────────────────────────────────────
+Streams the session logs written by the simulator's TelemetryWriter (plain,
+gzip-compressed and rotated CSV parts, or binary .ftl logs) in chunks,
+maps VehicleTelemetry columns onto the maintenance and carbon feature schemas
+(the same mapping the simulator uses when it pushes to the API), scores the
+chunks in parallel worker processes and writes columnar output:
+
+  <out>/scores.parquet    → one row per telemetry row (risk, CO2, …)
+  <out>/vehicles.parquet  → per-vehicle aggregates for the nightly risk report
+
+Each worker loads the maintenance bundle once and keeps native thread pools
+at one thread, so N workers use N cores without oversubscription.
+
+Usage:
+    cd ai-service
+    python batch_score.py                                   # all session logs
+    python batch_score.py --workers 8 --chunksize 250000
+    python batch_score.py --logs "../simulator/logs/session_2026*.csv*" --out reports/nightly
+    python batch_score.py --logs "../simulator/logs/*.ftl"                  # binary logs
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+from utils.bundle import load_bundle
+from utils.carbon import EMISSION_FACTORS, DEFAULT_EMISSION_FACTOR
+from utils.preprocessing import (
+    preprocess_maintenance,
+    MAINTENANCE_FEATURES,
+    MAINTENANCE_CAT_FEATURES,
+)
+
+BASE_DIR = os.path.dirname(__file__)
+DEFAULT_LOGS = os.path.join(BASE_DIR, "..", "simulator", "logs", "session_*.csv*")
+DEFAULT_OUT = os.path.join(BASE_DIR, "reports", "batch_scores")
+MAINTENANCE_BUNDLE = os.path.join(BASE_DIR, "models", "maintenance.bundle")
+
+TICK_INTERVAL = 3.0        # seconds between ticks (simulator default; not logged)
+
+TELEMETRY_COLUMNS = [
+    "timestamp", "vehicle_id", "driver_id", "fuel_type",
+    "speed_kmh", "engine_temp_c", "fuel_consumption_l100km", "battery_pct",
+    "tire_pressure_psi", "vibration", "oil_quality", "brake_condition",
+    "weather", "road_type", "anomaly_flag", "actual_load", "failure_history",
+]
+
+# Fill-ins for logs written before these columns were logged (VehicleTelemetry defaults)
+LOGGED_DEFAULTS = {"actual_load": 5.5, "failure_history": 0}
+
+SIMULATOR_DIR = os.path.join(BASE_DIR, "..", "simulator")
+
+# session_<ts>.csv, session_<ts>_part0003.csv.gz, session_<ts>.ftl, … → session_<ts>
+_SESSION_RE = re.compile(r"^(session_\d{8}_\d{6})(?:_part\d+)?\.(?:csv(?:\.gz)?|ftl)$")
+
+_WORKER: dict = {}
+
+
+# ─── Feature mapping ──────────────────────────────────────────────────────────
+def maintenance_features(tel: pd.DataFrame) -> pd.DataFrame:
+    """VehicleTelemetry columns → maintenance model inputs (as push_to_ai_service)."""
+    return pd.DataFrame({
+        "Usage_Hours": tel["tick"] * TICK_INTERVAL / 3600,
+        "Actual_Load": tel["actual_load"],
+        "Engine_Temperature": tel["engine_temp_c"],
+        "Tire_Pressure": tel["tire_pressure_psi"],
+        "Fuel_Consumption": tel["fuel_consumption_l100km"],
+        "Battery_Status": tel["battery_pct"],
+        "Vibration_Levels": tel["vibration"],
+        "Oil_Quality": tel["oil_quality"],
+        "Failure_History": tel["failure_history"],
+        "Anomalies_Detected": tel["anomaly_flag"].astype(int),
+        "Predictive_Score": np.minimum(
+            1.0, tel["vibration"] / 10.0 + (tel["engine_temp_c"] - 80) / 100
+        ),
+        "Downtime_Maintenance": 0.0,
+        "Impact_on_Efficiency": 0.1,
+        "Brake_Condition": tel["brake_condition"],
+        "Weather_Conditions": tel["weather"],
+        "Road_Conditions": tel["road_type"],
+    })
+
+
+def carbon_features(tel: pd.DataFrame) -> pd.DataFrame:
+    """Distance and fuel burned during each tick, and the resulting CO2."""
+    distance = tel["speed_kmh"] * TICK_INTERVAL / 3600
+    litres = tel["fuel_consumption_l100km"] / 100 * distance
+    factor = tel["fuel_type"].str.lower().map(EMISSION_FACTORS).fillna(DEFAULT_EMISSION_FACTOR)
+    return pd.DataFrame({"distance_km": distance, "fuel_litres": litres, "co2_kg": litres * factor})
+
+
+# Per-vehicle partial aggregates: combinable across chunks with the same ops
+_PARTIAL_AGG = {
+    "rows": "sum", "p_sum": "sum", "p_max": "max",
+    "high_risk_rows": "sum", "anomaly_rows": "sum",
+    "max_engine_temp_c": "max", "min_tire_pressure_psi": "min",
+    "distance_km": "sum", "fuel_litres": "sum", "co2_kg": "sum",
+    "first_ts": "min", "last_ts": "max",
+}
+
+
+# ─── Worker ───────────────────────────────────────────────────────────────────
+def _init_worker(bundle_path: str):
+    from threadpoolctl import threadpool_limits
+
+    pieces, _ = load_bundle(
+        bundle_path,
+        family="maintenance",
+        expected_pieces=["model", "encoders"],
+        feature_order=MAINTENANCE_FEATURES + MAINTENANCE_CAT_FEATURES,
+    )
+    pieces["model"].n_jobs = 1
+    threadpool_limits(limits=1)
+    _WORKER.update(pieces)
+
+
+def score_chunk(tel: pd.DataFrame) -> tuple:
+    """Score one chunk. Returns (per-row scores, per-vehicle partial aggregates)."""
+    X, _, _ = preprocess_maintenance(maintenance_features(tel), fit=False, encoders=_WORKER["encoders"])
+    p = _WORKER["model"].predict_proba(X)[:, 1]
+    carbon = carbon_features(tel)
+
+    # Same cut-offs as /predict/maintenance
+    risk = np.select([p >= 0.75, p >= 0.45], ["HIGH", "MEDIUM"], default="LOW")
+
+    scores = pd.DataFrame({
+        "timestamp": tel["timestamp"].to_numpy(),
+        "vehicle_id": tel["vehicle_id"].to_numpy(),
+        "driver_id": tel["driver_id"].to_numpy(),
+        "p_maintenance": p.astype(np.float32),
+        "risk_level": risk,
+        "distance_km": carbon["distance_km"].to_numpy(np.float32),
+        "fuel_litres": carbon["fuel_litres"].to_numpy(np.float32),
+        "co2_kg": carbon["co2_kg"].to_numpy(np.float32),
+    })
+
+    partial = pd.DataFrame({
+        "vehicle_id": tel["vehicle_id"].to_numpy(),
+        "rows": 1,
+        "p_sum": p,
+        "p_max": p,
+        "high_risk_rows": (risk == "HIGH").astype(int),
+        "anomaly_rows": tel["anomaly_flag"].astype(int).to_numpy(),
+        "max_engine_temp_c": tel["engine_temp_c"].to_numpy(),
+        "min_tire_pressure_psi": tel["tire_pressure_psi"].to_numpy(),
+        "distance_km": carbon["distance_km"].to_numpy(),
+        "fuel_litres": carbon["fuel_litres"].to_numpy(),
+        "co2_kg": carbon["co2_kg"].to_numpy(),
+        "first_ts": tel["timestamp"].to_numpy(),
+        "last_ts": tel["timestamp"].to_numpy(),
+    }).groupby("vehicle_id", sort=False).agg(_PARTIAL_AGG)
+    return scores, partial
+
+
+def finalize_aggregates(partials: list) -> pd.DataFrame:
+    agg = pd.concat(partials).groupby(level=0).agg(_PARTIAL_AGG)
+    agg["p_maintenance_mean"] = agg.pop("p_sum") / agg["rows"]
+    agg = agg.rename(columns={"p_max": "p_maintenance_max"})
+    agg["high_risk_share"] = agg["high_risk_rows"] / agg["rows"]
+    agg["co2_per_km"] = np.where(agg["distance_km"] > 0, agg["co2_kg"] / agg["distance_km"], 0.0)
+    return agg.sort_values("p_maintenance_mean", ascending=False).reset_index()
+
+
+# ─── Driver ───────────────────────────────────────────────────────────────────
+def read_log(path: str, chunksize: int):
+    """Yield DataFrame chunks of TELEMETRY_COLUMNS from a CSV or binary .ftl log."""
+    for frame in _read_log_frames(path, chunksize):
+        for name, value in LOGGED_DEFAULTS.items():
+            if name not in frame:
+                frame[name] = value
+        yield frame
+
+
+def _read_log_frames(path: str, chunksize: int):
+    if not path.endswith(".ftl"):
+        yield from pd.read_csv(path, usecols=lambda c: c in TELEMETRY_COLUMNS, chunksize=chunksize)
+        return
+
+    if SIMULATOR_DIR not in sys.path:
+        sys.path.insert(0, SIMULATOR_DIR)
+    from telemetry_log import TelemetryLog
+
+    with TelemetryLog(path) as log:
+        columns = [c for c in TELEMETRY_COLUMNS if c in log.columns]
+        frames, rows = [], 0
+        for i in range(log.n_chunks):
+            frame = log.to_pandas(columns, chunk=i)
+            # Same ISO strings as the CSV logs (isoformat drops zero microseconds)
+            ts = frame["timestamp"].to_numpy()
+            whole = (ts == ts.astype("datetime64[s]")).all()
+            frame["timestamp"] = np.datetime_as_string(ts, unit="s" if whole else "us")
+            frames.append(frame)
+            rows += len(frame)
+            if rows >= chunksize:
+                yield pd.concat(frames, ignore_index=True)
+                frames, rows = [], 0
+        if frames:
+            yield pd.concat(frames, ignore_index=True)
+
+
+def iter_chunks(paths: list, chunksize: int):
+    """
+    Yield telemetry chunks with a per-vehicle tick counter. The counter carries
+    across chunks and rotated parts of one session and restarts with each new
+    session, mirroring the simulator's tick_count.
+    """
+    session = None
+    for path in paths:
+        name = os.path.basename(path)
+        match = _SESSION_RE.match(name)
+        key = match.group(1) if match else name
+        if key != session:
+            session, ticks = key, {}
+        for chunk in read_log(path, chunksize):
+            offset = chunk["vehicle_id"].map(ticks).fillna(0).astype(np.int64)
+            chunk["tick"] = offset + chunk.groupby("vehicle_id", sort=False).cumcount() + 1
+            ticks.update(chunk.groupby("vehicle_id", sort=False)["tick"].max().to_dict())
+            yield chunk
+
+
+def run(paths: list, out_dir: str, workers: int, chunksize: int, bundle_path: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(out_dir, exist_ok=True)
+    scores_path = os.path.join(out_dir, "scores.parquet")
+    vehicles_path = os.path.join(out_dir, "vehicles.parquet")
+
+    writer = None
+    partials = []
+    rows = 0
+    t0 = time.perf_counter()
+
+    def consume(result):
+        nonlocal writer, rows
+        scores, partial = result
+        table = pa.Table.from_pandas(scores, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(scores_path, table.schema, compression="zstd")
+        writer.write_table(table)
+        partials.append(partial)
+        rows += len(scores)
+        rate = rows / (time.perf_counter() - t0)
+        print(f"   {rows:>12,} rows  |  {rate * 60 / 1e6:6.2f} M rows/min", end="\r")
+
+    if workers <= 1:
+        _init_worker(bundle_path)
+        for chunk in iter_chunks(paths, chunksize):
+            consume(score_chunk(chunk))
+    else:
+        # Bounded in-flight window keeps memory flat and output in log order
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(bundle_path,)) as pool:
+            pending = deque()
+            for chunk in iter_chunks(paths, chunksize):
+                pending.append(pool.submit(score_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    consume(pending.popleft().result())
+            while pending:
+                consume(pending.popleft().result())
+
+    if writer is None:
+        print("⚠️  No telemetry rows found.")
+        return
+    writer.close()
+    vehicles = finalize_aggregates(partials)
+    vehicles.to_parquet(vehicles_path, index=False, compression="zstd")
+
+    elapsed = time.perf_counter() - t0
+    print(f"\n✅ Scored {rows:,} rows from {len(paths)} log(s) in {elapsed:.1f}s "
+          f"({rows / elapsed * 60 / 1e6:.2f} M rows/min)")
+    print(f"💾 Row scores        → {scores_path}")
+    print(f"💾 Vehicle aggregates → {vehicles_path}")
+    print("\n🔎 Highest-risk vehicles:")
+    print(vehicles.head(10)[["vehicle_id", "rows", "p_maintenance_mean", "high_risk_share",
+                             "co2_kg", "co2_per_km"]].to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FleetFlow offline bulk scorer for simulator telemetry logs")
+    parser.add_argument("--logs", default=DEFAULT_LOGS, help="Glob of session logs (default: simulator/logs/session_*.csv*)")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Output directory for Parquet files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Scoring processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=200_000, help="Rows per chunk handed to a worker")
+    parser.add_argument("--bundle", default=MAINTENANCE_BUNDLE, help="Maintenance model bundle to score with")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(args.logs))
+    if not paths:
+        sys.exit(f"❌ No logs match {args.logs}")
+    if not os.path.exists(args.bundle):
+        sys.exit(f"❌ Bundle not found: {args.bundle}  (run: python -m training.train_maintenance)")
+
+    print(f"📂 {len(paths)} log file(s)  |  workers: {args.workers}  |  chunk: {args.chunksize:,} rows")
+    run(paths, args.out, args.workers, args.chunksize, args.bundle)
+
+
+if __name__ == "__main__":
+    main()
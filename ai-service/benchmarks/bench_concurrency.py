@@ -0,0 +1,163 @@
+"""
+bench_concurrency.py — Inference throughput vs. concurrent clients.
+────────────────────────────────────────────────────────────────────
+Measures single-row maintenance predictions per second and latency
+percentiles for 1–64 concurrent clients, under two thread policies:
+
+  trained  → the bundle as pickled (forest n_jobs=-1, native pools unlimited)
+  policy   → utils.inference.InferencePolicy (n_jobs pinned, native pools capped)
+
+In-process mode drives the model from a thread pool, the same way the
+service's threadpool runs sync handlers. With ``--url`` the clients post to a
+running service instead, which measures the whole stack (policy as deployed).
+
+Usage:
+    cd ai-service
+    python benchmarks/bench_concurrency.py
+    python benchmarks/bench_concurrency.py --clients 1 4 16 64 --seconds 5
+    python benchmarks/bench_concurrency.py --url http://localhost:8001 --out reports/bench_concurrency.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from utils.bundle import load_bundle
+from utils.inference import InferencePolicy, available_cores
+from utils.preprocessing import preprocess_maintenance, MAINTENANCE_FEATURES, MAINTENANCE_CAT_FEATURES
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..")
+MAINTENANCE_BUNDLE = os.path.join(BASE_DIR, "models", "maintenance.bundle")
+DEFAULT_CLIENTS = [1, 2, 4, 8, 16, 32, 64]
+
+SAMPLE = {
+    "Vehicle_ID": "BENCH-1",
+    "Usage_Hours": 5300.0, "Actual_Load": 7.5, "Engine_Temperature": 95.0,
+    "Tire_Pressure": 32.0, "Fuel_Consumption": 12.5, "Battery_Status": 75.0,
+    "Vibration_Levels": 1.8, "Oil_Quality": 65.0, "Failure_History": 2,
+    "Anomalies_Detected": 0, "Predictive_Score": 0.42, "Downtime_Maintenance": 1.5,
+    "Impact_on_Efficiency": 0.15, "Brake_Condition": "Good",
+    "Weather_Conditions": "Clear", "Road_Conditions": "Highway",
+}
+
+
+def summarize(latencies: list, elapsed: float) -> dict:
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(ms),
+        "throughput_rps": round(len(ms) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+# ─── In-process ───────────────────────────────────────────────────────────────
+def run_in_process(model, X: np.ndarray, clients: int, seconds: float) -> dict:
+    deadline = time.perf_counter() + seconds
+
+    def client() -> list:
+        latencies = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            model.predict_proba(X)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = [f.result() for f in [pool.submit(client) for _ in range(clients)]]
+    return summarize([t for r in results for t in r], time.perf_counter() - started)
+
+
+def bench_in_process(bundle: str, clients: list, seconds: float) -> dict:
+    pieces, _ = load_bundle(
+        bundle,
+        family="maintenance",
+        expected_pieces=["model", "encoders"],
+        feature_order=MAINTENANCE_FEATURES + MAINTENANCE_CAT_FEATURES,
+    )
+    model = pieces["model"]
+    X, _, _ = preprocess_maintenance(pd.DataFrame([SAMPLE]), fit=False, encoders=pieces["encoders"])
+    model.predict_proba(X)                                # warm-up
+
+    out = {}
+    # "trained" first: the policy caps native pools process-wide
+    print(f"   trained: n_jobs={model.n_jobs}")
+    out["trained"] = {n: run_in_process(model, X, n, seconds) for n in clients}
+    InferencePolicy().apply({"maintenance": model})
+    print(f"   policy:  n_jobs={model.n_jobs}, native pools × 1")
+    out["policy"] = {n: run_in_process(model, X, n, seconds) for n in clients}
+    return out
+
+
+# ─── Over HTTP ────────────────────────────────────────────────────────────────
+async def run_http(url: str, clients: int, seconds: float) -> dict:
+    import httpx
+
+    deadline = time.perf_counter() + seconds
+    latencies, errors = [], 0
+
+    async def client(http):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            r = await http.post("/predict/maintenance", json=SAMPLE)
+            if r.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=url, timeout=30, limits=limits) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return {**summarize(latencies or [0.0], elapsed), "errors": errors}
+
+
+def bench_http(url: str, clients: list, seconds: float) -> dict:
+    return {"service": {n: asyncio.run(run_http(url, n, seconds)) for n in clients}}
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+def print_table(results: dict):
+    for policy, rows in results.items():
+        print(f"\n📊 {policy}")
+        print(f"   {'clients':>7}  {'req/s':>9}  {'p50 ms':>9}  {'p99 ms':>9}")
+        for clients, r in rows.items():
+            print(f"   {clients:>7}  {r['throughput_rps']:>9.1f}  {r['p50_ms']:>9.2f}  {r['p99_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FleetFlow inference throughput vs. concurrent clients")
+    parser.add_argument("--clients", type=int, nargs="+", default=DEFAULT_CLIENTS, help="Concurrency levels (default: 1 … 64)")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each level")
+    parser.add_argument("--bundle", default=MAINTENANCE_BUNDLE, help="Maintenance bundle (in-process mode)")
+    parser.add_argument("--url", help="Benchmark a running service instead, e.g. http://localhost:8001")
+    parser.add_argument("--out", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    print(f"🏁 {available_cores()} cores, {args.seconds:g}s per level, clients {args.clients}")
+    if args.url:
+        results = bench_http(args.url, args.clients, args.seconds)
+    else:
+        results = bench_in_process(args.bundle, args.clients, args.seconds)
+    print_table(results)
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"cores": available_cores(), "seconds": args.seconds, "results": results}, f, indent=2)
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
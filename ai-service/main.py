@@ -3,18 +3,62 @@ main.py — FleetFlow AI Service (FastAPI)
 ─────────────────────────────────────────
 ML Endpoints:
   POST /predict/maintenance   → Predictive Maintenance
+  POST /predict/maintenance/partial → Same, from only the fields that changed
+  POST /predict/maintenance/batch   → Many vehicles in one model pass
   POST /predict/fuel          → Fuel CO2 Prediction + Anomaly Detection
-  POST /predict/delay         → Delivery Delay Prediction
+  POST /predict/delay         → Delivery Delay Prediction (+ P50 / P90 hours from leaf histograms)
+  POST /predict/delay/batch   → Many trips in one model pass
+  (maintenance and delay accept explain=true → per-feature contributions)
   POST /predict/eco-score     → Vehicle Eco / Fuel Economy Score
+  POST /predict/vehicle-snapshot → Maintenance, fuel, eco, carbon and driver score for one vehicle, in one call
 
 Rule-Based Endpoints:
   POST /predict/driver-score  → Driver Behaviour Scoring
   POST /predict/carbon        → Carbon Emission Tracking
-  POST /predict/route         → Smart Route Time Estimation
+  POST /predict/route         → Smart Route Time Estimation (road-graph routing by name / coordinates)
+  POST /optimize/route        → Multi-stop sequencing (NN + 2-opt / Or-opt) with per-stop ETA and fuel
+  POST /optimize/assignment   → Vehicle → trip matching (vectorized cost matrix + Hungarian algorithm)
+
+Routing:
+  GET  /routing/graph         → Road graph size and path-cache statistics
 
 System:
   GET  /health                → Health check
-  GET  /models/status         → Shows which .pkl models are loaded
+  GET  /models/status         → Shows which models are loaded
+  GET  /models/bundles        → Manifests (checksum, metrics, metadata) of loaded bundles
+  GET  /admission/stats       → Admission control: in-flight, queued, shed counts, queue waits
+  GET  /models/tiers          → Fast-tier (truncated ensemble) sizes + accuracy/latency curves
+  GET  /models/inference      → Inference thread policy (model n_jobs, native pools, batch threads)
+
+Streaming Anomaly Detection:
+  POST /stream/telemetry      → Score one fleet tick (columnar), returns anomaly events
+  GET  /stream/anomalies      → Recent anomaly events
+  GET  /stream/stats          → Detector counters and memory footprint
+
+Driver Events:
+  POST /drivers/events        → Ingest a batch of driver events (columnar)
+  GET  /drivers/{id}/score    → Score from running counts (all-time or last N days)
+  GET  /drivers/stats         → Store size and memory
+  POST /drivers/snapshot      → Persist the store to STATE_DIR
+
+Carbon Ledger:
+  GET  /carbon/rollup         → Totals + CO2/km over a time range (pre-aggregated buckets)
+  GET  /carbon/ledger/stats   → Ledger size and bucket counts
+
+Fleet Positions:
+  POST /fleet/positions       → Upsert latest vehicle positions (columnar)
+  GET  /fleet/nearest         → k nearest vehicles, filtered by type / engine status
+  GET  /fleet/within          → Vehicles within a radius, nearest first
+  GET  /fleet/stats           → Spatial index occupancy and counters
+
+Monitoring:
+  GET  /monitoring/drift      → PSI / KS of live inputs vs. the training reference, per feature
+  GET  /monitoring/drift/stats → Sketch sizes and per-request update cost
+  GET  /monitoring/audit      → Prediction audit log: queue depth, sampled / dropped / written counts
+
+Feature Store:
+  GET  /features/{vehicle_id} → Stored features + derived deltas / rolling means
+  POST /features/snapshot     → Persist the per-vehicle feature store to disk
 
 Run:
     py -m uvicorn main:app --reload --port 8001
@@ -22,77 +66,263 @@ Run:
 
 import os
 import math
+import time
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import List, Literal, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 from contextlib import asynccontextmanager
 from typing import Optional
 
-import joblib
 import numpy as np
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 
 from schemas import (
     MaintenanceRequest, MaintenanceResponse,
+    MaintenancePartialRequest, VehicleFeaturesResponse,
+    TelemetryTickRequest, TelemetryTickResponse, AnomalyEvent,
+    FleetPositionsRequest, FleetPositionsResponse, FleetQueryResponse,
+    CarbonRollupResponse,
+    DriverEventsRequest, DriverEventsResponse, DriverRollingScoreResponse,
+    Explanation, MaintenanceBatchRequest, MaintenanceBatchResponse, DelayBatchRequest, DelayBatchResponse,
     FuelRequest, FuelResponse,
     DelayRequest, DelayResponse,
     EcoScoreRequest, EcoScoreResponse,
     DriverScoreRequest, DriverScoreResponse,
     CarbonRequest, CarbonResponse,
+    VehicleSnapshotRequest, VehicleSnapshotResponse,
     RouteRequest, RouteResponse,
+    OptimizeRouteRequest, OptimizeRouteResponse, RouteLeg,
+    AssignmentRequest, AssignmentResponse, Assignment,
+)
+from utils.bundle import load_bundle, BundleError
+from utils.carbon import emission_factor
+from utils.feature_store import VehicleFeatureStore
+from utils.stream_anomaly import FleetAnomalyDetector, CHANNELS as STREAM_CHANNELS
+from utils.spatial_index import FleetSpatialIndex
+from utils.carbon_ledger import CarbonLedger
+from utils.attribution import TreeAttributor
+from utils.tiers import fast_models
+from utils.admission import AdmissionClass, AdmissionController, AdmissionMiddleware, parse_limits
+from utils.inference import InferencePolicy
+from utils.drift import DriftMonitor
+from utils.audit_log import PredictionAuditLog, parse_rates
+from utils.quantiles import LeafQuantiles
+from utils.driver_events import DriverEventStore, EVENT_TYPES, score_counts, grade_for
+from utils.routing import (
+    RoadGraph, RoutingError, ROAD_DETOUR, haversine_km, haversine_matrix,
+    base_speed, traffic_mult, weather_mult, load_ratio, load_mult, driving_hours, fuel_litres,
+)
+from utils.route_optimizer import solve as solve_route
+from utils.assignment import pair_costs, assign, trip_hours
+from utils.preprocessing import (
+    MAINTENANCE_FEATURES, MAINTENANCE_CAT_FEATURES,
+    FUEL_FEATURES, FUEL_CAT_FEATURES,
+    DELAY_FEATURES, DELAY_CAT_FEATURES,
+    ECO_FEATURES, ECO_CAT_FEATURES,
 )
 
 # ─── Logging ──────────────────────────────────────────────────────────────────
 logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
 logger = logging.getLogger("fleetflow-ai")
 
-# ─── Model paths ──────────────────────────────────────────────────────────────
+# ─── Model bundles ────────────────────────────────────────────────────────────
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "models")
+BUNDLE_USE_MMAP = os.getenv("BUNDLE_USE_MMAP", "false").lower() == "true"
 
-MODEL_FILES = {
-    "maintenance":         os.path.join(MODELS_DIR, "maintenance.pkl"),
-    "maintenance_enc":     os.path.join(MODELS_DIR, "maintenance_encoders.pkl"),
-    "fuel_co2":            os.path.join(MODELS_DIR, "fuel_co2.pkl"),
-    "fuel_anomaly":        os.path.join(MODELS_DIR, "fuel_anomaly.pkl"),
-    "fuel_enc":            os.path.join(MODELS_DIR, "fuel_encoders.pkl"),
-    "delay":               os.path.join(MODELS_DIR, "delay_model.pkl"),
-    "delay_enc":           os.path.join(MODELS_DIR, "delay_encoders.pkl"),
-    "eco_score":           os.path.join(MODELS_DIR, "eco_score_model.pkl"),
-    "eco_enc":             os.path.join(MODELS_DIR, "eco_encoders.pkl"),
+BUNDLE_FILES = {
+    "maintenance": os.path.join(MODELS_DIR, "maintenance.bundle"),
+    "fuel":        os.path.join(MODELS_DIR, "fuel.bundle"),
+    "delay":       os.path.join(MODELS_DIR, "delay.bundle"),
+    "eco":         os.path.join(MODELS_DIR, "eco.bundle"),
+}
+
+# family → (feature order the handlers expect, {piece in bundle: key in MODELS})
+BUNDLE_SPECS = {
+    "maintenance": (MAINTENANCE_FEATURES + MAINTENANCE_CAT_FEATURES,
+                    {"model": "maintenance", "encoders": "maintenance_enc"}),
+    "fuel":        (FUEL_FEATURES + FUEL_CAT_FEATURES,
+                    {"co2_model": "fuel_co2", "anomaly_model": "fuel_anomaly", "encoders": "fuel_enc"}),
+    "delay":       (DELAY_FEATURES + DELAY_CAT_FEATURES,
+                    {"model": "delay", "encoders": "delay_enc"}),
+    "eco":         (ECO_FEATURES + ECO_CAT_FEATURES,
+                    {"model": "eco_score", "encoders": "eco_enc"}),
+}
+# Pieces that older bundles may lack — the family still loads, the feature is off
+BUNDLE_OPTIONAL = {
+    "delay": {"leaf_quantiles": "delay_quantiles"},
 }
 
-# Global model store
+# Global model store (keyed by MODELS key) and bundle manifests (keyed by family)
 MODELS: dict = {}
+BUNDLES: dict = {}
+# Tree attribution tables for explain=true (keyed by MODELS key)
+EXPLAINERS: dict = {}
+
+# ─── Runtime state ────────────────────────────────────────────────────────────
+STATE_DIR = os.getenv("STATE_DIR", os.path.join(os.path.dirname(__file__), "state"))
+FEATURE_STORE_PATH = os.path.join(STATE_DIR, "feature_store.npz")
+DRIVER_EVENTS = DriverEventStore(ring_days=int(os.getenv("DRIVER_RING_DAYS", "32")))
+DRIVER_EVENTS_PATH = os.path.join(STATE_DIR, "driver_events.npz")
+DRIVER_SNAPSHOT_INTERVAL_S = float(os.getenv("DRIVER_SNAPSHOT_INTERVAL_S", "300"))
+CARBON_LEDGER = CarbonLedger(os.path.join(STATE_DIR, "carbon_ledger.jsonl"))
+
+FEATURE_STORE = VehicleFeatureStore(MAINTENANCE_FEATURES, MAINTENANCE_CAT_FEATURES)
+
+ANOMALY_DETECTOR = FleetAnomalyDetector(
+    capacity=int(os.getenv("STREAM_CAPACITY", "100000")),
+    window=int(os.getenv("STREAM_WINDOW", "32")),
+    z_threshold=float(os.getenv("STREAM_Z_THRESHOLD", "4.0")),
+)
 
+DRIFT = DriftMonitor(
+    slots=int(os.getenv("DRIFT_SLOTS", "288")),
+    slot_s=float(os.getenv("DRIFT_SLOT_S", "300")),
+    min_rows=int(os.getenv("DRIFT_MIN_ROWS", "100")),
+)
 
-def safe_load(key: str) -> Optional[object]:
-    """Load a .pkl model if it exists, otherwise return None."""
-    path = MODEL_FILES.get(key)
-    if path and os.path.exists(path):
-        try:
-            obj = joblib.load(path)
-            logger.info(f"✅ Loaded model: {key}")
-            return obj
-        except Exception as e:
-            logger.warning(f"⚠️  Failed to load {key}: {e}")
-    else:
-        logger.warning(f"⚠️  Model not found: {key} → {path}  (run training first)")
-    return None
+# Features + predictions captured for retraining (background Parquet writer)
+AUDIT_LOG = PredictionAuditLog(
+    os.getenv("AUDIT_DIR", os.path.join(STATE_DIR, "audit")),
+    rates=parse_rates(os.getenv("AUDIT_SAMPLE", "")),
+    default_rate=float(os.getenv("AUDIT_SAMPLE_DEFAULT", "1.0")),
+    capacity=int(os.getenv("AUDIT_QUEUE", "100000")),
+    flush_s=float(os.getenv("AUDIT_FLUSH_S", "2")),
+    rotate_rows=int(os.getenv("AUDIT_ROTATE_ROWS", "500000")),
+    rotate_s=float(os.getenv("AUDIT_ROTATE_S", "3600")),
+)
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "true").lower() == "true"
+
+FLEET_INDEX = FleetSpatialIndex(cell_deg=float(os.getenv("SPATIAL_CELL_DEG", "0.25")))
+
+ROAD_GRAPH_PATH = os.getenv(
+    "ROAD_GRAPH_PATH", os.path.join(os.path.dirname(__file__), "datasets", "road_graph.json")
+)
+ROAD_GRAPH: Optional[RoadGraph] = None
+
+
+def safe_load(family: str) -> dict:
+    """
+    Load one model bundle. Returns {MODELS key: object}; every key maps to None
+    if the bundle is missing, corrupt, or its pieces don't match what we expect,
+    so a family is either fully loaded or not loaded at all.
+    """
+    path = BUNDLE_FILES[family]
+    feature_order, piece_keys = BUNDLE_SPECS[family]
+    loaded = dict.fromkeys(piece_keys.values())
+
+    if not os.path.exists(path):
+        logger.warning(f"⚠️  Bundle not found: {family} → {path}  (run training first)")
+        return loaded
+    try:
+        pieces, manifest = load_bundle(
+            path,
+            family=family,
+            expected_pieces=list(piece_keys),
+            feature_order=feature_order,
+            use_mmap=BUNDLE_USE_MMAP,
+        )
+    except (BundleError, OSError, ValueError) as e:
+        logger.warning(f"⚠️  Rejected bundle {family}: {e}")
+        return loaded
+
+    BUNDLES[family] = manifest
+    for piece, key in piece_keys.items():
+        loaded[key] = pieces[piece]
+    for piece, key in BUNDLE_OPTIONAL.get(family, {}).items():
+        loaded[key] = pieces.get(piece)
+    for piece, fast in fast_models(pieces, manifest["metadata"]).items():
+        loaded[f"{piece_keys[piece]}_fast"] = fast
+    logger.info(f"✅ Loaded bundle: {family} (sha256 {manifest['sha256'][:12]}…)")
+    return loaded
+
+
+async def _snapshot_driver_events():
+    """Snapshot the driver event store every DRIVER_SNAPSHOT_INTERVAL_S seconds."""
+    while True:
+        await asyncio.sleep(DRIVER_SNAPSHOT_INTERVAL_S)
+        if len(DRIVER_EVENTS):
+            try:
+                await asyncio.to_thread(DRIVER_EVENTS.snapshot, DRIVER_EVENTS_PATH)
+            except OSError as e:
+                logger.warning(f"⚠️  Driver events snapshot failed: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Load all available models on startup
-    for key in MODEL_FILES:
-        MODELS[key] = safe_load(key)
+    # Load all available model bundles on startup
+    for family in BUNDLE_FILES:
+        MODELS.update(safe_load(family))
+    for key, features in (("maintenance", MAINTENANCE_FEATURES + MAINTENANCE_CAT_FEATURES),
+                          ("delay", DELAY_FEATURES + DELAY_CAT_FEATURES)):
+        for tier_key in (key, f"{key}_fast"):
+            if MODELS.get(tier_key) is not None:
+                EXPLAINERS[tier_key] = TreeAttributor(MODELS[tier_key], features)
+    quantiles = MODELS.get("delay_quantiles")
+    if isinstance(quantiles, LeafQuantiles) and MODELS.get("delay") is not None:
+        try:
+            quantiles.attach(MODELS["delay"])
+            logger.info(f"✅ Delay intervals: {quantiles.stats()}")
+        except ValueError as e:
+            logger.warning(f"⚠️  Delay intervals off: {e}")
+            MODELS["delay_quantiles"] = None
+    else:
+        MODELS["delay_quantiles"] = None
+    for family, manifest in BUNDLES.items():
+        DRIFT.configure(family, manifest["metadata"].get("drift_reference"))
+    if DRIFT.families:
+        logger.info(f"✅ Drift sketches: {', '.join(DRIFT.families)}")
+    if MODELS.get("maintenance_enc") is not None:
+        FEATURE_STORE.restrict({col: le.classes_ for col, le in MODELS["maintenance_enc"].items()
+                                if col in MAINTENANCE_CAT_FEATURES})
+    pinned = INFERENCE.apply(MODELS)
+    logger.info(f"🧵 Inference threads: {pinned} models pinned, native pools × {INFERENCE.native_threads}, "
+                f"batches ≥ {INFERENCE.parallel_min_rows} rows × {INFERENCE.batch_threads}")
+    if os.path.exists(FEATURE_STORE_PATH):
+        try:
+            n = FEATURE_STORE.restore(FEATURE_STORE_PATH)
+            logger.info(f"✅ Restored feature store: {n} vehicles")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️  Could not restore feature store: {e}")
+    if os.path.exists(DRIVER_EVENTS_PATH):
+        try:
+            n = DRIVER_EVENTS.restore(DRIVER_EVENTS_PATH)
+            logger.info(f"✅ Restored driver events: {n} drivers")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️  Could not restore driver events: {e}")
+    snapshotter = asyncio.create_task(_snapshot_driver_events())
+    if AUDIT_ENABLED:
+        AUDIT_LOG.start()
+    n = CARBON_LEDGER.load()
+    if n:
+        logger.info(f"✅ Carbon ledger replayed: {n} trips")
+    global ROAD_GRAPH
+    try:
+        ROAD_GRAPH = RoadGraph.load(ROAD_GRAPH_PATH)
+        pairs = ROAD_GRAPH.precompute_hubs()
+        logger.info(f"✅ Road graph: {len(ROAD_GRAPH.names)} nodes, {ROAD_GRAPH.n_edges} edges, "
+                    f"{pairs} hub pairs cached")
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"⚠️  Road graph unavailable ({e}); /predict/route needs distance_km")
     logger.info("🚀 FleetFlow AI Service ready")
     yield
+    if len(FEATURE_STORE):
+        FEATURE_STORE.snapshot(FEATURE_STORE_PATH)
+        logger.info(f"💾 Feature store snapshot → {FEATURE_STORE_PATH}")
+    snapshotter.cancel()
+    if len(DRIVER_EVENTS):
+        DRIVER_EVENTS.snapshot(DRIVER_EVENTS_PATH)
+        logger.info(f"💾 Driver events snapshot → {DRIVER_EVENTS_PATH}")
+    CARBON_LEDGER.close()
+    AUDIT_LOG.close()
     MODELS.clear()
+    BUNDLES.clear()
+    EXPLAINERS.clear()
 
 
 # ─── App ──────────────────────────────────────────────────────────────────────
@@ -116,6 +346,64 @@ if cors_origin and cors_origin != "*":
     if formatted_origin not in allowed_origins:
         allowed_origins.append(formatted_origin)
 
+# ─── Admission control ────────────────────────────────────────────────────────
+# class → (limit, queue, max wait s, priority); override with
+# ADMISSION_LIMITS="critical=12:96:2.5,bulk=2:8" (limit:queue[:max_wait])
+ADMISSION_DEFAULTS = {
+    "critical":    (8, 64, 2.0, 0),     # maintenance path — served first
+    "interactive": (8, 32, 1.0, 1),
+    "bulk":        (4, 16, 0.5, 2),     # carbon, batch scoring, ingestion, optimisers
+}
+ADMISSION_ROUTES = [
+    ("/predict/vehicle-snapshot", "critical"),
+    ("/predict/maintenance/batch", "bulk"),
+    ("/predict/maintenance", "critical"),
+    ("/features", "critical"),
+    ("/predict/carbon", "bulk"),
+    ("/carbon", "bulk"),
+    ("/predict/delay/batch", "bulk"),
+    ("/drivers/events", "bulk"),
+    ("/stream/telemetry", "bulk"),
+    ("/fleet/positions", "bulk"),
+    ("/optimize", "bulk"),
+]
+ADMISSION_EXEMPT = ("/health", "/admission", "/models", "/docs", "/redoc", "/openapi.json")
+
+
+def _admission_controller() -> AdmissionController:
+    overrides = parse_limits(os.getenv("ADMISSION_LIMITS", ""))
+    classes = []
+    for name, (limit, queue, max_wait, priority) in ADMISSION_DEFAULTS.items():
+        if name in overrides:
+            limit, queue, wait = overrides[name]
+            max_wait = wait if wait is not None else max_wait
+        classes.append(AdmissionClass(name, limit, queue, max_wait, priority))
+    return AdmissionController(
+        classes,
+        total=int(os.getenv("ADMISSION_TOTAL", "32")),   # below anyio's 40 threadpool tokens
+        routes=ADMISSION_ROUTES,
+        exempt=ADMISSION_EXEMPT,
+        default="interactive",
+    )
+
+
+ADMISSION = _admission_controller()
+if os.getenv("ADMISSION_ENABLED", "true").lower() == "true":
+    # Added before CORS so CORS stays outermost and 503s still carry its headers
+    app.add_middleware(AdmissionMiddleware, controller=ADMISSION)
+
+# ─── Inference threads ────────────────────────────────────────────────────────
+# Requests already run concurrently on the threadpool, so a model pass is
+# single-threaded unless it is a big batch; batch threads are split between the
+# bulk class's concurrent slots and the uvicorn worker processes
+INFERENCE = InferencePolicy(
+    workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    batch_concurrency=ADMISSION.classes["bulk"].limit,
+    native_threads=int(os.getenv("INFERENCE_NATIVE_THREADS", "1")),
+    batch_threads=int(os.getenv("INFERENCE_BATCH_THREADS", "0")) or None,
+    parallel_min_rows=int(os.getenv("INFERENCE_PARALLEL_MIN_ROWS", "2000")),
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -132,6 +420,12 @@ def health():
     return {"status": "ok", "service": "FleetFlow AI Service v1.0"}
 
 
+@app.get("/admission/stats", tags=["System"])
+async def admission_stats():
+    """Per-class concurrency, queue depth, shed counts and queue-wait percentiles."""
+    return ADMISSION.stats()
+
+
 @app.get("/models/status", tags=["System"])
 def models_status():
     return {
@@ -140,10 +434,111 @@ def models_status():
     }
 
 
+@app.get("/models/bundles", tags=["System"])
+def models_bundles():
+    return {
+        family: {
+            "sha256": m["sha256"],
+            "pieces": m["pieces"],
+            "feature_order": m["feature_order"],
+            "metrics": m["metrics"],
+            "created_at": m["metadata"].get("created_at"),
+            "sklearn_version": m["metadata"].get("sklearn_version"),
+        }
+        for family, m in BUNDLES.items()
+    }
+
+
+@app.get("/models/tiers", tags=["System"])
+def models_tiers():
+    """Fast-tier tree counts and the accuracy-vs-latency curves they were picked from."""
+    out = {}
+    for family, m in BUNDLES.items():
+        _, piece_keys = BUNDLE_SPECS[family]
+        for piece, spec in (m["metadata"].get("fast_tier") or {}).items():
+            key = piece_keys.get(piece, piece)
+            out[key] = {**spec, "loaded": MODELS.get(f"{key}_fast") is not None}
+    return out
+
+
+@app.get("/models/inference", tags=["System"])
+def models_inference():
+    """Thread policy the models run under: cores, batch threads and native pool sizes."""
+    return INFERENCE.stats()
+
+
+# ─── Streaming Anomaly Detection ──────────────────────────────────────────────
+@app.post("/stream/telemetry", response_model=TelemetryTickResponse, tags=["Streaming Anomalies"])
+def stream_telemetry(req: TelemetryTickRequest):
+    columns = [getattr(req, ch) for ch in STREAM_CHANNELS]
+    n = len(req.vehicle_ids)
+    if any(len(col) != n for col in columns):
+        raise HTTPException(status_code=422, detail="All telemetry columns must align with vehicle_ids")
+    events = ANOMALY_DETECTOR.ingest(req.vehicle_ids, np.column_stack(columns), ts=req.timestamp)
+    if req.lat is not None and req.lon is not None:
+        _update_positions(req)
+    return TelemetryTickResponse(readings=n, events=events)
+
+
+@app.get("/stream/anomalies", response_model=List[AnomalyEvent], tags=["Streaming Anomalies"])
+def stream_anomalies(limit: int = 100, vehicle_id: Optional[str] = None):
+    return ANOMALY_DETECTOR.recent(limit=limit, vehicle_id=vehicle_id)
+
+
+@app.get("/stream/stats", tags=["Streaming Anomalies"])
+def stream_stats():
+    return ANOMALY_DETECTOR.summary()
+
+
+# ─── Monitoring: Feature Drift ────────────────────────────────────────────────
+@app.get("/monitoring/drift", tags=["Monitoring"])
+def monitoring_drift(
+    family: Optional[str] = Query(None, description="maintenance | fuel | delay | eco (default: all)"),
+    window_minutes: Optional[float] = Query(None, gt=0, description="Only the last N minutes (default: whole ring)"),
+):
+    """
+    Per-feature PSI (and binned KS for numerics) of live request inputs against
+    the training reference stored in each bundle. Computed on demand from the
+    streaming sketches; no request rows are kept.
+    """
+    if family is not None and family not in DRIFT.families:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No drift sketch for '{family}' (bundle missing or trained without a reference)",
+        )
+    return DRIFT.report(family, window_s=window_minutes * 60 if window_minutes else None)
+
+
+@app.get("/monitoring/drift/stats", tags=["Monitoring"])
+def monitoring_drift_stats():
+    return DRIFT.stats()
+
+
+@app.get("/monitoring/audit", tags=["Monitoring"])
+def monitoring_audit():
+    """Prediction audit log counters: queued, sampled out, dropped under pressure, written."""
+    return {"enabled": AUDIT_ENABLED, **AUDIT_LOG.stats()}
+
+
 # ─── Service 1: Predictive Maintenance ────────────────────────────────────────
-@app.post("/predict/maintenance", response_model=MaintenanceResponse, tags=["Predictive Maintenance"])
-def predict_maintenance(req: MaintenanceRequest):
-    model = MODELS.get("maintenance")
+def _model_for(key: str, tier: str) -> tuple:
+    """(model, tier used) — "fast" falls back to the full model if its bundle has no fast tier."""
+    if tier == "fast" and MODELS.get(f"{key}_fast") is not None:
+        return MODELS[f"{key}_fast"], "fast"
+    return MODELS.get(key), "full"
+
+
+def _explanations(key: str, contributions: np.ndarray, output: str) -> list:
+    explainer = EXPLAINERS[key]
+    return [
+        Explanation(output=output, base_value=round(explainer.bias, 5), contributions=c)
+        for c in explainer.as_dicts(contributions)
+    ]
+
+
+def _score_maintenance(rows: list, vehicle_ids: list, explain: bool = False, tier: str = "full") -> list:
+    """Score any number of feature rows in one model pass → [MaintenanceResponse]."""
+    model, tier = _model_for("maintenance", tier)
     encoders = MODELS.get("maintenance_enc")
 
     if model is None or encoders is None:
@@ -154,56 +549,115 @@ def predict_maintenance(req: MaintenanceRequest):
 
     from utils.preprocessing import preprocess_maintenance
 
-    row = {
-        "Usage_Hours": req.Usage_Hours,
-        "Actual_Load": req.Actual_Load,
-        "Engine_Temperature": req.Engine_Temperature,
-        "Tire_Pressure": req.Tire_Pressure,
-        "Fuel_Consumption": req.Fuel_Consumption,
-        "Battery_Status": req.Battery_Status,
-        "Vibration_Levels": req.Vibration_Levels,
-        "Oil_Quality": req.Oil_Quality,
-        "Failure_History": req.Failure_History,
-        "Anomalies_Detected": req.Anomalies_Detected,
-        "Predictive_Score": req.Predictive_Score,
-        "Downtime_Maintenance": req.Downtime_Maintenance,
-        "Impact_on_Efficiency": req.Impact_on_Efficiency,
-        "Brake_Condition": req.Brake_Condition,
-        "Weather_Conditions": req.Weather_Conditions,
-        "Road_Conditions": req.Road_Conditions,
-    }
-    df = pd.DataFrame([row])
-    X, _, _ = preprocess_maintenance(df, fit=False, encoders=encoders)
-
-    pred = int(model.predict(X)[0])
-    proba = model.predict_proba(X)[0]
-    confidence = float(proba[pred])
-
-    # Risk classification
-    p_maintenance = float(proba[1])
-    if p_maintenance >= 0.75:
-        risk = "HIGH"
-        rec = "🔴 Immediate maintenance required. Schedule service within 24 hours."
-    elif p_maintenance >= 0.45:
-        risk = "MEDIUM"
-        rec = "🟡 Maintenance recommended within 3–5 days. Monitor vibration and oil quality."
-    else:
-        risk = "LOW"
-        rec = "🟢 Vehicle in good condition. Next maintenance check in 30 days."
+    DRIFT.observe("maintenance", rows)
+    X, _, _ = preprocess_maintenance(pd.DataFrame(rows), fit=False, encoders=encoders)
+
+    explanations = [None] * len(rows)
+    with INFERENCE.scope(len(rows)):
+        if explain:
+            # The attribution pass reads P(maintenance) off the same leaves
+            key = "maintenance_fast" if tier == "fast" else "maintenance"
+            p_maint, contributions = EXPLAINERS[key].explain(X)
+            explanations = _explanations(key, contributions, "P(maintenance)")
+        else:
+            p_maint = model.predict_proba(X)[:, 1]
+
+    results = []
+    for row, vehicle_id, p, explanation in zip(rows, vehicle_ids, p_maint, explanations):
+        p_maintenance = float(p)
+        pred = p_maintenance > 0.5
+        confidence = p_maintenance if pred else 1.0 - p_maintenance
+
+        # Risk classification
+        if p_maintenance >= 0.75:
+            risk = "HIGH"
+            rec = "🔴 Immediate maintenance required. Schedule service within 24 hours."
+        elif p_maintenance >= 0.45:
+            risk = "MEDIUM"
+            rec = "🟡 Maintenance recommended within 3–5 days. Monitor vibration and oil quality."
+        else:
+            risk = "LOW"
+            rec = "🟢 Vehicle in good condition. Next maintenance check in 30 days."
+
+        if AUDIT_ENABLED:
+            AUDIT_LOG.log("maintenance", vehicle_id, row,
+                          {"p_maintenance": p_maintenance, "risk_level": risk, "tier": tier})
+        results.append(MaintenanceResponse(
+            Vehicle_ID=vehicle_id,
+            maintenance_required=pred,
+            confidence=round(confidence, 4),
+            risk_level=risk,
+            recommendation=rec,
+            tier=tier,
+            explanation=explanation,
+        ))
+    return results
 
-    return MaintenanceResponse(
-        Vehicle_ID=req.Vehicle_ID,
-        maintenance_required=bool(pred),
-        confidence=round(confidence, 4),
-        risk_level=risk,
-        recommendation=rec,
+
+@app.post("/predict/maintenance", response_model=MaintenanceResponse, tags=["Predictive Maintenance"])
+def predict_maintenance(req: MaintenanceRequest):
+    row = req.model_dump(include=set(MAINTENANCE_FEATURES + MAINTENANCE_CAT_FEATURES))
+    if req.Vehicle_ID:
+        # Seed the feature store so later calls can use /predict/maintenance/partial
+        FEATURE_STORE.merge(req.Vehicle_ID, row)
+    return _score_maintenance([row], [req.Vehicle_ID], req.explain, req.tier)[0]
+
+
+@app.post("/predict/maintenance/batch", response_model=MaintenanceBatchResponse, tags=["Predictive Maintenance"])
+def predict_maintenance_batch(req: MaintenanceBatchRequest):
+    """Score many vehicles in one model pass; explain=true adds contributions for every item."""
+    started = time.perf_counter()
+    features = set(MAINTENANCE_FEATURES + MAINTENANCE_CAT_FEATURES)
+    rows = [item.model_dump(include=features) for item in req.items]
+    for item, row in zip(req.items, rows):
+        if item.Vehicle_ID:
+            FEATURE_STORE.merge(item.Vehicle_ID, row)
+    results = _score_maintenance(rows, [item.Vehicle_ID for item in req.items], req.explain, req.tier)
+    return MaintenanceBatchResponse(
+        results=results, elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+@app.post("/predict/maintenance/partial", response_model=MaintenanceResponse, tags=["Predictive Maintenance"])
+def predict_maintenance_partial(req: MaintenancePartialRequest):
+    """
+    Merge only the changed fields with the vehicle's stored state, then score.
+    Returns 422 listing the features still unknown for a new vehicle.
+    """
+    changed = req.model_dump(exclude={"Vehicle_ID", "explain", "tier"}, exclude_none=True)
+    row = FEATURE_STORE.merge(req.Vehicle_ID, changed)
+    missing = FEATURE_STORE.missing(row)
+    if missing:
+        raise HTTPException(
+            status_code=422,
+            detail=f"No stored value for {missing} on {req.Vehicle_ID}. Send them once in full.",
+        )
+    return _score_maintenance([row], [req.Vehicle_ID], req.explain, req.tier)[0]
+
+
+@app.get("/features/{vehicle_id}", response_model=VehicleFeaturesResponse, tags=["Feature Store"])
+def vehicle_features(vehicle_id: str):
+    features = FEATURE_STORE.get(vehicle_id)
+    if features is None:
+        raise HTTPException(status_code=404, detail=f"No stored features for {vehicle_id}")
+    return VehicleFeaturesResponse(
+        Vehicle_ID=vehicle_id,
+        features=features,
+        missing=FEATURE_STORE.missing(features),
+        **FEATURE_STORE.derived(vehicle_id),
     )
 
 
+@app.post("/features/snapshot", tags=["Feature Store"])
+def snapshot_features():
+    n = FEATURE_STORE.snapshot(FEATURE_STORE_PATH)
+    return {"vehicles": n, "path": FEATURE_STORE_PATH}
+
+
 # ─── Service 2: Fuel CO2 Prediction + Anomaly ─────────────────────────────────
 @app.post("/predict/fuel", response_model=FuelResponse, tags=["Fuel & CO2"])
 def predict_fuel(req: FuelRequest):
-    co2_model = MODELS.get("fuel_co2")
+    co2_model, tier = _model_for("fuel_co2", req.tier)
     anomaly_model = MODELS.get("fuel_anomaly")
     encoders = MODELS.get("fuel_enc")
 
@@ -225,6 +679,7 @@ def predict_fuel(req: FuelRequest):
         "Transmission": req.Transmission,
         "Fuel Type": req.Fuel_Type,
     }
+    DRIFT.observe("fuel", [row])
     df = pd.DataFrame([row])
     X, _, _ = preprocess_fuel(df, fit=False, encoders=encoders)
 
@@ -254,6 +709,11 @@ def predict_fuel(req: FuelRequest):
     else:
         rec = "🔴 Poor fuel efficiency. Recommend engine tune-up and load optimization."
 
+    if AUDIT_ENABLED:
+        AUDIT_LOG.log("fuel", req.Vehicle_ID, row, {
+            "co2_g_per_km": pred_co2, "anomaly_score": anomaly_raw,
+            "is_anomaly": bool(is_anomaly), "tier": tier,
+        })
     return FuelResponse(
         Vehicle_ID=req.Vehicle_ID,
         predicted_co2_g_per_km=round(pred_co2, 2),
@@ -261,13 +721,31 @@ def predict_fuel(req: FuelRequest):
         anomaly_score=round(anomaly_raw, 4),
         fuel_efficiency_rating=rating,
         recommendation=rec,
+        tier=tier,
     )
 
 
 # ─── Service 3: Delivery Delay Prediction ─────────────────────────────────────
-@app.post("/predict/delay", response_model=DelayResponse, tags=["Delivery Delay"])
-def predict_delay(req: DelayRequest):
-    model = MODELS.get("delay")
+DELAY_ON_TIME_HOURS = 30.0
+DELAY_QUANTILES = (0.5, 0.9)
+
+
+def _delay_inputs(df: pd.DataFrame, encoders: dict) -> np.ndarray:
+    """Label-encode (unknown → -1) and scale delay-model rows; any number of rows."""
+    df = df.copy()
+    for col in DELAY_CAT_FEATURES:
+        le = encoders.get(col)
+        if le is not None:
+            codes = {c: i for i, c in enumerate(le.classes_)}
+            df[col] = df[col].astype(str).map(codes).fillna(-1)
+
+    X = df[DELAY_FEATURES + DELAY_CAT_FEATURES].fillna(0).astype(float).values
+    return encoders["__scaler__"].transform(X)
+
+
+def _score_delay(rows: list, trip_ids: list, explain: bool = False, tier: str = "full") -> list:
+    """Predict delivery hours for any number of trips in one model pass → [DelayResponse]."""
+    model, tier = _model_for("delay", tier)
     encoders = MODELS.get("delay_enc")
 
     if model is None or encoders is None:
@@ -276,61 +754,79 @@ def predict_delay(req: DelayRequest):
             detail="Delay model not loaded. Run: python -m training.train_delay",
         )
 
-    from sklearn.preprocessing import LabelEncoder
-
-    DELAY_NUM   = ["Usage_Hours", "Actual_Load", "Load_Capacity",
-                   "Downtime_Maintenance", "Impact_on_Efficiency",
-                   "Fuel_Consumption", "Vibration_Levels"]
-    DELAY_CAT   = ["Route_Info", "Weather_Conditions", "Road_Conditions"]
-
-    row = {
-        "Usage_Hours": req.Usage_Hours,
-        "Actual_Load": req.Actual_Load,
-        "Load_Capacity": req.Load_Capacity,
-        "Downtime_Maintenance": req.Downtime_Maintenance,
-        "Impact_on_Efficiency": req.Impact_on_Efficiency,
-        "Fuel_Consumption": req.Fuel_Consumption,
-        "Vibration_Levels": req.Vibration_Levels,
-        "Route_Info": req.Route_Info,
-        "Weather_Conditions": req.Weather_Conditions,
-        "Road_Conditions": req.Road_Conditions,
-    }
-    df = pd.DataFrame([row])
-
-    for col in DELAY_CAT:
-        le: LabelEncoder = encoders.get(col)
-        if le is not None:
-            val = str(df[col].iloc[0])
-            df[col] = le.transform([val])[0] if val in le.classes_ else -1
-
-    X = df[DELAY_NUM + DELAY_CAT].fillna(0).astype(float).values
-    X_scaled = encoders["__scaler__"].transform(X)
-
-    pred_hours = float(model.predict(X_scaled)[0])
+    DRIFT.observe("delay", rows)
+    X_scaled = _delay_inputs(pd.DataFrame(rows, columns=DELAY_FEATURES + DELAY_CAT_FEATURES), encoders)
+
+    explanations = [None] * len(rows)
+    intervals = [(None, None)] * len(rows)
+    quantiles = MODELS.get("delay_quantiles")
+    with INFERENCE.scope(len(rows)):
+        if explain:
+            key = "delay_fast" if tier == "fast" else "delay"
+            hours, contributions = EXPLAINERS[key].explain(X_scaled)
+            explanations = _explanations(key, contributions, "delivery hours")
+            if quantiles is not None:
+                _, intervals = quantiles.predict(X_scaled, model, DELAY_QUANTILES)
+        elif quantiles is not None:
+            # Mean and quantiles from the same leaves — one pass over the trees
+            hours, intervals = quantiles.predict(X_scaled, model, DELAY_QUANTILES)
+        else:
+            hours = model.predict(X_scaled)
+
+    results = []
+    for row, trip_id, pred_hours, (p50, p90), explanation in zip(rows, trip_ids, hours, intervals, explanations):
+        # Delay risk: typical good delivery = 30 hrs
+        if pred_hours <= DELAY_ON_TIME_HOURS:
+            risk = "LOW"
+            rec = "🟢 On-time delivery expected."
+        elif pred_hours <= 45.0:
+            risk = "MEDIUM"
+            rec = "🟡 Minor delay likely. Notify customer and monitor route."
+        else:
+            risk = "HIGH"
+            rec = "🔴 Significant delay predicted. Reroute or escalate to fleet manager."
+
+        if AUDIT_ENABLED:
+            AUDIT_LOG.log("delay", trip_id, row,
+                          {"delivery_hours": float(pred_hours), "p90_hours": None if p90 is None else float(p90),
+                           "delay_risk": risk, "tier": tier})
+        results.append(DelayResponse(
+            Trip_ID=trip_id,
+            predicted_delivery_hours=round(float(pred_hours), 2),
+            p50_delivery_hours=None if p50 is None else round(float(p50), 2),
+            p90_delivery_hours=None if p90 is None else round(float(p90), 2),
+            delay_risk=risk,
+            recommendation=rec,
+            tier=tier,
+            explanation=explanation,
+        ))
+    return results
 
-    # Delay risk: typical good delivery = 30 hrs
-    if pred_hours <= 30.0:
-        risk = "LOW"
-        rec = "🟢 On-time delivery expected."
-    elif pred_hours <= 45.0:
-        risk = "MEDIUM"
-        rec = "🟡 Minor delay likely. Notify customer and monitor route."
-    else:
-        risk = "HIGH"
-        rec = "🔴 Significant delay predicted. Reroute or escalate to fleet manager."
 
-    return DelayResponse(
-        Trip_ID=req.Trip_ID,
-        predicted_delivery_hours=round(pred_hours, 2),
-        delay_risk=risk,
-        recommendation=rec,
+@app.post("/predict/delay", response_model=DelayResponse, tags=["Delivery Delay"])
+def predict_delay(req: DelayRequest):
+    row = req.model_dump(include=set(DELAY_FEATURES + DELAY_CAT_FEATURES))
+    return _score_delay([row], [req.Trip_ID], req.explain, req.tier)[0]
+
+
+@app.post("/predict/delay/batch", response_model=DelayBatchResponse, tags=["Delivery Delay"])
+def predict_delay_batch(req: DelayBatchRequest):
+    """Predict many trips in one model pass; explain=true adds contributions for every item."""
+    started = time.perf_counter()
+    features = set(DELAY_FEATURES + DELAY_CAT_FEATURES)
+    results = _score_delay(
+        [item.model_dump(include=features) for item in req.items],
+        [item.Trip_ID for item in req.items],
+        req.explain,
+        req.tier,
     )
+    return DelayBatchResponse(results=results, elapsed_ms=round((time.perf_counter() - started) * 1000, 2))
 
 
 # ─── Service 4: Vehicle Eco Score ─────────────────────────────────────────────
 @app.post("/predict/eco-score", response_model=EcoScoreResponse, tags=["Eco Score"])
 def predict_eco_score(req: EcoScoreRequest):
-    model = MODELS.get("eco_score")
+    model, tier = _model_for("eco_score", req.tier)
     encoders = MODELS.get("eco_enc")
 
     if model is None or encoders is None:
@@ -354,6 +850,7 @@ def predict_eco_score(req: EcoScoreRequest):
         "Tailpipe CO2 (FT1)": req.Tailpipe_CO2,
         "Annual Fuel Cost (FT1)": req.Annual_Fuel_Cost,
     }
+    DRIFT.observe("eco", [row])
     df = pd.DataFrame([row])
     X, _, _ = preprocess_eco(df, fit=False, encoders=encoders)
 
@@ -387,6 +884,8 @@ def predict_eco_score(req: EcoScoreRequest):
     else:
         rec = "🔴 High emissions vehicle. Recommend retirement or replacement with EV/hybrid."
 
+    if AUDIT_ENABLED:
+        AUDIT_LOG.log("eco", req.Vehicle_ID, row, {"eco_score": pred_score, "eco_grade": grade, "tier": tier})
     return EcoScoreResponse(
         Vehicle_ID=req.Vehicle_ID,
         predicted_eco_score=round(pred_score, 2),
@@ -394,6 +893,7 @@ def predict_eco_score(req: EcoScoreRequest):
         ghg_rating=ghg,
         annual_co2_kg=annual_co2_kg,
         recommendation=rec,
+        tier=tier,
     )
 
 
@@ -405,69 +905,74 @@ def predict_driver_score(req: DriverScoreRequest):
     Score = 100 - penalties for speeding, harsh braking, acceleration, idle time.
     Optionally enriched with trip count and fuel efficiency.
     """
-    base_score = 100.0
-
-    # Penalties
-    overspeed_penalty   = req.overspeed_events    * 2.0
-    harsh_brake_penalty = req.harsh_brake_events  * 3.0
-    harsh_accel_penalty = req.harsh_accel_events  * 2.5
-    idle_penalty        = req.idle_minutes        * 0.3
-    late_delivery_pen   = req.late_deliveries     * 5.0
-
-    # Bonuses
-    on_time_bonus = req.on_time_deliveries * 1.0
-
-    raw_score = base_score - overspeed_penalty - harsh_brake_penalty \
-                - harsh_accel_penalty - idle_penalty - late_delivery_pen \
-                + on_time_bonus
-
-    score = round(max(0.0, min(100.0, raw_score)), 1)
-
-    # Grade
-    if score >= 90:
-        grade = "A"
-        risk  = "LOW"
-        badge = "⭐ Excellent Driver"
-        rec   = "🏆 Outstanding performance. Eligible for driver incentive bonus."
-    elif score >= 75:
-        grade = "B"
-        risk  = "LOW"
-        badge = "✅ Good Driver"
-        rec   = "👍 Good driving habits. Watch idle time and minor speeding events."
-    elif score >= 60:
-        grade = "C"
-        risk  = "MEDIUM"
-        badge = "⚠️ Average Driver"
-        rec   = "⚠️ Needs improvement. Schedule driver training for braking and speed control."
-    elif score >= 40:
-        grade = "D"
-        risk  = "HIGH"
-        badge = "🚨 At-Risk Driver"
-        rec   = "🚨 High-risk behaviour detected. Mandatory safety training required."
-    else:
-        grade = "F"
-        risk  = "CRITICAL"
-        badge = "🔴 Unsafe Driver"
-        rec   = "🔴 CRITICAL: Immediately suspend pending full safety review."
-
+    score, penalties = score_counts([
+        req.overspeed_events, req.harsh_brake_events, req.harsh_accel_events,
+        req.idle_minutes, req.late_deliveries, req.on_time_deliveries,
+    ])
+    grade, risk, badge, rec = grade_for(score)
     return DriverScoreResponse(
         Driver_ID=req.Driver_ID,
         score=score,
         grade=grade,
         risk_level=risk,
         badge=badge,
-        penalties={
-            "overspeed":    round(overspeed_penalty, 1),
-            "harsh_brake":  round(harsh_brake_penalty, 1),
-            "harsh_accel":  round(harsh_accel_penalty, 1),
-            "idle":         round(idle_penalty, 1),
-            "late_delivery":round(late_delivery_pen, 1),
-            "on_time_bonus": round(on_time_bonus, 1),
-        },
+        penalties=penalties,
+        recommendation=rec,
+    )
+
+
+@app.post("/drivers/events", response_model=DriverEventsResponse, tags=["Driver Scoring"])
+def ingest_driver_events(req: DriverEventsRequest):
+    """
+    Ingest a batch of driver events (overspeed, harsh_brake, harsh_accel,
+    idle_minutes, late_delivery, on_time_delivery) into the running per-driver
+    counts behind GET /drivers/{driver_id}/score.
+    """
+    n = len(req.driver_ids)
+    columns = [req.events] + [c for c in (req.values, req.timestamps) if c is not None]
+    if any(len(col) != n for col in columns):
+        raise HTTPException(status_code=422, detail="All event columns must align with driver_ids")
+    accepted = DRIVER_EVENTS.ingest(req.driver_ids, req.events, values=req.values, ts=req.timestamps)
+    return DriverEventsResponse(accepted=accepted, drivers=len(DRIVER_EVENTS))
+
+
+@app.get("/drivers/{driver_id}/score", response_model=DriverRollingScoreResponse, tags=["Driver Scoring"])
+def driver_rolling_score(driver_id: str, window_days: Optional[int] = Query(None, ge=1)):
+    """Score from ingested events — all-time, or over the last ``window_days`` days."""
+    if window_days is not None and window_days > DRIVER_EVENTS.ring_days:
+        raise HTTPException(
+            status_code=422, detail=f"window_days can be at most {DRIVER_EVENTS.ring_days}",
+        )
+    counts = DRIVER_EVENTS.counts(driver_id, window_days)
+    if counts is None:
+        raise HTTPException(status_code=404, detail=f"No events recorded for {driver_id}")
+    score, penalties = score_counts(counts)
+    grade, risk, badge, rec = grade_for(score)
+    return DriverRollingScoreResponse(
+        Driver_ID=driver_id,
+        score=score,
+        grade=grade,
+        risk_level=risk,
+        badge=badge,
+        penalties=penalties,
         recommendation=rec,
+        window_days=window_days,
+        counts={e: round(float(c), 2) for e, c in zip(EVENT_TYPES, counts)},
+        last_event_at=DRIVER_EVENTS.last_event_at(driver_id),
     )
 
 
+@app.get("/drivers/stats", tags=["Driver Scoring"])
+def driver_events_stats():
+    return DRIVER_EVENTS.stats()
+
+
+@app.post("/drivers/snapshot", tags=["Driver Scoring"])
+def snapshot_driver_events():
+    n = DRIVER_EVENTS.snapshot(DRIVER_EVENTS_PATH)
+    return {"drivers": n, "path": DRIVER_EVENTS_PATH}
+
+
 # ─── Service 6: Carbon Emission Tracking ──────────────────────────────────────
 @app.post("/predict/carbon", response_model=CarbonResponse, tags=["Carbon Tracking"])
 def predict_carbon(req: CarbonRequest):
@@ -476,16 +981,15 @@ def predict_carbon(req: CarbonRequest):
     CO2 = fuel_litres × emission_factor (kg CO2 per litre)
     Diesel: 2.68 kg/L  |  Petrol: 2.31 kg/L  |  CNG: 1.97 kg/L
     """
-    EMISSION_FACTORS = {
-        "diesel":  2.68,
-        "petrol":  2.31,
-        "gasoline": 2.31,
-        "cng":     1.97,
-        "lpg":     1.63,
-        "electric": 0.0,
-    }
-    factor = EMISSION_FACTORS.get(req.fuel_type.lower(), 2.68)
+    factor = emission_factor(req.fuel_type)
     co2_kg = round(req.fuel_litres * factor, 3)
+    recorded = False
+    if req.record:
+        CARBON_LEDGER.record(
+            req.Vehicle_ID, req.Driver_ID, req.Trip_ID, req.fuel_type,
+            req.fuel_litres, req.distance_km, co2_kg, ts=req.timestamp,
+        )
+        recorded = True
 
     # CO2 per km
     co2_per_km = round(co2_kg / req.distance_km, 4) if req.distance_km > 0 else 0.0
@@ -518,66 +1022,470 @@ def predict_carbon(req: CarbonRequest):
         trees_to_offset=trees_needed,
         emission_rating=rating,
         recommendation=rec,
+        recorded=recorded,
+    )
+
+
+@app.get("/carbon/rollup", response_model=CarbonRollupResponse, tags=["Carbon Tracking"])
+def carbon_rollup(
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    group_by: Optional[Literal["vehicle", "driver", "fuel_type"]] = None,
+    key: Optional[str] = None,
+    interval: Optional[Literal["hour", "day", "month"]] = None,
+):
+    """
+    Ledger totals and CO2/km over [start, end) (Unix seconds, hour resolution;
+    defaults to everything recorded). Optionally per vehicle / driver / fuel
+    type (``key`` picks one) and as an hourly / daily / monthly series.
+    """
+    if start is None:
+        start = CARBON_LEDGER.first_ts or time.time()
+    if end is None:
+        end = (CARBON_LEDGER.last_ts or time.time()) + 3600
+    if end <= start:
+        raise HTTPException(status_code=422, detail="end must be after start")
+    if key is not None and group_by is None:
+        raise HTTPException(status_code=422, detail="key needs group_by")
+    result = CARBON_LEDGER.rollup(start, end, group_by=group_by, key=key, interval=interval)
+    return CarbonRollupResponse(start=start, end=end, **result)
+
+
+@app.get("/carbon/ledger/stats", tags=["Carbon Tracking"])
+def carbon_ledger_stats():
+    return CARBON_LEDGER.stats()
+
+
+# ─── Vehicle Snapshot ─────────────────────────────────────────────────────────
+SNAPSHOT_SECTIONS = {
+    "maintenance": predict_maintenance,
+    "fuel":        predict_fuel,
+    "eco":         predict_eco_score,
+    "carbon":      predict_carbon,
+    "driver":      predict_driver_score,
+}
+
+
+@app.post("/predict/vehicle-snapshot", response_model=VehicleSnapshotResponse, tags=["Vehicle Snapshot"])
+def predict_vehicle_snapshot(req: VehicleSnapshotRequest):
+    """
+    One telemetry payload per vehicle → every applicable model, in one call.
+    The body is parsed and validated once; each section present goes to the same
+    handler as its own endpoint and the results come back together. Sections run
+    one after another on this request's threadpool thread, so a snapshot holds
+    one thread like any other admitted request (see ADMISSION_TOTAL). A section
+    that cannot be scored (e.g. its model isn't loaded) is reported under
+    ``errors`` without failing the others.
+    """
+    started = time.perf_counter()
+    sections = {name: getattr(req, name) for name in SNAPSHOT_SECTIONS if getattr(req, name) is not None}
+    if not sections:
+        raise HTTPException(
+            status_code=422, detail=f"Snapshot needs at least one of: {', '.join(SNAPSHOT_SECTIONS)}",
+        )
+
+    results, errors = {}, {}
+    for name, section in sections.items():
+        if "Vehicle_ID" in type(section).model_fields and section.Vehicle_ID is None:
+            section.Vehicle_ID = req.Vehicle_ID
+        if "Driver_ID" in type(section).model_fields and section.Driver_ID is None:
+            section.Driver_ID = req.Driver_ID
+        try:
+            results[name] = SNAPSHOT_SECTIONS[name](section)
+        except HTTPException as e:
+            errors[name] = str(e.detail)
+    return VehicleSnapshotResponse(
+        Vehicle_ID=req.Vehicle_ID,
+        **results,
+        errors=errors,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
     )
 
 
 # ─── Service 7: Smart Route Time Estimation ────────────────────────────────────
+def _route_risk(traffic_level: str, weather: str, total_hours: float) -> tuple:
+    """(delay_risk, recommendation) from the trip conditions."""
+    if traffic_level.lower() == "jam" or weather.lower() in ("storm", "snow"):
+        return "HIGH", f"🔴 Severe conditions. Delay departure or choose alternate route. ETA: {round(total_hours, 2)}h"
+    if traffic_mult(traffic_level) < 0.80 or weather_mult(weather) < 0.85:
+        return "MEDIUM", f"🟡 Moderate delay expected. Inform customer. ETA: {round(total_hours, 2)}h"
+    return "LOW", f"🟢 Route clear. On-schedule delivery expected. ETA: {round(total_hours, 2)}h"
+
+
 @app.post("/predict/route", response_model=RouteResponse, tags=["Route Optimization"])
 def predict_route(req: RouteRequest):
     """
     Estimates estimated travel time and adjusts for traffic, weather, and load.
     Uses physics-based formula — no external API required.
-    Phase 2: integrate OpenRouteService or Google Directions API.
+    Give origin + destination (city names or coordinates) to route on the local
+    road graph; otherwise distance_km and road_type are used as-is.
     """
-    # Base speed by road type (km/h)
-    BASE_SPEED = {
-        "highway": 90.0,
-        "urban":   35.0,
-        "rural":   60.0,
-        "mixed":   55.0,
-    }
-    speed = BASE_SPEED.get(req.road_type.lower(), 55.0)
-
-    # Traffic multiplier (slows down speed)
-    TRAFFIC_MULT = {"low": 1.0, "medium": 0.80, "high": 0.60, "jam": 0.35}
-    t_mult = TRAFFIC_MULT.get(req.traffic_level.lower(), 0.80)
-
-    # Weather multiplier
-    WEATHER_MULT = {"clear": 1.0, "rain": 0.85, "fog": 0.70, "snow": 0.55, "storm": 0.40}
-    w_mult = WEATHER_MULT.get(req.weather.lower(), 0.90)
-
-    # Load multiplier (heavy load = slower)
-    load_ratio = req.current_load_kg / req.max_load_kg if req.max_load_kg > 0 else 0.5
-    load_mult = 1.0 - (load_ratio * 0.15)   # max 15% penalty at full load
-
-    effective_speed = speed * t_mult * w_mult * load_mult
-    base_hours = req.distance_km / max(effective_speed, 1.0)
-
-    # Add buffer for stops/breaks (15 min per 4 hours driving)
-    stop_minutes = (base_hours // 4) * 15
-    total_hours = base_hours + (stop_minutes / 60)
-
-    # Fuel estimate: base consumption adjusted for load and speed
-    fuel_est = round(req.base_fuel_consumption_l100km * req.distance_km / 100
- * (1 + load_ratio * 0.2), 2)
-
-    # Risk
-    if req.traffic_level.lower() == "jam" or req.weather.lower() in ("storm", "snow"):
-        risk = "HIGH"
-        rec = f"🔴 Severe conditions. Delay departure or choose alternate route. ETA: {round(total_hours, 2)}h"
-    elif t_mult < 0.80 or w_mult < 0.85:
-        risk = "MEDIUM"
-        rec = f"🟡 Moderate delay expected. Inform customer. ETA: {round(total_hours, 2)}h"
+    path = origin = destination = None
+    if req.origin is not None and req.destination is not None:
+        if ROAD_GRAPH is None:
+            raise HTTPException(status_code=503, detail="Road graph not loaded. Send distance_km instead.")
+        ends = [p if isinstance(p, str) else (p.lat, p.lon) for p in (req.origin, req.destination)]
+        try:
+            path, origin, destination = ROAD_GRAPH.route(*ends)
+        except RoutingError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        distance_km = path.distance_km
+        speed = path.speed_kmh          # free-flow speed along the chosen roads
+    elif req.distance_km is not None:
+        distance_km = req.distance_km
+        speed = base_speed(req.road_type)
     else:
-        risk = "LOW"
-        rec = f"🟢 Route clear. On-schedule delivery expected. ETA: {round(total_hours, 2)}h"
+        raise HTTPException(status_code=422, detail="Provide distance_km or both origin and destination.")
+
+    t_mult = traffic_mult(req.traffic_level)
+    w_mult = weather_mult(req.weather)
+    ratio = load_ratio(req.current_load_kg, req.max_load_kg)
+
+    effective_speed = speed * t_mult * w_mult * load_mult(ratio)
+    total_hours = driving_hours(distance_km / max(effective_speed, 1.0))
+    fuel_est = round(fuel_litres(req.base_fuel_consumption_l100km, distance_km, ratio), 2)
+
+    risk, rec = _route_risk(req.traffic_level, req.weather, total_hours)
 
     return RouteResponse(
         Trip_ID=req.Trip_ID,
-        distance_km=req.distance_km,
+        distance_km=distance_km,
         effective_speed_kmh=round(effective_speed, 1),
         estimated_hours=round(total_hours, 2),
         estimated_fuel_litres=fuel_est,
         delay_risk=risk,
         recommendation=rec,
+        origin=origin,
+        destination=destination,
+        path=list(path.nodes) if path else None,
+        road_km=dict(path.road_km) if path else None,
+    )
+
+
+# ─── Service 8: Multi-Stop Route Sequencing ────────────────────────────────────
+def _stop_matrices(places: list, mode: str, road_type: str) -> tuple:
+    """(km, free-flow hours, labels) between places, on the road graph or by haversine."""
+    if mode == "graph":
+        return ROAD_GRAPH.place_matrices(places)
+    lat, lon, labels = [], [], []
+    for place in places:
+        if isinstance(place, str):
+            if ROAD_GRAPH is None:
+                raise RoutingError(f"Cannot locate '{place}' without the road graph; send {{lat, lon}}")
+            i, _, label = ROAD_GRAPH.resolve(place)
+            place = (ROAD_GRAPH.lat[i], ROAD_GRAPH.lon[i])
+        else:
+            label = f"({place[0]:.4f}, {place[1]:.4f})"
+        lat.append(place[0])
+        lon.append(place[1])
+        labels.append(label)
+    km = haversine_matrix(np.array(lat), np.array(lon)) * ROAD_DETOUR
+    return km, km / base_speed(road_type), labels
+
+
+@app.post("/optimize/route", response_model=OptimizeRouteResponse, tags=["Route Optimization"])
+def optimize_route(req: OptimizeRouteRequest):
+    """
+    Orders a depot + stops trip (nearest neighbour, then 2-opt / Or-opt within
+    time_budget_ms) and estimates per-stop ETA and fuel with the same traffic,
+    weather and load multipliers as /predict/route. The load ratio falls as
+    each stop's drop_kg is delivered.
+    """
+    mode = req.distance_mode
+    if mode == "auto":
+        mode = "graph" if ROAD_GRAPH is not None else "haversine"
+    if mode == "graph" and ROAD_GRAPH is None:
+        raise HTTPException(status_code=503, detail="Road graph not loaded. Use distance_mode=haversine.")
+
+    places = [p if isinstance(p, str) else (p.lat, p.lon) for p in [req.depot] + [s.location for s in req.stops]]
+    try:
+        km, hours, labels = _stop_matrices(places, mode, req.road_type)
+    except RoutingError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    order, stats = solve_route(
+        hours if req.objective == "time" else km,
+        closed=req.return_to_depot,
+        time_budget_s=req.time_budget_ms / 1000,
+    )
+
+    t_mult = traffic_mult(req.traffic_level)
+    w_mult = weather_mult(req.weather)
+    load = req.current_load_kg
+    drive = service = fuel = distance = 0.0
+    legs = []
+    visits = order + ([0] if req.return_to_depot else [])
+    prev = 0
+    for i in visits:
+        leg_km, leg_free = km[prev, i], hours[prev, i]
+        ratio = load_ratio(load, req.max_load_kg)
+        speed = leg_km / leg_free if leg_free > 0 else base_speed(req.road_type)
+        leg_hours = leg_km / max(speed * t_mult * w_mult * load_mult(ratio), 1.0)
+        leg_fuel = fuel_litres(req.base_fuel_consumption_l100km, leg_km, ratio)
+        drive += leg_hours
+        fuel += leg_fuel
+        distance += leg_km
+        arrival = driving_hours(drive) + service / 60
+        if i:
+            stop = req.stops[i - 1]
+            load = max(load - stop.drop_kg, 0.0)
+            service += stop.service_minutes
+        legs.append(RouteLeg(
+            stop_id=req.stops[i - 1].id if i else "depot",
+            location=labels[i],
+            distance_km=round(float(leg_km), 1),
+            leg_hours=round(leg_hours, 2),
+            arrival_hours=round(arrival, 2),
+            fuel_litres=round(float(leg_fuel), 2),
+            load_after_kg=round(load, 1),
+        ))
+        prev = i
+
+    total_hours = driving_hours(drive) + service / 60
+    risk, rec = _route_risk(req.traffic_level, req.weather, total_hours)
+    logger.info(
+        f"🧭 Sequenced {len(order)} stops ({mode}) in {stats['elapsed_ms']} ms — "
+        f"{stats['improvement_pct']}% better than nearest neighbour"
+    )
+    return OptimizeRouteResponse(
+        Trip_ID=req.Trip_ID,
+        distance_mode=mode,
+        order=[req.stops[i - 1].id for i in order],
+        legs=legs,
+        total_distance_km=round(float(distance), 1),
+        driving_hours=round(driving_hours(drive), 2),
+        total_hours=round(total_hours, 2),
+        estimated_fuel_litres=round(float(fuel), 2),
+        delay_risk=risk,
+        recommendation=rec,
+        solver=stats,
+    )
+
+
+# ─── Service 9: Vehicle → Trip Assignment ──────────────────────────────────────
+DELAY_VEHICLE_FEATURES = ["Usage_Hours", "Downtime_Maintenance", "Impact_on_Efficiency",
+                          "Fuel_Consumption", "Vibration_Levels"]
+
+
+def _delay_effects(vehicles: list, trips: list, cap_t: np.ndarray, cargo_t: np.ndarray) -> np.ndarray:
+    """
+    N × M predicted delivery hours, additive in a vehicle effect and a trip
+    effect, from one batch of N + M + 1 delay-model rows (see utils/assignment.py).
+    """
+    model, encoders = MODELS["delay"], MODELS["delay_enc"]
+    # Missing vehicle inputs fall back to the training mean held by the scaler
+    means = dict(zip(DELAY_FEATURES + DELAY_CAT_FEATURES, encoders["__scaler__"].mean_))
+    veh = pd.DataFrame(
+        [[getattr(v, f) for f in DELAY_VEHICLE_FEATURES] for v in vehicles],
+        columns=DELAY_VEHICLE_FEATURES, dtype=float,
+    ).fillna({f: means[f] for f in DELAY_VEHICLE_FEATURES})
+    veh["Load_Capacity"] = cap_t
+    trip = pd.DataFrame({
+        "Actual_Load": cargo_t,
+        "Route_Info": [t.Route_Info for t in trips],
+        "Weather_Conditions": [t.Weather_Conditions for t in trips],
+        "Road_Conditions": [t.Road_Conditions for t in trips],
+    })
+
+    ref_vehicle = veh.median()
+    ref_trip = {"Actual_Load": float(np.median(cargo_t)),
+                **{c: trip[c].mode().iloc[0] for c in DELAY_CAT_FEATURES}}
+    rows = pd.concat([
+        veh.assign(**ref_trip),
+        trip.assign(**ref_vehicle.to_dict()),
+        pd.DataFrame([{**ref_vehicle.to_dict(), **ref_trip}]),
+    ], ignore_index=True)
+
+    pred = model.predict(_delay_inputs(rows, encoders))
+    n = len(vehicles)
+    return pred[:n, None] + pred[None, n:-1] - pred[-1]
+
+
+@app.post("/optimize/assignment", response_model=AssignmentResponse, tags=["Route Optimization"])
+def optimize_assignment(req: AssignmentRequest):
+    """
+    Assigns vehicles to pending trips at minimum total cost (sparse
+    assignment over each trip's cheapest candidates, Hungarian fallback —
+    see utils/assignment.py). Each pair costs its ETA (deadhead + loaded trip, same physics
+    as /predict/route) plus weighted predicted delay and maintenance risk;
+    vehicles that cannot carry the cargo are never assigned.
+    """
+    started = time.perf_counter()
+    vehicles, trips = req.vehicles, req.trips
+    v_lat = np.array([v.location.lat for v in vehicles])
+    v_lon = np.array([v.location.lon for v in vehicles])
+    v_cap = np.array([v.max_load_kg for v in vehicles])
+    v_risk = np.array([v.maintenance_risk for v in vehicles])
+    p_lat = np.array([t.pickup.lat for t in trips])
+    p_lon = np.array([t.pickup.lon for t in trips])
+    cargo = np.array([t.cargo_kg for t in trips])
+    trip_km = haversine_km(p_lat, p_lon, np.array([t.dropoff.lat for t in trips]),
+                           np.array([t.dropoff.lon for t in trips])) * ROAD_DETOUR
+    trip_speed = np.array([base_speed(t.Route_Info) for t in trips])
+    cond = np.array([traffic_mult(t.traffic_level) * weather_mult(t.Weather_Conditions) for t in trips])
+
+    use_delay = req.use_delay_model and MODELS.get("delay") is not None and MODELS.get("delay_enc") is not None
+    t0 = time.perf_counter()
+    delay = _delay_effects(vehicles, trips, v_cap / 1000, cargo / 1000) if use_delay else None
+    t1 = time.perf_counter()
+
+    excess = np.maximum(delay - DELAY_ON_TIME_HOURS, 0.0) if use_delay else 0.0
+    cost, feasible = pair_costs(
+        v_lat, v_lon, v_cap, v_risk, p_lat, p_lon, trip_km, cargo, trip_speed, cond,
+        delay_excess=excess, delay_weight=req.delay_weight, risk_weight=req.risk_weight,
+    )
+    t2 = time.perf_counter()
+    rows, cols, candidates = assign(cost, feasible)
+    t3 = time.perf_counter()
+
+    # Per-pair details only for the chosen pairs
+    deadhead = haversine_km(v_lat[rows], v_lon[rows], p_lat[cols], p_lon[cols]) * ROAD_DETOUR
+    ratio = np.minimum(load_ratio(cargo[cols], v_cap[rows]), 1.0)
+    eta = trip_hours(deadhead, trip_km[cols], trip_speed[cols], cond[cols], ratio)
+    base_l100km = np.array([vehicles[v].base_fuel_consumption_l100km for v in rows])
+    fuel = fuel_litres(base_l100km, deadhead, 0.0) + fuel_litres(base_l100km, trip_km[cols], ratio)
+
+    assignments = [
+        Assignment(
+            trip_id=trips[t].id,
+            vehicle_id=vehicles[v].id,
+            deadhead_km=round(float(deadhead[k]), 1),
+            trip_km=round(float(trip_km[t]), 1),
+            eta_hours=round(float(eta[k]), 2),
+            predicted_delivery_hours=round(float(delay[v, t]), 2) if use_delay else None,
+            estimated_fuel_litres=round(float(fuel[k]), 2),
+            cost=round(float(cost[v, t]), 3),
+        )
+        for k, (v, t) in enumerate(zip(rows.tolist(), cols.tolist()))
+    ]
+
+    assigned_v, assigned_t = set(rows.tolist()), set(cols.tolist())
+    stats = {
+        "vehicles": len(vehicles),
+        "trips": len(trips),
+        "infeasible_pairs": int(feasible.size - np.count_nonzero(feasible)),
+        "candidate_pairs": int(candidates),
+        "delay_ms": round((t1 - t0) * 1000, 1),
+        "cost_matrix_ms": round((t2 - t1) * 1000, 1),
+        "solve_ms": round((t3 - t2) * 1000, 1),
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info(
+        f"🚚 Assigned {len(assignments)}/{len(trips)} trips to {len(vehicles)} vehicles "
+        f"in {stats['total_ms']} ms (solve {stats['solve_ms']} ms)"
+    )
+    return AssignmentResponse(
+        assignments=assignments,
+        unassigned_trips=[t.id for i, t in enumerate(trips) if i not in assigned_t],
+        idle_vehicles=[v.id for i, v in enumerate(vehicles) if i not in assigned_v],
+        total_cost=round(float(cost[rows, cols].sum()), 3),
+        delay_model_used=use_delay,
+        stats=stats,
     )
+
+
+# ─── Fleet Positions (spatial index) ──────────────────────────────────────────
+def _update_positions(req) -> int:
+    n = len(req.vehicle_ids)
+    columns = [req.lat, req.lon] + [c for c in (req.vehicle_type, req.engine_status) if c is not None]
+    if any(len(col) != n for col in columns):
+        raise HTTPException(status_code=422, detail="All position columns must align with vehicle_ids")
+    try:
+        return FLEET_INDEX.update(
+            req.vehicle_ids, req.lat, req.lon,
+            vehicle_type=req.vehicle_type, engine_status=req.engine_status, ts=req.timestamp,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _query_point(lat: Optional[float], lon: Optional[float], place: Optional[str]) -> tuple:
+    """(lat, lon, label) from explicit coordinates or a road-graph place name."""
+    if place:
+        if ROAD_GRAPH is None:
+            raise HTTPException(status_code=503, detail="Road graph not loaded. Send lat and lon instead.")
+        try:
+            i, _, label = ROAD_GRAPH.resolve(place)
+        except RoutingError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return float(ROAD_GRAPH.lat[i]), float(ROAD_GRAPH.lon[i]), label
+    if lat is None or lon is None:
+        raise HTTPException(status_code=422, detail="Provide lat and lon, or place.")
+    return lat, lon, None
+
+
+def _split(values: Optional[str]) -> Optional[list]:
+    """'OK,WARNING' → ['OK', 'WARNING']."""
+    return [v.strip() for v in values.split(",") if v.strip()] if values else None
+
+
+@app.post("/fleet/positions", response_model=FleetPositionsResponse, tags=["Fleet Positions"])
+def fleet_positions(req: FleetPositionsRequest):
+    """Upsert the latest position (and type / engine status) of many vehicles."""
+    moved = _update_positions(req)
+    return FleetPositionsResponse(updated=len(req.vehicle_ids), moved_cells=moved, vehicles=len(FLEET_INDEX))
+
+
+@app.get("/fleet/nearest", response_model=FleetQueryResponse, tags=["Fleet Positions"])
+def fleet_nearest(
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    place: Optional[str] = None,
+    k: int = Query(10, ge=1, le=1000),
+    vehicle_type: Optional[str] = None,
+    engine_status: Optional[str] = None,
+    max_km: Optional[float] = None,
+    max_age_s: Optional[float] = None,
+):
+    """
+    k nearest vehicles to a point (lat/lon or a place name). vehicle_type and
+    engine_status take comma-separated values, e.g. engine_status=OK,WARNING.
+    """
+    q_lat, q_lon, label = _query_point(lat, lon, place)
+    started = time.perf_counter()
+    found = FLEET_INDEX.nearest(
+        q_lat, q_lon, k=k, vehicle_type=_split(vehicle_type), engine_status=_split(engine_status),
+        max_km=max_km, max_age_s=max_age_s,
+    )
+    return FleetQueryResponse(
+        lat=q_lat, lon=q_lon, place=label, count=len(found),
+        query_ms=round((time.perf_counter() - started) * 1000, 3), vehicles=found,
+    )
+
+
+@app.get("/fleet/within", response_model=FleetQueryResponse, tags=["Fleet Positions"])
+def fleet_within(
+    radius_km: float = Query(..., gt=0, le=5000),
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    place: Optional[str] = None,
+    vehicle_type: Optional[str] = None,
+    engine_status: Optional[str] = None,
+    max_age_s: Optional[float] = None,
+    limit: int = Query(500, ge=1, le=100_000),
+):
+    """Vehicles within radius_km of a point, nearest first (e.g. available trucks within 50 km of Pune)."""
+    q_lat, q_lon, label = _query_point(lat, lon, place)
+    started = time.perf_counter()
+    found = FLEET_INDEX.within(
+        q_lat, q_lon, radius_km, vehicle_type=_split(vehicle_type), engine_status=_split(engine_status),
+        max_age_s=max_age_s, limit=limit,
+    )
+    return FleetQueryResponse(
+        lat=q_lat, lon=q_lon, place=label, count=len(found),
+        query_ms=round((time.perf_counter() - started) * 1000, 3), vehicles=found,
+    )
+
+
+@app.get("/fleet/stats", tags=["Fleet Positions"])
+def fleet_stats():
+    """Spatial index size, cell occupancy and query counters."""
+    return FLEET_INDEX.stats()
+
+
+@app.get("/routing/graph", tags=["Route Optimization"])
+def routing_graph():
+    """Road graph size and path-cache statistics."""
+    if ROAD_GRAPH is None:
+        raise HTTPException(status_code=503, detail="Road graph not loaded.")
+    return ROAD_GRAPH.summary()
@@ -3,7 +3,7 @@ schemas.py — Pydantic request/response models for all FleetFlow AI endpoints.
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import Optional, Literal, List, Union, Dict
 
 
 # ─────────────────────────────────────────────
@@ -28,6 +28,8 @@ class MaintenanceRequest(BaseModel):
     Brake_Condition: str = Field(..., example="Good", description="Brake condition: Good / Fair / Poor")
     Weather_Conditions: str = Field(..., example="Clear", description="Weather: Clear / Rain / Fog / Snow")
     Road_Conditions: str = Field(..., example="Highway", description="Road type: Highway / Rural / Urban")
+    explain: bool = Field(False, description="Return per-feature contributions to the maintenance probability")
+    tier: Literal["full", "fast"] = Field("full", description="fast = truncated ensemble (lower latency, see /models/tiers)")
 
     class Config:
         json_schema_extra = {
@@ -53,12 +55,81 @@ class MaintenanceRequest(BaseModel):
         }
 
 
+MAX_BATCH_ROWS = 5_000     # items per /predict/*/batch call
+
+
+class Explanation(BaseModel):
+    """Path-based tree attribution: base_value + Σ contributions = the explained output."""
+    output: str = Field(..., description="What is being explained, e.g. P(maintenance)")
+    base_value: float = Field(..., description="Forest average over the training data")
+    contributions: Dict[str, float] = Field(..., description="Per-feature push, largest magnitude first")
+
+
 class MaintenanceResponse(BaseModel):
     Vehicle_ID: Optional[str]
     maintenance_required: bool
     confidence: float = Field(..., description="Model confidence (0–1)")
     risk_level: Literal["LOW", "MEDIUM", "HIGH"]
     recommendation: str
+    tier: Literal["full", "fast"] = "full"
+    explanation: Optional[Explanation] = None
+
+
+class MaintenanceBatchRequest(BaseModel):
+    items: List[MaintenanceRequest] = Field(..., max_length=MAX_BATCH_ROWS)
+    explain: bool = Field(False, description="Explain every item (per-item flags are ignored)")
+    tier: Literal["full", "fast"] = "full"
+
+
+class MaintenanceBatchResponse(BaseModel):
+    results: List[MaintenanceResponse]
+    elapsed_ms: float
+
+
+class MaintenancePartialRequest(BaseModel):
+    """
+    Only the fields that changed since the vehicle's last call. The service
+    merges them with the stored per-vehicle state before scoring; the first
+    call for a vehicle must therefore carry every feature.
+    """
+    Vehicle_ID: str = Field(..., example="V-1042")
+    Usage_Hours: Optional[float] = None
+    Actual_Load: Optional[float] = None
+    Engine_Temperature: Optional[float] = None
+    Tire_Pressure: Optional[float] = None
+    Fuel_Consumption: Optional[float] = None
+    Battery_Status: Optional[float] = None
+    Vibration_Levels: Optional[float] = None
+    Oil_Quality: Optional[float] = None
+    Failure_History: Optional[int] = None
+    Anomalies_Detected: Optional[int] = None
+    Predictive_Score: Optional[float] = None
+    Downtime_Maintenance: Optional[float] = None
+    Impact_on_Efficiency: Optional[float] = None
+    Brake_Condition: Optional[str] = None
+    Weather_Conditions: Optional[str] = None
+    Road_Conditions: Optional[str] = None
+    explain: bool = False
+    tier: Literal["full", "fast"] = "full"
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "Vehicle_ID": "V-1042",
+                "Engine_Temperature": 101.5,
+                "Vibration_Levels": 2.4,
+            }
+        }
+
+
+class VehicleFeaturesResponse(BaseModel):
+    Vehicle_ID: str
+    features: dict
+    missing: list
+    updates: int
+    updated_at: float
+    deltas: dict = Field(..., description="Change of each numeric feature at the last update")
+    rolling_means: dict = Field(..., description="EWMA of each numeric feature across updates")
 
 
 # ─────────────────────────────────────────────
@@ -77,6 +148,7 @@ class FuelRequest(BaseModel):
     Fuel_Consumption_City: float = Field(..., alias="Fuel Consumption City (L/100 km)", example=13.2)
     Fuel_Consumption_Hwy: float = Field(..., alias="Fuel Consumption Hwy (L/100 km)", example=9.4)
     Fuel_Consumption_Comb_mpg: float = Field(..., alias="Fuel Consumption Comb (mpg)", example=26.0)
+    tier: Literal["full", "fast"] = Field("full", description="fast = truncated ensemble (lower latency, see /models/tiers)")
 
     class Config:
         populate_by_name = True
@@ -104,6 +176,7 @@ class FuelResponse(BaseModel):
     anomaly_score: float = Field(..., description="IsolationForest score; lower = more anomalous")
     fuel_efficiency_rating: Literal["EXCELLENT", "GOOD", "AVERAGE", "POOR"]
     recommendation: str
+    tier: Literal["full", "fast"] = "full"
 
 
 # ─────────────────────────────────────────────
@@ -122,6 +195,8 @@ class DelayRequest(BaseModel):
     Route_Info: str = Field(..., example="Rural")
     Weather_Conditions: str = Field(..., example="Rain")
     Road_Conditions: str = Field(..., example="Rural")
+    explain: bool = Field(False, description="Return per-feature contributions to the predicted hours")
+    tier: Literal["full", "fast"] = Field("full", description="fast = truncated ensemble (lower latency, see /models/tiers)")
 
     class Config:
         json_schema_extra = {
@@ -144,8 +219,23 @@ class DelayRequest(BaseModel):
 class DelayResponse(BaseModel):
     Trip_ID: Optional[str]
     predicted_delivery_hours: float
+    p50_delivery_hours: Optional[float] = Field(None, description="Median delivery hours of similar trips")
+    p90_delivery_hours: Optional[float] = Field(None, description="90% of similar trips arrive within this")
     delay_risk: Literal["LOW", "MEDIUM", "HIGH"]
     recommendation: str
+    tier: Literal["full", "fast"] = "full"
+    explanation: Optional[Explanation] = None
+
+
+class DelayBatchRequest(BaseModel):
+    items: List[DelayRequest] = Field(..., max_length=MAX_BATCH_ROWS)
+    explain: bool = Field(False, description="Explain every item (per-item flags are ignored)")
+    tier: Literal["full", "fast"] = "full"
+
+
+class DelayBatchResponse(BaseModel):
+    results: List[DelayResponse]
+    elapsed_ms: float
 
 
 # ─────────────────────────────────────────────
@@ -168,6 +258,7 @@ class EcoScoreRequest(BaseModel):
     Combined_MPG: float = Field(..., alias="Combined MPG (FT1)", example=15.0)
     Tailpipe_CO2: float = Field(..., alias="Tailpipe CO2 (FT1)", example=593.0)
     Annual_Fuel_Cost: float = Field(..., alias="Annual Fuel Cost (FT1)", example=3300.0)
+    tier: Literal["full", "fast"] = Field("full", description="fast = truncated ensemble (lower latency, see /models/tiers)")
 
     class Config:
         populate_by_name = True
@@ -180,6 +271,7 @@ class EcoScoreResponse(BaseModel):
     ghg_rating: Literal["EXCELLENT", "GOOD", "AVERAGE", "POOR"]
     annual_co2_kg: float
     recommendation: str
+    tier: Literal["full", "fast"] = "full"
 
 
 # ─────────────────────────────────────────────
@@ -219,6 +311,29 @@ class DriverScoreResponse(BaseModel):
     recommendation: str
 
 
+class DriverEventsRequest(BaseModel):
+    """A batch of driver events in columnar form — lists align with ``driver_ids``."""
+    driver_ids: List[str] = Field(..., example=["D-201", "D-201", "D-305"])
+    events: List[Literal[
+        "overspeed", "harsh_brake", "harsh_accel", "idle_minutes", "late_delivery", "on_time_delivery"
+    ]] = Field(..., example=["harsh_brake", "idle_minutes", "on_time_delivery"])
+    values: Optional[List[float]] = Field(
+        None, example=[1, 4.5, 1], description="Count per event (minutes for idle_minutes); default 1",
+    )
+    timestamps: Optional[List[float]] = Field(None, description="Unix seconds per event; defaults to server time")
+
+
+class DriverEventsResponse(BaseModel):
+    accepted: int
+    drivers: int
+
+
+class DriverRollingScoreResponse(DriverScoreResponse):
+    window_days: Optional[int] = Field(None, description="None = all-time")
+    counts: Dict[str, float]
+    last_event_at: float
+
+
 # ─────────────────────────────────────────────
 # Service 6 — Carbon Emission Tracking
 # ─────────────────────────────────────────────
@@ -229,6 +344,9 @@ class CarbonRequest(BaseModel):
     fuel_type: str = Field(..., example="diesel", description="diesel / petrol / gasoline / cng / lpg / electric")
     fuel_litres: float = Field(..., example=48.5, description="Fuel consumed in litres")
     distance_km: float = Field(..., example=320.0, description="Distance covered in km")
+    Driver_ID: Optional[str] = Field(None, example="DRV-001")
+    record: bool = Field(False, description="Append this trip to the carbon ledger (see /carbon/rollup)")
+    timestamp: Optional[float] = Field(None, description="Unix seconds of the trip; defaults to server time")
 
     class Config:
         json_schema_extra = {
@@ -238,6 +356,8 @@ class CarbonRequest(BaseModel):
                 "fuel_type": "diesel",
                 "fuel_litres": 48.5,
                 "distance_km": 320.0,
+                "Driver_ID": "DRV-001",
+                "record": True,
             }
         }
 
@@ -253,16 +373,80 @@ class CarbonResponse(BaseModel):
     trees_to_offset: float = Field(..., description="Trees needed to offset this CO2 (~21 kg/tree/year)")
     emission_rating: Literal["EXCELLENT", "GOOD", "AVERAGE", "POOR"]
     recommendation: str
+    recorded: bool = False
+
+
+class CarbonTotals(BaseModel):
+    trips: int
+    fuel_litres: float
+    distance_km: float
+    co2_kg: float
+    co2_per_km: float
+
+
+class CarbonGroup(CarbonTotals):
+    key: str
+
+
+class CarbonBucket(CarbonTotals):
+    bucket_start: int = Field(..., description="Unix seconds (UTC) the bucket starts at")
+
+
+class CarbonRollupResponse(CarbonTotals):
+    start: float
+    end: float
+    buckets_read: int = Field(..., description="Pre-aggregated buckets summed to answer the query")
+    groups: Optional[List[CarbonGroup]] = None
+    series: Optional[List[CarbonBucket]] = None
+
+
+# ─────────────────────────────────────────────
+# Vehicle Snapshot — every applicable model in one call
+# ─────────────────────────────────────────────
+
+class VehicleSnapshotRequest(BaseModel):
+    """One vehicle tick; every section present is scored. Section IDs default to the top-level ones."""
+    Vehicle_ID: str = Field(..., example="V-1042")
+    Driver_ID: Optional[str] = Field(None, example="D-201")
+    maintenance: Optional[MaintenanceRequest] = None
+    fuel: Optional[FuelRequest] = None
+    eco: Optional[EcoScoreRequest] = None
+    carbon: Optional[CarbonRequest] = None
+    driver: Optional[DriverScoreRequest] = None
+
+
+class VehicleSnapshotResponse(BaseModel):
+    Vehicle_ID: str
+    maintenance: Optional[MaintenanceResponse] = None
+    fuel: Optional[FuelResponse] = None
+    eco: Optional[EcoScoreResponse] = None
+    carbon: Optional[CarbonResponse] = None
+    driver: Optional[DriverScoreResponse] = None
+    errors: Dict[str, str] = Field(default_factory=dict, description="Section → why it could not be scored")
+    elapsed_ms: float
 
 
 # ─────────────────────────────────────────────
 # Service 7 — Smart Route Optimization
 # ─────────────────────────────────────────────
 
+class GeoPoint(BaseModel):
+    lat: float = Field(..., ge=-90, le=90, example=19.0760)
+    lon: float = Field(..., ge=-180, le=180, example=72.8777)
+
+
 class RouteRequest(BaseModel):
     Trip_ID: Optional[str] = Field(None, example="T-5021")
-    distance_km: float = Field(..., example=280.0, description="Route distance in km")
-    road_type: str = Field(..., example="highway", description="highway / urban / rural / mixed")
+    origin: Optional[Union[str, GeoPoint]] = Field(
+        None, example="Mumbai", description="City name or {lat, lon}; routed on the road graph"
+    )
+    destination: Optional[Union[str, GeoPoint]] = Field(
+        None, example="Pune", description="City name or {lat, lon}; routed on the road graph"
+    )
+    distance_km: Optional[float] = Field(
+        None, example=280.0, description="Route distance in km (required unless origin/destination are given)"
+    )
+    road_type: str = Field("mixed", example="highway", description="highway / urban / rural / mixed (ignored for graph routes)")
     traffic_level: str = Field(..., example="medium", description="low / medium / high / jam")
     weather: str = Field(..., example="clear", description="clear / rain / fog / snow / storm")
     current_load_kg: float = Field(..., example=4500.0, description="Current cargo load in kg")
@@ -273,8 +457,8 @@ class RouteRequest(BaseModel):
         json_schema_extra = {
             "example": {
                 "Trip_ID": "T-5021",
-                "distance_km": 280.0,
-                "road_type": "highway",
+                "origin": "Mumbai",
+                "destination": "Delhi",
                 "traffic_level": "medium",
                 "weather": "clear",
                 "current_load_kg": 4500.0,
@@ -292,4 +476,230 @@ class RouteResponse(BaseModel):
     estimated_fuel_litres: float
     delay_risk: Literal["LOW", "MEDIUM", "HIGH"]
     recommendation: str
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    path: Optional[List[str]] = None
+    road_km: Optional[Dict[str, float]] = None
+
+
+MAX_ROUTE_STOPS = 500
+
+
+class RouteStop(BaseModel):
+    id: str = Field(..., example="D-101")
+    location: Union[str, GeoPoint] = Field(..., example="Pune", description="City name or {lat, lon}")
+    service_minutes: float = Field(0.0, ge=0, example=20.0, description="Time spent at the stop")
+    drop_kg: float = Field(0.0, ge=0, example=800.0, description="Cargo unloaded at the stop")
+
 
+class OptimizeRouteRequest(BaseModel):
+    Trip_ID: Optional[str] = Field(None, example="T-5030")
+    depot: Union[str, GeoPoint] = Field(..., example="Mumbai", description="City name or {lat, lon}")
+    stops: List[RouteStop] = Field(..., min_length=1, max_length=MAX_ROUTE_STOPS)
+    return_to_depot: bool = Field(True, description="Round trip (true) or end at the last stop")
+    distance_mode: Literal["auto", "graph", "haversine"] = Field(
+        "auto", description="graph = road-graph paths; haversine = straight line × detour; auto = graph when loaded"
+    )
+    objective: Literal["time", "distance"] = Field("time", description="Minimise free-flow hours or km")
+    road_type: str = Field("mixed", example="mixed", description="Speed class for haversine legs")
+    traffic_level: str = Field(..., example="medium", description="low / medium / high / jam")
+    weather: str = Field(..., example="clear", description="clear / rain / fog / snow / storm")
+    current_load_kg: float = Field(..., example=4500.0, description="Cargo on board when leaving the depot")
+    max_load_kg: float = Field(..., example=8000.0, description="Vehicle max load capacity in kg")
+    base_fuel_consumption_l100km: float = Field(..., example=12.0, description="Base fuel consumption (L/100km)")
+    time_budget_ms: int = Field(500, ge=10, le=10_000, description="Solver time budget")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "Trip_ID": "T-5030",
+                "depot": "Mumbai",
+                "stops": [
+                    {"id": "D-101", "location": "Pune", "drop_kg": 1500.0, "service_minutes": 30},
+                    {"id": "D-102", "location": "Nashik", "drop_kg": 1000.0, "service_minutes": 20},
+                    {"id": "D-103", "location": {"lat": 19.2183, "lon": 72.9781}, "drop_kg": 500.0},
+                ],
+                "return_to_depot": True,
+                "traffic_level": "medium",
+                "weather": "clear",
+                "current_load_kg": 3000.0,
+                "max_load_kg": 8000.0,
+                "base_fuel_consumption_l100km": 12.0,
+                "time_budget_ms": 500,
+            }
+        }
+
+
+class RouteLeg(BaseModel):
+    stop_id: str
+    location: str
+    distance_km: float
+    leg_hours: float
+    arrival_hours: float = Field(..., description="Hours after departure, incl. breaks and earlier service time")
+    fuel_litres: float
+    load_after_kg: float
+
+
+class OptimizeRouteResponse(BaseModel):
+    Trip_ID: Optional[str]
+    distance_mode: Literal["graph", "haversine"]
+    order: List[str]
+    legs: List[RouteLeg]
+    total_distance_km: float
+    driving_hours: float
+    total_hours: float
+    estimated_fuel_litres: float
+    delay_risk: Literal["LOW", "MEDIUM", "HIGH"]
+    recommendation: str
+    solver: Dict[str, Union[int, float, bool]]
+
+
+MAX_ASSIGNMENT_SIDE = 5_000
+
+
+class AssignmentVehicle(BaseModel):
+    id: str = Field(..., example="V-1001")
+    location: GeoPoint
+    max_load_kg: float = Field(..., ge=0, example=8000.0)
+    maintenance_risk: float = Field(0.0, ge=0, le=1, example=0.12, description="Failure probability from /predict/maintenance")
+    base_fuel_consumption_l100km: float = Field(12.0, gt=0, example=12.0)
+    # Optional delay-model inputs; the fleet median is used when missing
+    Usage_Hours: Optional[float] = Field(None, example=4500.0)
+    Downtime_Maintenance: Optional[float] = Field(None, example=2.0)
+    Impact_on_Efficiency: Optional[float] = Field(None, example=0.20)
+    Fuel_Consumption: Optional[float] = Field(None, example=11.5)
+    Vibration_Levels: Optional[float] = Field(None, example=2.1)
+
+
+class AssignmentTrip(BaseModel):
+    id: str = Field(..., example="T-5021")
+    pickup: GeoPoint
+    dropoff: GeoPoint
+    cargo_kg: float = Field(..., ge=0, example=5500.0)
+    Route_Info: str = Field("Highway", example="Highway", description="Urban / Highway / Rural")
+    Weather_Conditions: str = Field("Clear", example="Rain", description="Clear / Rain / Fog / Snow")
+    Road_Conditions: str = Field("Highway", example="Highway", description="Urban / Highway / Rural")
+    traffic_level: str = Field("medium", example="medium", description="low / medium / high / jam")
+
+
+class AssignmentRequest(BaseModel):
+    vehicles: List[AssignmentVehicle] = Field(..., min_length=1, max_length=MAX_ASSIGNMENT_SIDE)
+    trips: List[AssignmentTrip] = Field(..., min_length=1, max_length=MAX_ASSIGNMENT_SIDE)
+    delay_weight: float = Field(1.0, ge=0, description="Cost hours per predicted hour of delay beyond on-time")
+    risk_weight: float = Field(10.0, ge=0, description="Cost hours at maintenance risk 1.0")
+    use_delay_model: bool = Field(True, description="Score delay with the delay model (skipped if not loaded)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "vehicles": [
+                    {"id": "V-1001", "location": {"lat": 19.0760, "lon": 72.8777}, "max_load_kg": 8000.0, "maintenance_risk": 0.12},
+                    {"id": "V-1002", "location": {"lat": 18.5204, "lon": 73.8567}, "max_load_kg": 5000.0, "maintenance_risk": 0.40},
+                ],
+                "trips": [
+                    {"id": "T-5021", "pickup": {"lat": 18.5204, "lon": 73.8567}, "dropoff": {"lat": 19.9975, "lon": 73.7898},
+                     "cargo_kg": 4200.0, "Route_Info": "Highway", "Weather_Conditions": "Clear"},
+                    {"id": "T-5022", "pickup": {"lat": 19.0760, "lon": 72.8777}, "dropoff": {"lat": 21.1458, "lon": 79.0882},
+                     "cargo_kg": 6500.0, "Route_Info": "Highway", "Weather_Conditions": "Rain"},
+                ],
+            }
+        }
+
+
+class Assignment(BaseModel):
+    trip_id: str
+    vehicle_id: str
+    deadhead_km: float
+    trip_km: float
+    eta_hours: float
+    predicted_delivery_hours: Optional[float]
+    estimated_fuel_litres: float
+    cost: float
+
+
+class AssignmentResponse(BaseModel):
+    assignments: List[Assignment]
+    unassigned_trips: List[str]
+    idle_vehicles: List[str]
+    total_cost: float
+    delay_model_used: bool
+    stats: Dict[str, Union[int, float]]
+
+
+
+# ─────────────────────────────────────────────
+# Streaming Anomaly Detection
+# ─────────────────────────────────────────────
+
+class TelemetryTickRequest(BaseModel):
+    """
+    One tick of fleet telemetry in columnar form — every list is aligned with
+    ``vehicle_ids``. Columnar lists parse far faster than one object per
+    vehicle when a tick carries tens of thousands of readings.
+    """
+    vehicle_ids: List[str] = Field(..., example=["V-1000", "V-1001"])
+    engine_temp_c: List[float] = Field(..., example=[88.5, 121.0])
+    vibration: List[float] = Field(..., example=[1.2, 1.4])
+    fuel_level_l: List[float] = Field(..., example=[210.4, 55.0])
+    tire_pressure_psi: List[float] = Field(..., example=[33.1, 32.8])
+    timestamp: Optional[float] = Field(None, description="Unix seconds; defaults to server time")
+    # Optional positions — when present they also update the fleet spatial index
+    lat: Optional[List[float]] = Field(None, example=[19.07, 18.52])
+    lon: Optional[List[float]] = Field(None, example=[72.88, 73.86])
+    vehicle_type: Optional[List[str]] = Field(None, example=["Truck", "Van"])
+    engine_status: Optional[List[str]] = Field(None, example=["OK", "WARNING"])
+
+
+class AnomalyEvent(BaseModel):
+    ts: float
+    vehicle_id: str
+    channel: str
+    kind: Literal["spike", "drop"]
+    value: float
+    zscore: float = Field(..., description="z-score against the rolling window")
+    ewma_zscore: float = Field(..., description="z-score against the EWMA mean / variance")
+    window_mean: float
+
+
+class TelemetryTickResponse(BaseModel):
+    readings: int
+    events: List[AnomalyEvent]
+
+
+# ─────────────────────────────────────────────
+# Fleet Positions (spatial index)
+# ─────────────────────────────────────────────
+
+class FleetPositionsRequest(BaseModel):
+    """Latest positions in columnar form — every list is aligned with ``vehicle_ids``."""
+    vehicle_ids: List[str] = Field(..., example=["V-1000", "V-1001"])
+    lat: List[float] = Field(..., example=[19.0760, 18.5204])
+    lon: List[float] = Field(..., example=[72.8777, 73.8567])
+    vehicle_type: Optional[List[str]] = Field(None, example=["Truck", "Van"])
+    engine_status: Optional[List[str]] = Field(None, example=["OK", "WARNING"])
+    timestamp: Optional[float] = Field(None, description="Unix seconds; defaults to server time")
+
+
+class FleetPositionsResponse(BaseModel):
+    updated: int
+    moved_cells: int
+    vehicles: int
+
+
+class FleetVehicle(BaseModel):
+    vehicle_id: str
+    lat: float
+    lon: float
+    distance_km: float
+    vehicle_type: Optional[str]
+    engine_status: Optional[str]
+    age_s: float = Field(..., description="Seconds since the last position update")
+
+
+class FleetQueryResponse(BaseModel):
+    lat: float
+    lon: float
+    place: Optional[str] = None
+    count: int
+    query_ms: float
+    vehicles: List[FleetVehicle]
@@ -2,6 +2,9 @@
 train_all.py — One-shot script to train ALL FleetFlow AI models.
 Run this once after installing requirements.
 
+Each run writes reports/training/<family>.json and compares them with the
+baseline stored by `python -m training.report baseline`.
+
 Usage:
     cd ai-service
     python train_all.py
@@ -11,12 +14,12 @@ import subprocess
 import sys
 
 
-def run(module: str):
+def run(module: str, *args: str):
     print(f"\n{'═' * 60}")
     print(f"  Training: {module}")
     print(f"{'═' * 60}")
     result = subprocess.run(
-        [sys.executable, "-m", module],
+        [sys.executable, "-m", module, *args],
         capture_output=False,
     )
     if result.returncode != 0:
@@ -29,5 +32,7 @@ if __name__ == "__main__":
     run("training.train_maintenance")
     run("training.train_fuel")
     run("training.train_delay")
+    # Timings, memory, sizes and metrics vs. the stored baseline (if there is one)
+    run("training.report", "compare")
     print("\n\n🎉 All models trained! Start the server with:")
     print("    uvicorn main:app --reload --port 8001")
@@ -0,0 +1,270 @@
+"""
+report.py — Training performance reports and regression checks.
+────────────────────────────────────────────────────────────────
+Every training run writes a JSON report per model family:
+
+    reports/training/<family>.json
+      phases_s         → wall time per phase (load, preprocess, fit, evaluate, dump)
+      peak_rss_mb      → peak resident memory while training this family
+      artifact_bytes   → size of the saved bundle
+      latency_ms       → single-row and batch inference, run the way the service
+                         runs the model (n_jobs pinned, see utils/inference.py)
+      metrics          → the quality metrics printed during training
+      metric_abs_tolerance → per-metric absolute slack for metrics that sit near
+                         zero by design (a relative tolerance there flags noise)
+
+Peak RSS is read from /proc (VmHWM, reset at the start of each report) where
+available, else from ``resource.getrusage`` (whole-process peak), else it is
+left out.
+
+Usage:
+    cd ai-service
+    python -m training.report baseline              # current reports become the baseline
+    python -m training.report compare               # flag regressions (exit code 1 if any)
+    python -m training.report compare --time-tolerance 0.5
+"""
+
+import argparse
+import copy
+import glob
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+REPORTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "reports", "training"))
+BASELINE_DIR = os.path.join(REPORTS_DIR, "baseline")
+
+SINGLE_ROW_REPEATS = 50
+BATCH_ROWS = 1_000
+
+# Relative growth tolerated before a number counts as a regression
+TOLERANCES = {"time": 0.25, "memory": 0.15, "size": 0.10, "latency": 0.25, "metric": 0.02}
+MIN_TIME_S = 0.25          # phases shorter than this are too noisy to compare
+MIN_LATENCY_MS = 0.5
+
+
+# ─── Memory ───────────────────────────────────────────────────────────────────
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS mark for this process (Linux ≥ 4.0)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """(peak RSS in MB, source) — source is "vmhwm" or "getrusage"; (None, None) if unknown."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1), "vmhwm"
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:                   # Windows
+        return None, None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024   # bytes on macOS, KB elsewhere
+    return round(peak / divisor, 1), "getrusage"
+
+
+# ─── Report ───────────────────────────────────────────────────────────────────
+class TrainingReport:
+    def __init__(self, family: str):
+        self.family = family
+        self.phases = {}
+        self.metrics = {}
+        self.higher_is_better = {}
+        self.abs_tolerance = {}
+        self.latency = {}
+        self.artifact_bytes = None
+        self._started = time.perf_counter()
+        self._peak_resettable = _reset_peak_rss()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0.0) + time.perf_counter() - started, 3)
+
+    def metric(self, name: str, value: float, higher_is_better: bool, abs_tolerance: float = None):
+        """``abs_tolerance``: a worse value only regresses once it moves by more than this."""
+        self.metrics[name] = round(float(value), 5)
+        self.higher_is_better[name] = higher_is_better
+        if abs_tolerance is not None:
+            self.abs_tolerance[name] = abs_tolerance
+
+    def measure_latency(self, model, X, name: str = "model", method: str = "predict"):
+        """Median single-row and batch latency, with n_jobs pinned as in the service."""
+        served = copy.copy(model)
+        if hasattr(served, "n_jobs"):
+            served.n_jobs = None
+        predict = getattr(served, method)
+        X = np.asarray(X)
+        one = X[:1]
+        predict(one)
+        times = []
+        for _ in range(SINGLE_ROW_REPEATS):
+            started = time.perf_counter()
+            predict(one)
+            times.append(time.perf_counter() - started)
+        batch = np.resize(X, (BATCH_ROWS, X.shape[1]))
+        batch_times = []
+        for _ in range(3):
+            started = time.perf_counter()
+            predict(batch)
+            batch_times.append(time.perf_counter() - started)
+        self.latency[name] = {
+            "single_row_ms": round(float(np.median(times)) * 1000, 3),
+            f"batch_{BATCH_ROWS}_ms": round(float(np.median(batch_times)) * 1000, 2),
+        }
+
+    def artifact(self, path: str):
+        self.artifact_bytes = os.path.getsize(path)
+
+    def to_dict(self) -> dict:
+        import sklearn
+
+        peak, source = peak_rss_mb()
+        # VmHWM after a reset covers this report only; otherwise it is the process-lifetime peak
+        scope = "report" if source == "vmhwm" and self._peak_resettable else ("process" if source else None)
+        return {
+            "family": self.family,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sklearn_version": sklearn.__version__,
+            "cpu_count": os.cpu_count(),
+            "total_s": round(time.perf_counter() - self._started, 3),
+            "phases_s": self.phases,
+            "peak_rss_mb": peak,
+            "peak_rss_scope": scope,
+            "artifact_bytes": self.artifact_bytes,
+            "latency_ms": self.latency,
+            "metrics": self.metrics,
+            "higher_is_better": self.higher_is_better,
+            "metric_abs_tolerance": self.abs_tolerance,
+        }
+
+    def save(self, directory: str = REPORTS_DIR) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.family}.json")
+        report = self.to_dict()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        phases = ", ".join(f"{k} {v:.2f}s" for k, v in report["phases_s"].items())
+        print(f"📋 Training report → {path}")
+        print(f"   {phases}  |  peak RSS {report['peak_rss_mb']} MB  |  "
+              f"artifact {(report['artifact_bytes'] or 0) / 1e6:.1f} MB")
+        return path
+
+
+# ─── Compare ──────────────────────────────────────────────────────────────────
+def _grew(current, baseline, tolerance: float, floor: float = 0.0) -> bool:
+    if current is None or baseline is None or max(current, baseline) < floor:
+        return False
+    return current > baseline * (1 + tolerance)
+
+
+def compare_reports(current: dict, baseline: dict, tolerances: dict = TOLERANCES) -> list:
+    """[(check, baseline, current, verdict)] for one family; verdict is "ok" or "REGRESSION"."""
+    rows = []
+
+    def check(name, base, cur, regressed):
+        rows.append((name, base, cur, "REGRESSION" if regressed else "ok"))
+
+    for phase, cur in current["phases_s"].items():
+        base = baseline["phases_s"].get(phase)
+        check(f"phase {phase} (s)", base, cur, _grew(cur, base, tolerances["time"], MIN_TIME_S))
+    check("peak RSS (MB)", baseline.get("peak_rss_mb"), current.get("peak_rss_mb"),
+          _grew(current.get("peak_rss_mb"), baseline.get("peak_rss_mb"), tolerances["memory"]))
+    check("artifact (bytes)", baseline.get("artifact_bytes"), current.get("artifact_bytes"),
+          _grew(current.get("artifact_bytes"), baseline.get("artifact_bytes"), tolerances["size"]))
+    for model, lat in current["latency_ms"].items():
+        for key, cur in lat.items():
+            base = baseline["latency_ms"].get(model, {}).get(key)
+            check(f"{model} {key}", base, cur, _grew(cur, base, tolerances["latency"], MIN_LATENCY_MS))
+    for name, cur in current["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None:
+            check(f"metric {name}", None, cur, False)
+            continue
+        slack = max(tolerances["metric"] * abs(base), current.get("metric_abs_tolerance", {}).get(name, 0.0))
+        if current["higher_is_better"].get(name, True):
+            regressed = cur < base - slack
+        else:
+            regressed = cur > base + slack
+        check(f"metric {name}", base, cur, regressed)
+    return rows
+
+
+def _load_dir(directory: str) -> dict:
+    reports = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+        reports[report["family"]] = report
+    return reports
+
+
+def compare(current_dir: str, baseline_dir: str, tolerances: dict) -> int:
+    current, baseline = _load_dir(current_dir), _load_dir(baseline_dir)
+    if not baseline:
+        print(f"⚠️  No baseline reports in {baseline_dir} (run: python -m training.report baseline)")
+        return 0
+    regressions = 0
+    for family, report in current.items():
+        if family not in baseline:
+            print(f"\n⚪ {family}: no baseline")
+            continue
+        rows = compare_reports(report, baseline[family], tolerances)
+        bad = sum(verdict != "ok" for *_, verdict in rows)
+        regressions += bad
+        print(f"\n{'🔴' if bad else '🟢'} {family}")
+        for name, base, cur, verdict in rows:
+            change = f"{(cur - base) / base:+.1%}" if base else "  n/a"
+            mark = "  ← REGRESSION" if verdict != "ok" else ""
+            print(f"   {name:<28} {str(base):>12} → {str(cur):>12}  {change:>8}{mark}")
+    print(f"\n{'❌' if regressions else '✅'} {regressions} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FleetFlow training performance reports")
+    sub = parser.add_subparsers(dest="command", required=True)
+    base = sub.add_parser("baseline", help="Store the current reports as the baseline")
+    base.add_argument("--reports", default=REPORTS_DIR)
+    base.add_argument("--baseline", default=BASELINE_DIR)
+    cmp_ = sub.add_parser("compare", help="Compare the current reports with the baseline")
+    cmp_.add_argument("--reports", default=REPORTS_DIR)
+    cmp_.add_argument("--baseline", default=BASELINE_DIR)
+    for key, value in TOLERANCES.items():
+        cmp_.add_argument(f"--{key}-tolerance", type=float, default=value,
+                          help=f"Relative change tolerated (default {value:g})")
+    args = parser.parse_args()
+
+    if args.command == "baseline":
+        os.makedirs(args.baseline, exist_ok=True)
+        paths = glob.glob(os.path.join(args.reports, "*.json"))
+        for path in paths:
+            shutil.copy2(path, args.baseline)
+        print(f"📌 Baseline ← {len(paths)} report(s) in {args.baseline}")
+        return
+    tolerances = {key: getattr(args, f"{key}_tolerance") for key in TOLERANCES}
+    sys.exit(1 if compare(args.reports, args.baseline, tolerances) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,14 @@ Also trains a simple delivery delay estimator using logistics features from
 logistics_dataset_with_maintenance_required.csv (Downtime_Maintenance,
 Load, Route, Weather → Delivery_Times).
 
-Models saved:
-  - delay_model.pkl      → Delivery time regressor (RandomForest)
-  - eco_score_model.pkl  → Vehicle eco scoring (GradientBoosting regressor)
-  - delay_encoders.pkl
-  - eco_encoders.pkl
+Bundles saved:
+  - delay.bundle  → Delivery time regressor (RandomForest) + encoders/scaler
+                    + per-leaf target histograms for P50/P90 (see utils/quantiles.py)
+  - eco.bundle    → Vehicle eco scoring (GradientBoosting regressor) + encoders/scaler
+  (both with a drift reference sketch of their raw inputs, see utils/drift.py)
+
+Reports saved:
+  - reports/training/delay.json, eco.json → phase timings, peak RSS, size, latency, metrics
 
 Run:
     python -m training.train_delay
@@ -20,16 +23,29 @@ Run:
 
 import os
 import sys
-import joblib
 import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from utils.preprocessing import preprocess_eco, ECO_TARGET
+from utils.bundle import save_bundle
+from utils.tiers import fast_tier
+from utils.drift import reference_sketch
+from utils.quantiles import LeafQuantiles
+from training.report import TrainingReport
+from utils.preprocessing import (
+    preprocess_eco,
+    ECO_FEATURES,
+    ECO_CAT_FEATURES,
+    ECO_TARGET,
+    DELAY_FEATURES,
+    DELAY_CAT_FEATURES,
+    DELAY_TARGET,
+)
 
 LOGISTICS_PATH = os.path.join(
     os.path.dirname(__file__),
@@ -46,90 +62,154 @@ DATABASE_PATH = os.path.join(
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 os.makedirs(MODELS_DIR, exist_ok=True)
 
-DELAY_MODEL_PATH = os.path.join(MODELS_DIR, "delay_model.pkl")
-ECO_MODEL_PATH = os.path.join(MODELS_DIR, "eco_score_model.pkl")
-DELAY_ENC_PATH = os.path.join(MODELS_DIR, "delay_encoders.pkl")
-ECO_ENC_PATH = os.path.join(MODELS_DIR, "eco_encoders.pkl")
+DELAY_BUNDLE_PATH = os.path.join(MODELS_DIR, "delay.bundle")
+ECO_BUNDLE_PATH = os.path.join(MODELS_DIR, "eco.bundle")
+
+P90_COVERAGE_SLACK = 0.02   # report compare: |coverage − 0.9| may grow this much before it regresses
 
 
 # ── Delivery Delay Model ──────────────────────────────────────────────────────
-DELAY_NUMERIC = [
-    "Usage_Hours", "Actual_Load", "Load_Capacity",
-    "Downtime_Maintenance", "Impact_on_Efficiency",
-    "Fuel_Consumption", "Vibration_Levels",
-]
-DELAY_CAT = ["Route_Info", "Weather_Conditions", "Road_Conditions"]
-DELAY_TARGET = "Delivery_Times"
 
 
 def train_delay_model():
-    print("📂 Loading logistics dataset for delay prediction …")
-    df = pd.read_csv(LOGISTICS_PATH)
-    df = df.dropna(subset=[DELAY_TARGET])
-    print(f"   Rows: {len(df):,}\n")
-
-    df = df.copy()
-    encoders = {}
-
-    for col in DELAY_CAT:
-        if col not in df.columns:
-            df[col] = "Unknown"
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col].astype(str))
-        encoders[col] = le
-
-    for col in DELAY_NUMERIC:
-        if col not in df.columns:
-            df[col] = 0
-
-    all_feats = DELAY_NUMERIC + DELAY_CAT
-    X = df[all_feats].fillna(0).astype(float)
-    y = df[DELAY_TARGET].astype(float)
-
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    encoders["__scaler__"] = scaler
-
-    X_tr, X_te, y_tr, y_te = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
-
-    print("🚚 Training RandomForestRegressor for delivery delay …")
-    model = RandomForestRegressor(
-        n_estimators=200, max_depth=12, n_jobs=-1, random_state=42
-    )
-    model.fit(X_tr, y_tr)
-    y_pred = model.predict(X_te)
-    print(f"✅ Delay — MAE: {mean_absolute_error(y_te, y_pred):.2f} hrs  |  R²: {r2_score(y_te, y_pred):.4f}")
-
-    joblib.dump(model, DELAY_MODEL_PATH)
-    joblib.dump(encoders, DELAY_ENC_PATH)
-    print(f"💾 Delay model → {DELAY_MODEL_PATH}")
-    print(f"💾 Delay encoders → {DELAY_ENC_PATH}")
+    report = TrainingReport("delay")
+
+    with report.phase("load"):
+        print("📂 Loading logistics dataset for delay prediction …")
+        df = pd.read_csv(LOGISTICS_PATH)
+        df = df.dropna(subset=[DELAY_TARGET])
+        print(f"   Rows: {len(df):,}\n")
+
+    with report.phase("preprocess"):
+        df = df.copy()
+        reference = reference_sketch(df, DELAY_FEATURES, DELAY_CAT_FEATURES)   # raw inputs, before encoding
+        encoders = {}
+
+        for col in DELAY_CAT_FEATURES:
+            if col not in df.columns:
+                df[col] = "Unknown"
+            le = LabelEncoder()
+            df[col] = le.fit_transform(df[col].astype(str))
+            encoders[col] = le
+
+        for col in DELAY_FEATURES:
+            if col not in df.columns:
+                df[col] = 0
+
+        all_feats = DELAY_FEATURES + DELAY_CAT_FEATURES
+        X = df[all_feats].fillna(0).astype(float)
+        y = df[DELAY_TARGET].astype(float)
+
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        encoders["__scaler__"] = scaler
+
+        X_tr, X_te, y_tr, y_te = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
+
+    with report.phase("fit"):
+        print("🚚 Training RandomForestRegressor for delivery delay …")
+        model = RandomForestRegressor(
+            n_estimators=200, max_depth=12, n_jobs=-1, random_state=42
+        )
+        model.fit(X_tr, y_tr)
+
+    with report.phase("fit_quantiles"):
+        quantiles = LeafQuantiles(model, X_tr, y_tr).attach(model)
+
+    with report.phase("evaluate"):
+        y_pred = model.predict(X_te)
+        mae, r2 = mean_absolute_error(y_te, y_pred), r2_score(y_te, y_pred)
+        print(f"✅ Delay — MAE: {mae:.2f} hrs  |  R²: {r2:.4f}")
+        coverage = quantiles.coverage(model, X_te, y_te, (0.5, 0.9))
+        print(f"📐 Interval coverage (share of test trips at or below): {coverage}  |  {quantiles.stats()}")
+        tier = fast_tier(model, X_te, y_te, mean_absolute_error, higher_is_better=False, metric_name="mae_hours")
+
+    with report.phase("dump"):
+        save_bundle(
+            DELAY_BUNDLE_PATH,
+            family="delay",
+            pieces={"model": model, "encoders": encoders, "leaf_quantiles": quantiles},
+            feature_order=all_feats,
+            metrics={"mae_hours": round(float(mae), 4), "r2": round(float(r2), 4),
+                     "p90_coverage": coverage["p90"]},
+            metadata={
+                "dataset": os.path.basename(LOGISTICS_PATH),
+                "train_rows": int(len(X_tr)),
+                "test_rows": int(len(X_te)),
+                "sklearn_version": sklearn.__version__,
+                "params": model.get_params(),
+                "fast_tier": {"model": tier},
+                "drift_reference": reference,
+                "leaf_quantiles": {**quantiles.stats(), "coverage": coverage},
+            },
+        )
+    print(f"💾 Delay bundle → {DELAY_BUNDLE_PATH}")
+
+    report.artifact(DELAY_BUNDLE_PATH)
+    report.metric("mae_hours", mae, higher_is_better=False)
+    report.metric("r2", r2, higher_is_better=True)
+    # Calibration: P90 should cover 90 % of trips; over-covering is as wrong as under.
+    # Near zero by design, so it gets absolute slack (2 points of coverage)
+    report.metric("p90_coverage_error", abs(coverage["p90"] - 0.9), higher_is_better=False,
+                  abs_tolerance=P90_COVERAGE_SLACK)
+    report.measure_latency(model, X_te)
+    report.save()
 
 
 # ── Eco Score Model ───────────────────────────────────────────────────────────
 def train_eco_model():
-    print("\n📂 Loading vehicle database for eco-score model …")
-    df = pd.read_csv(DATABASE_PATH, low_memory=False)
-    df = df.dropna(subset=[ECO_TARGET])
-    df = df[df[ECO_TARGET] > 0]
-    print(f"   Rows: {len(df):,}\n")
-
-    X, y, encoders = preprocess_eco(df, fit=True)
-
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    print("🌿 Training GradientBoostingRegressor for eco score …")
-    model = GradientBoostingRegressor(
-        n_estimators=300, learning_rate=0.05, max_depth=5, random_state=42
-    )
-    model.fit(X_tr, y_tr)
-    y_pred = model.predict(X_te)
-    print(f"✅ Eco Score — MAE: {mean_absolute_error(y_te, y_pred):.2f}  |  R²: {r2_score(y_te, y_pred):.4f}")
-
-    joblib.dump(model, ECO_MODEL_PATH)
-    joblib.dump(encoders, ECO_ENC_PATH)
-    print(f"💾 Eco model → {ECO_MODEL_PATH}")
-    print(f"💾 Eco encoders → {ECO_ENC_PATH}")
+    report = TrainingReport("eco")
+
+    with report.phase("load"):
+        print("\n📂 Loading vehicle database for eco-score model …")
+        df = pd.read_csv(DATABASE_PATH, low_memory=False)
+        df = df.dropna(subset=[ECO_TARGET])
+        df = df[df[ECO_TARGET] > 0]
+        print(f"   Rows: {len(df):,}\n")
+
+    with report.phase("preprocess"):
+        X, y, encoders = preprocess_eco(df, fit=True)
+
+        X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    with report.phase("fit"):
+        print("🌿 Training GradientBoostingRegressor for eco score …")
+        model = GradientBoostingRegressor(
+            n_estimators=300, learning_rate=0.05, max_depth=5, random_state=42
+        )
+        model.fit(X_tr, y_tr)
+
+    with report.phase("evaluate"):
+        y_pred = model.predict(X_te)
+        mae, r2 = mean_absolute_error(y_te, y_pred), r2_score(y_te, y_pred)
+        print(f"✅ Eco Score — MAE: {mae:.2f}  |  R²: {r2:.4f}")
+        tier = fast_tier(model, X_te, y_te, mean_absolute_error, higher_is_better=False, metric_name="mae",
+                         scale=float(np.std(y_te)))   # boosted: budget against the target's spread
+
+    with report.phase("dump"):
+        save_bundle(
+            ECO_BUNDLE_PATH,
+            family="eco",
+            pieces={"model": model, "encoders": encoders},
+            feature_order=ECO_FEATURES + ECO_CAT_FEATURES,
+            metrics={"mae": round(float(mae), 4), "r2": round(float(r2), 4)},
+            metadata={
+                "dataset": os.path.basename(DATABASE_PATH),
+                "train_rows": int(len(X_tr)),
+                "test_rows": int(len(X_te)),
+                "sklearn_version": sklearn.__version__,
+                "params": model.get_params(),
+                "fast_tier": {"model": tier},
+                "drift_reference": reference_sketch(df, ECO_FEATURES, ECO_CAT_FEATURES),
+            },
+        )
+    print(f"💾 Eco bundle → {ECO_BUNDLE_PATH}")
+
+    report.artifact(ECO_BUNDLE_PATH)
+    report.metric("mae", mae, higher_is_better=False)
+    report.metric("r2", r2, higher_is_better=True)
+    report.measure_latency(model, X_te)
+    report.save()
 
 
 if __name__ == "__main__":
@@ -9,20 +9,32 @@ Targets:
   - CO2 Emissions(g/km)   → regression (GradientBoostingRegressor)
   - Anomaly detection      → IsolationForest (unsupervised)
 
+Bundle saved:
+  - fuel.bundle   → CO2 model + anomaly model + encoders/scaler + metadata
+                    (incl. drift reference sketch, see utils/drift.py)
+
+Report saved:
+  - reports/training/fuel.json → phase timings, peak RSS, size, latency, metrics
+
 Run:
     python -m training.train_fuel
 """
 
 import os
 import sys
-import joblib
+import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.ensemble import GradientBoostingRegressor, IsolationForest
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from utils.preprocessing import preprocess_fuel, FUEL_TARGET
+from utils.bundle import save_bundle
+from utils.tiers import fast_tier
+from utils.drift import reference_sketch
+from training.report import TrainingReport
+from utils.preprocessing import preprocess_fuel, FUEL_FEATURES, FUEL_CAT_FEATURES, FUEL_TARGET
 
 DATASET_PATH = os.path.join(
     os.path.dirname(__file__),
@@ -33,53 +45,80 @@ DATASET_PATH = os.path.join(
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 os.makedirs(MODELS_DIR, exist_ok=True)
 
-CO2_MODEL_PATH = os.path.join(MODELS_DIR, "fuel_co2.pkl")
-ANOMALY_MODEL_PATH = os.path.join(MODELS_DIR, "fuel_anomaly.pkl")
-ENCODER_PATH = os.path.join(MODELS_DIR, "fuel_encoders.pkl")
+BUNDLE_PATH = os.path.join(MODELS_DIR, "fuel.bundle")
 
 
 def train():
-    print("📂 Loading CO2 Emissions dataset …")
-    df = pd.read_csv(DATASET_PATH)
-    df = df.dropna(subset=[FUEL_TARGET])
-    print(f"   Rows: {len(df):,}\n")
+    report = TrainingReport("fuel")
+
+    with report.phase("load"):
+        print("📂 Loading CO2 Emissions dataset …")
+        df = pd.read_csv(DATASET_PATH)
+        df = df.dropna(subset=[FUEL_TARGET])
+        print(f"   Rows: {len(df):,}\n")
+
+    with report.phase("preprocess"):
+        X, y, encoders = preprocess_fuel(df, fit=True)
 
-    X, y, encoders = preprocess_fuel(df, fit=True)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
     # ── 1. CO2 Regression ──────────────────────────────
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    print("📈 Training GradientBoostingRegressor for CO2 prediction …")
-    co2_model = GradientBoostingRegressor(
-        n_estimators=300,
-        learning_rate=0.05,
-        max_depth=5,
-        random_state=42,
-    )
-    co2_model.fit(X_train, y_train)
-
-    y_pred = co2_model.predict(X_test)
-    mae = mean_absolute_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
-    print(f"\n✅ CO2 Regression — MAE: {mae:.2f} g/km  |  R²: {r2:.4f}")
+    with report.phase("fit"):
+        print("📈 Training GradientBoostingRegressor for CO2 prediction …")
+        co2_model = GradientBoostingRegressor(
+            n_estimators=300,
+            learning_rate=0.05,
+            max_depth=5,
+            random_state=42,
+        )
+        co2_model.fit(X_train, y_train)
+
+    with report.phase("evaluate"):
+        y_pred = co2_model.predict(X_test)
+        mae = mean_absolute_error(y_test, y_pred)
+        r2 = r2_score(y_test, y_pred)
+        print(f"\n✅ CO2 Regression — MAE: {mae:.2f} g/km  |  R²: {r2:.4f}")
+        co2_tier = fast_tier(co2_model, X_test, y_test, mean_absolute_error,
+                             higher_is_better=False, metric_name="mae_g_km", scale=float(np.std(y_test)))
 
     # ── 2. Anomaly Detection (Isolation Forest) ────────
-    print("\n🚨 Training IsolationForest for fuel anomaly detection …")
-    anomaly_model = IsolationForest(
-        n_estimators=200,
-        contamination=0.05,   # assume ~5% anomalous readings
-        random_state=42,
-    )
-    anomaly_model.fit(X)   # unsupervised on full data
-    print("   IsolationForest trained on full dataset (contamination=5%)")
+    with report.phase("fit_anomaly"):
+        print("\n🚨 Training IsolationForest for fuel anomaly detection …")
+        anomaly_model = IsolationForest(
+            n_estimators=200,
+            contamination=0.05,   # assume ~5% anomalous readings
+            random_state=42,
+        )
+        anomaly_model.fit(X)   # unsupervised on full data
+        print("   IsolationForest trained on full dataset (contamination=5%)")
 
     # Save
-    joblib.dump(co2_model, CO2_MODEL_PATH)
-    joblib.dump(anomaly_model, ANOMALY_MODEL_PATH)
-    joblib.dump(encoders, ENCODER_PATH)
-    print(f"\n💾 CO2 model  → {CO2_MODEL_PATH}")
-    print(f"💾 Anomaly model → {ANOMALY_MODEL_PATH}")
-    print(f"💾 Encoders → {ENCODER_PATH}")
+    with report.phase("dump"):
+        save_bundle(
+            BUNDLE_PATH,
+            family="fuel",
+            pieces={"co2_model": co2_model, "anomaly_model": anomaly_model, "encoders": encoders},
+            feature_order=FUEL_FEATURES + FUEL_CAT_FEATURES,
+            metrics={"co2_mae": round(float(mae), 4), "co2_r2": round(float(r2), 4)},
+            metadata={
+                "dataset": os.path.basename(DATASET_PATH),
+                "train_rows": int(len(X_train)),
+                "test_rows": int(len(X_test)),
+                "sklearn_version": sklearn.__version__,
+                "co2_params": co2_model.get_params(),
+                "anomaly_params": anomaly_model.get_params(),
+                "fast_tier": {"co2_model": co2_tier},
+                "drift_reference": reference_sketch(df, FUEL_FEATURES, FUEL_CAT_FEATURES),
+            },
+        )
+    print(f"\n💾 Bundle saved → {BUNDLE_PATH}")
+
+    report.artifact(BUNDLE_PATH)
+    report.metric("co2_mae", mae, higher_is_better=False)
+    report.metric("co2_r2", r2, higher_is_better=True)
+    report.measure_latency(co2_model, X_test, name="co2_model")
+    report.measure_latency(anomaly_model, X_test, name="anomaly_model", method="score_samples")
+    report.save()
 
 
 if __name__ == "__main__":
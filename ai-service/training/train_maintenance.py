@@ -5,22 +5,36 @@ Trains a RandomForest classifier to predict whether a vehicle needs maintenance.
 Dataset: logistics_dataset_with_maintenance_required.csv
 Target:  Maintenance_Required  (0 = No, 1 = Yes)
 
+Bundle saved:
+  - maintenance.bundle   → model + encoders/scaler + feature order + metrics
+                           (+ fast-tier tree count, see utils/tiers.py)
+                           (+ drift reference sketch, see utils/drift.py)
+
+Report saved:
+  - reports/training/maintenance.json → phase timings, peak RSS, size, latency, metrics
+
 Run:
     python -m training.train_maintenance
 """
 
 import os
 import sys
-import joblib
 import pandas as pd
+import sklearn
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
 
 # allow imports from ai-service root
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from utils.bundle import save_bundle
+from utils.tiers import fast_tier
+from utils.drift import reference_sketch
+from training.report import TrainingReport
 from utils.preprocessing import (
     preprocess_maintenance,
+    MAINTENANCE_FEATURES,
+    MAINTENANCE_CAT_FEATURES,
     MAINTENANCE_TARGET,
 )
 
@@ -33,41 +47,67 @@ DATASET_PATH = os.path.join(
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 os.makedirs(MODELS_DIR, exist_ok=True)
 
-MODEL_PATH = os.path.join(MODELS_DIR, "maintenance.pkl")
-ENCODER_PATH = os.path.join(MODELS_DIR, "maintenance_encoders.pkl")
+BUNDLE_PATH = os.path.join(MODELS_DIR, "maintenance.bundle")
 
 
 def train():
-    print("📂 Loading dataset …")
-    df = pd.read_csv(DATASET_PATH)
-    print(f"   Rows: {len(df):,}  |  Target distribution:\n{df[MAINTENANCE_TARGET].value_counts()}\n")
-
-    X, y, encoders = preprocess_maintenance(df, fit=True)
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-
-    print("🌲 Training RandomForestClassifier …")
-    model = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=12,
-        min_samples_leaf=5,
-        n_jobs=-1,
-        random_state=42,
-        class_weight="balanced",
-    )
-    model.fit(X_train, y_train)
-
-    y_pred = model.predict(X_test)
-    acc = accuracy_score(y_test, y_pred)
-    print(f"\n✅ Accuracy: {acc:.4f}")
-    print(classification_report(y_test, y_pred, target_names=["No Maintenance", "Maintenance Required"]))
-
-    joblib.dump(model, MODEL_PATH)
-    joblib.dump(encoders, ENCODER_PATH)
-    print(f"\n💾 Model saved  → {MODEL_PATH}")
-    print(f"💾 Encoders saved → {ENCODER_PATH}")
+    report = TrainingReport("maintenance")
+
+    with report.phase("load"):
+        print("📂 Loading dataset …")
+        df = pd.read_csv(DATASET_PATH)
+        print(f"   Rows: {len(df):,}  |  Target distribution:\n{df[MAINTENANCE_TARGET].value_counts()}\n")
+
+    with report.phase("preprocess"):
+        X, y, encoders = preprocess_maintenance(df, fit=True)
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+
+    with report.phase("fit"):
+        print("🌲 Training RandomForestClassifier …")
+        model = RandomForestClassifier(
+            n_estimators=200,
+            max_depth=12,
+            min_samples_leaf=5,
+            n_jobs=-1,
+            random_state=42,
+            class_weight="balanced",
+        )
+        model.fit(X_train, y_train)
+
+    with report.phase("evaluate"):
+        y_pred = model.predict(X_test)
+        acc = accuracy_score(y_test, y_pred)
+        print(f"\n✅ Accuracy: {acc:.4f}")
+        print(classification_report(y_test, y_pred, target_names=["No Maintenance", "Maintenance Required"]))
+
+        tier = fast_tier(model, X_test, y_test, accuracy_score, higher_is_better=True, metric_name="accuracy")
+
+    with report.phase("dump"):
+        save_bundle(
+            BUNDLE_PATH,
+            family="maintenance",
+            pieces={"model": model, "encoders": encoders},
+            feature_order=MAINTENANCE_FEATURES + MAINTENANCE_CAT_FEATURES,
+            metrics={"accuracy": round(float(acc), 4)},
+            metadata={
+                "dataset": os.path.basename(DATASET_PATH),
+                "train_rows": int(len(X_train)),
+                "test_rows": int(len(X_test)),
+                "sklearn_version": sklearn.__version__,
+                "params": model.get_params(),
+                "fast_tier": {"model": tier},
+                "drift_reference": reference_sketch(df, MAINTENANCE_FEATURES, MAINTENANCE_CAT_FEATURES),
+            },
+        )
+    print(f"\n💾 Bundle saved → {BUNDLE_PATH}")
+
+    report.artifact(BUNDLE_PATH)
+    report.metric("accuracy", acc, higher_is_better=True)
+    report.measure_latency(model, X_test, method="predict_proba")
+    report.save()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+"""
+admission.py — Admission control and load shedding (ASGI middleware).
+──────────────────────────────────────────────────────────────────────
+Every request path maps to a class (e.g. critical / interactive / bulk).
+Each class has
+
+    limit      requests it may run at once
+    queue      requests that may wait for a slot — beyond that, shed
+    max_wait   seconds a queued request waits before it is shed
+    priority   lower runs first when a slot frees up
+
+and all classes together share one ``total`` limit, sized below the
+threadpool that runs the sync handlers. A request that cannot run is queued;
+when a slot frees, the highest-priority waiter whose class is under its limit
+goes next. A full queue or an expired wait is answered at once with 503 and a
+``Retry-After`` estimated from the class's recent service time, instead of
+piling into the threadpool until every caller times out.
+
+Everything runs on the event loop, so the bookkeeping needs no locks.
+"""
+
+import asyncio
+import bisect
+import itertools
+import json
+import math
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+WAIT_SAMPLES = 1024       # recent queue waits kept per class for percentiles
+
+
+@dataclass
+class AdmissionClass:
+    name: str
+    limit: int
+    queue: int
+    max_wait_s: float
+    priority: int
+    # ── runtime counters ──
+    in_flight: int = 0
+    queued: int = 0
+    admitted: int = 0
+    shed_queue_full: int = 0
+    shed_timeout: int = 0
+    service_ewma_s: float = 0.05
+    waits: np.ndarray = field(default_factory=lambda: np.zeros(WAIT_SAMPLES))
+    n_waits: int = 0
+
+    def record_wait(self, wait_s: float):
+        self.waits[self.n_waits % WAIT_SAMPLES] = wait_s
+        self.n_waits += 1
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained."""
+        return max(1, math.ceil((self.queued + 1) * self.service_ewma_s / max(self.limit, 1)))
+
+    def stats(self) -> dict:
+        recent = self.waits[:min(self.n_waits, WAIT_SAMPLES)] * 1000
+        p50, p99 = np.percentile(recent, [50, 99]) if len(recent) else (0.0, 0.0)
+        return {
+            "limit": self.limit,
+            "queue": self.queue,
+            "max_wait_s": self.max_wait_s,
+            "priority": self.priority,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "queue_wait_ms": {
+                "p50": round(float(p50), 2),
+                "p99": round(float(p99), 2),
+                "max": round(float(recent.max()), 2) if len(recent) else 0.0,
+            },
+            "service_ms_ewma": round(self.service_ewma_s * 1000, 2),
+        }
+
+
+class Shed(Exception):
+    def __init__(self, cls: AdmissionClass, reason: str):
+        super().__init__(reason)
+        self.cls = cls
+        self.reason = reason
+
+
+def parse_limits(spec: str) -> dict:
+    """'critical=8:64:2.0,bulk=4:16' → {name: (limit, queue, max_wait_s or None)}."""
+    out = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, values = part.split("=")
+        nums = values.split(":")
+        out[name.strip()] = (int(nums[0]), int(nums[1]), float(nums[2]) if len(nums) > 2 else None)
+    return out
+
+
+# ─── Controller ───────────────────────────────────────────────────────────────
+class AdmissionController:
+    def __init__(self, classes: list, total: int, routes: list, exempt: tuple = (), default: str = None):
+        self.classes = {c.name: c for c in classes}
+        self.total = total
+        self.in_flight = 0
+        self.routes = routes            # [(path prefix, class name)], first match wins
+        self.exempt = tuple(exempt)
+        self.default = default
+        self._waiters = []              # sorted [(priority, seq, cls, future)]
+        self._seq = itertools.count()
+
+    def classify(self, path: str):
+        if path.startswith(self.exempt):
+            return None
+        for prefix, name in self.routes:
+            if path.startswith(prefix):
+                return self.classes[name]
+        return self.classes.get(self.default)
+
+    def _can_run(self, cls: AdmissionClass) -> bool:
+        return cls.in_flight < cls.limit and self.in_flight < self.total
+
+    def _start(self, cls: AdmissionClass):
+        cls.in_flight += 1
+        cls.admitted += 1
+        self.in_flight += 1
+
+    async def acquire(self, cls: AdmissionClass) -> float:
+        """Wait for a slot; returns the queue wait in seconds or raises Shed."""
+        # Waiters only exist while their class is at its limit or the total is
+        # full (every release re-dispatches), so a free slot is nobody's turn
+        if self._can_run(cls):
+            self._start(cls)
+            cls.record_wait(0.0)
+            return 0.0
+        if cls.queued >= cls.queue:
+            cls.shed_queue_full += 1
+            raise Shed(cls, "queue full")
+
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        entry = (cls.priority, next(self._seq), cls, future)
+        bisect.insort(self._waiters, entry, key=lambda w: w[:2])
+        cls.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=cls.max_wait_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            cancelled = isinstance(e, asyncio.CancelledError)
+            if future.done():               # a slot arrived as we gave up
+                if cancelled:
+                    self.release(cls)
+                    raise
+            else:
+                self._waiters.remove(entry)
+                cls.queued -= 1
+                if cancelled:
+                    raise
+                cls.shed_timeout += 1
+                raise Shed(cls, "queue wait timeout")
+        wait = time.perf_counter() - started
+        cls.record_wait(wait)
+        return wait
+
+    def release(self, cls: AdmissionClass, service_s: float = None):
+        cls.in_flight -= 1
+        self.in_flight -= 1
+        if service_s is not None:
+            cls.service_ewma_s += 0.1 * (service_s - cls.service_ewma_s)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to the best waiters whose class is under its own limit."""
+        i = 0
+        while i < len(self._waiters) and self.in_flight < self.total:
+            _, _, cls, future = self._waiters[i]
+            if cls.in_flight < cls.limit:
+                self._waiters.pop(i)
+                cls.queued -= 1
+                self._start(cls)
+                future.set_result(None)
+            else:
+                i += 1
+
+    def stats(self) -> dict:
+        return {
+            "total_limit": self.total,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "classes": {name: c.stats() for name, c in self.classes.items()},
+        }
+
+
+# ─── ASGI middleware ──────────────────────────────────────────────────────────
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        cls = self.controller.classify(scope["path"])
+        if cls is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            wait = await self.controller.acquire(cls)
+        except Shed as e:
+            return await self._reject(send, e)
+
+        async def send_with_wait(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-queue-wait-ms", f"{wait * 1000:.1f}".encode()),
+                ]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_wait)
+        finally:
+            self.controller.release(cls, time.perf_counter() - started)
+
+    @staticmethod
+    async def _reject(send, shed: Shed):
+        retry_after = shed.cls.retry_after()
+        body = json.dumps({
+            "detail": f"Service busy ({shed.cls.name}: {shed.reason}). Retry after {retry_after}s.",
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,152 @@
+"""
+assignment.py — Vectorized vehicle → trip cost matrix + sparse assignment.
+──────────────────────────────────────────────────────────────────────────
+Every (vehicle, trip) pair is priced in hours, built as whole N × M arrays:
+
+    cost = ETA (deadhead to pickup + loaded trip, /predict/route physics)
+         + delay_weight × predicted hours beyond on-time delivery
+         + risk_weight  × vehicle maintenance risk
+
+Pairs where the cargo exceeds the vehicle's capacity get an INFEASIBLE cost;
+the solver never prefers them, and any that are still forced in (more trips
+than capable vehicles) are dropped from the result.
+
+Delay scoring is additive: the delay model is run once per vehicle (against a
+reference trip) and once per trip (against a reference vehicle) in a single
+batch, and pair delay ≈ vehicle effect + trip effect − reference. Scoring all
+N × M pairs through a forest is far too slow for a 2000 × 2000 request.
+
+The matching is solved on a sparse candidate graph: each trip's and each
+vehicle's CANDIDATES cheapest feasible partners, ranked on the reduced cost
+(row and then column minima subtracted, so a trip's own length or a vehicle's
+risk does not crowd out the right partners). scipy's sparse Jonker-Volgenant
+(min_weight_full_bipartite_matching) solves that in a fraction of the dense
+Hungarian time and, on 2000 × 2000 geographic instances, lands within ~0.1%
+of the dense optimum. Every node of the smaller side also gets one INFEASIBLE
+dummy partner, so a solution always exists. If any of them still ends up on
+its dummy (a capacity shortfall only far-away vehicles can cover, typical of
+fleets parked at a few depots), the dense Hungarian solve runs instead.
+"""
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+from utils.routing import (
+    ROAD_DETOUR, DEFAULT_BASE_SPEED,
+    great_circle_matrix, load_ratio, load_mult, driving_hours,
+)
+
+INFEASIBLE = 1e6     # hours — dwarfs any real trip
+CANDIDATES = 32      # cheapest feasible partners kept per vehicle and per trip
+
+
+def trip_hours(deadhead_km, trip_km, trip_speed, cond_mult, ratio):
+    """ETA for a pair: empty deadhead on mixed roads, then the loaded trip (broadcasts)."""
+    free = deadhead_km / (DEFAULT_BASE_SPEED * cond_mult) + trip_km / (trip_speed * cond_mult * load_mult(ratio))
+    return driving_hours(free)
+
+
+def pair_costs(
+    v_lat: np.ndarray, v_lon: np.ndarray, v_cap_kg: np.ndarray, v_risk: np.ndarray,
+    p_lat: np.ndarray, p_lon: np.ndarray, trip_km: np.ndarray, cargo_kg: np.ndarray,
+    trip_speed: np.ndarray, cond_mult: np.ndarray, delay_excess=0.0,
+    delay_weight: float = 1.0, risk_weight: float = 10.0,
+) -> tuple:
+    """
+    (cost, feasible) N × M matrices for N vehicles (v_*) and M trips.
+
+    ``trip_speed`` is the base speed of each trip's road type, ``cond_mult``
+    its traffic × weather multiplier and ``delay_excess`` the N × M (or
+    broadcastable) predicted delay beyond on-time, in hours. Same arithmetic
+    as trip_hours(), but done in place on one buffer — at 4M pairs every
+    temporary matrix costs tens of milliseconds.
+    """
+    cost = great_circle_matrix(v_lat, v_lon, p_lat, p_lon)
+    cost *= ROAD_DETOUR / (DEFAULT_BASE_SPEED * cond_mult)[None, :]       # deadhead hours
+
+    ratio = np.multiply.outer(np.where(v_cap_kg > 0, 1 / np.where(v_cap_kg > 0, v_cap_kg, 1), 0), cargo_kg)
+    np.minimum(ratio, 1.0, out=ratio)
+    ratio[v_cap_kg <= 0] = load_ratio(0.0, 0.0)
+    loaded = load_mult(ratio)
+    np.divide((trip_km / (trip_speed * cond_mult))[None, :], loaded, out=loaded)
+    cost += loaded
+    cost = driving_hours(cost)
+
+    cost += risk_weight * v_risk[:, None]
+    if delay_weight:
+        cost += delay_weight * delay_excess
+    feasible = (v_cap_kg[:, None] <= 0) | (cargo_kg[None, :] <= v_cap_kg[:, None])
+    np.copyto(cost, INFEASIBLE, where=~feasible)
+    return cost, feasible
+
+
+def _candidates(reduced: np.ndarray, feasible: np.ndarray, k: int) -> np.ndarray:
+    """N × M mask of each row's and each column's k cheapest feasible pairs."""
+    mask = np.zeros(reduced.shape, dtype=bool)
+    for r, m in ((reduced, mask), (reduced.T, mask.T)):
+        if r.shape[1] <= k:
+            m[:] = True
+            continue
+        top = np.argpartition(r, k, axis=1)[:, :k]
+        m[np.arange(len(r))[:, None], top] = True
+    mask &= feasible
+    return mask
+
+
+def _assign_dense(cost: np.ndarray, feasible: np.ndarray) -> tuple:
+    # A constant per row (column) is only neutral if every row (column) is matched
+    n, m = cost.shape
+    reduced = cost - cost.min(axis=1, keepdims=True) if n <= m else cost.copy()
+    if m <= n:
+        reduced -= reduced.min(axis=0, keepdims=True)
+    rows, cols = linear_sum_assignment(reduced)
+    keep = feasible[rows, cols]
+    return rows[keep], cols[keep]
+
+
+def _assign_sparse(reduced: np.ndarray, candidates: np.ndarray) -> tuple:
+    """Matching over the candidate pairs; rows left on their dummy partner are dropped."""
+    n, m = reduced.shape
+    rows, cols = np.nonzero(candidates)
+    # +1 keeps every weight non-zero; neutral, as every row is matched
+    graph = sparse.csr_matrix(
+        (np.concatenate([reduced[rows, cols] + 1.0, np.full(n, INFEASIBLE)]),
+         (np.concatenate([rows, np.arange(n)]), np.concatenate([cols, m + np.arange(n)]))),
+        shape=(n, m + n),
+    )
+    rows, cols = min_weight_full_bipartite_matching(graph)
+    keep = cols < m
+    return rows[keep], cols[keep], graph.nnz
+
+
+def assign(cost: np.ndarray, feasible: np.ndarray, k: int = CANDIDATES) -> tuple:
+    """
+    Minimum-cost matching (rectangular is fine). Returns (vehicle idx, trip
+    idx, pairs the solver looked at) — only feasible pairs are returned.
+    """
+    # Vehicles / trips with no feasible partner can never be matched
+    v_ok, t_ok = np.nonzero(feasible.any(axis=1))[0], np.nonzero(feasible.any(axis=0))[0]
+    if len(v_ok) < cost.shape[0] or len(t_ok) < cost.shape[1]:
+        rows, cols, looked = assign(cost[np.ix_(v_ok, t_ok)], feasible[np.ix_(v_ok, t_ok)], k) \
+            if len(v_ok) and len(t_ok) else (v_ok, t_ok, 0)
+        return v_ok[rows], t_ok[cols], looked
+
+    flip = cost.shape[0] > cost.shape[1]           # the smaller side goes on the rows
+    c, f = (cost.T, feasible.T) if flip else (cost, feasible)
+    n, m = c.shape
+
+    # Ranked on the fully reduced cost; solved with row minima removed (every row
+    # is matched, so that is neutral) and column minima too only when square
+    reduced = c - c.min(axis=1, keepdims=True)
+    ranked = reduced - reduced.min(axis=0, keepdims=True)
+    if n == m:
+        reduced = ranked
+
+    rows, cols, looked = _assign_sparse(reduced, _candidates(ranked, f, k))
+    if len(rows) < n:
+        # The candidates could not match every row — maybe nothing can; the dense solve knows
+        rows, cols = _assign_dense(c, f)
+        looked = c.size
+    return (cols, rows, looked) if flip else (rows, cols, looked)
@@ -0,0 +1,94 @@
+"""
+attribution.py — Per-prediction feature contributions for tree ensembles.
+──────────────────────────────────────────────────────────────────────────
+Saabas-style path attribution: walking from the root to a leaf, every split
+moves the node value from parent to child, and that change is credited to
+the split's feature. So for each tree
+
+    leaf value = root value + Σ contribution[feature]
+
+and averaging over the forest gives
+
+    prediction = bias + Σ_f contribution[f]     (exactly, per row)
+
+The path sums depend only on the leaf, so they are precomputed once per model
+into one sparse (all leaves × features) table. Explaining a batch is then one
+``forest.apply`` (the same traversal ``predict`` already does) and one sparse
+product of a (rows × leaves) indicator with that table — a few milliseconds
+for a 200-tree forest, whatever the batch size.
+
+For classifiers the explained value is the probability of ``class_index``.
+"""
+
+import numpy as np
+from scipy import sparse
+
+
+def _node_values(tree, class_index: int) -> np.ndarray:
+    value = tree.value[:, 0, :]
+    if value.shape[1] == 1:                      # regressor
+        return value[:, 0].astype(float)
+    return value[:, class_index] / value.sum(axis=1)
+
+
+def _leaf_paths(tree, values: np.ndarray, n_features: int) -> sparse.csr_matrix:
+    """(n_nodes × n_features) path sums; non-leaf rows are left empty."""
+    n = tree.node_count
+    left, right, feature = tree.children_left, tree.children_right, tree.feature
+    internal = np.flatnonzero(left >= 0)
+    parent = np.full(n, -1)
+    parent[left[internal]] = internal
+    parent[right[internal]] = internal
+
+    # One vectorized step per depth level: child path = parent path + its split's delta
+    paths = np.zeros((n, n_features))
+    level = np.array([left[0], right[0]] if n > 1 else [], dtype=np.int64)
+    while len(level):
+        up = parent[level]
+        paths[level] = paths[up]
+        paths[level, feature[up]] += values[level] - values[up]
+        inner = level[left[level] >= 0]
+        level = np.concatenate((left[inner], right[inner]))
+    paths[internal] = 0.0
+    return sparse.csr_matrix(paths)
+
+
+class TreeAttributor:
+    def __init__(self, forest, feature_names: list, class_index: int = 1):
+        self.forest = forest
+        self.feature_names = list(feature_names)
+        trees = [est.tree_ for est in forest.estimators_]
+        self.n_trees = len(trees)
+        n_features = len(self.feature_names)
+
+        tables, roots = [], []
+        for tree in trees:
+            values = _node_values(tree, class_index)
+            roots.append(values[0])
+            tables.append(_leaf_paths(tree, values, n_features))
+        self.offsets = np.cumsum([0] + [t.node_count for t in trees[:-1]])
+        self.table = sparse.vstack(tables, format="csr") / self.n_trees
+        self.bias = float(np.mean(roots))
+
+    def explain(self, X: np.ndarray) -> tuple:
+        """
+        (prediction, contributions) for a batch. Contributions are (rows ×
+        features) and each row sums to prediction − bias; the prediction is
+        read off the same leaves, so no separate predict() pass is needed.
+        """
+        leaves = self.forest.apply(X) + self.offsets          # (rows, trees) global node ids
+        rows = len(leaves)
+        indicator = sparse.csr_matrix(
+            (np.ones(leaves.size), leaves.ravel(), np.arange(0, leaves.size + 1, self.n_trees)),
+            shape=(rows, self.table.shape[0]),
+        )
+        contributions = (indicator @ self.table).toarray()
+        return self.bias + contributions.sum(axis=1), contributions
+
+    def as_dicts(self, contributions: np.ndarray, top: int = None) -> list:
+        """Per row {feature: contribution}, largest magnitude first."""
+        out = []
+        for row in contributions:
+            order = np.argsort(-np.abs(row), kind="stable")[:top]
+            out.append({self.feature_names[i]: round(float(row[i]), 5) for i in order})
+        return out
@@ -0,0 +1,209 @@
+"""
+audit_log.py — Asynchronous prediction audit log (retraining data capture).
+────────────────────────────────────────────────────────────────────────────
+Handlers call ``log(family, id, features, prediction)``. On the request path
+that is a sampling check, a length check and one ``deque.append`` of a tuple
+that references the request's own dicts — around a microsecond, no I/O and
+no lock (deque appends are atomic).
+
+A daemon writer thread wakes every ``flush_s`` seconds (or as soon as
+``batch_rows`` records are waiting), drains the queue, and appends one Parquet
+row group per family to the family's current file:
+
+    <dir>/<family>/<family>-20260119T101500Z-0001.parquet
+
+Columns are ``ts``, ``id``, the raw feature fields and ``pred_*`` fields. Files
+are written as ``*.parquet.part`` and renamed once closed, so readers only
+ever see complete files; a file is rotated after ``rotate_rows`` rows or
+``rotate_s`` seconds. When the queue is full, new records are dropped and
+counted rather than making requests wait.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+logger = logging.getLogger("fleetflow-ai")
+
+
+def parse_rates(spec: str, default: float = 1.0) -> dict:
+    """'delay=0.1,eco=0' → {family: rate}; families not listed use ``default``."""
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        family, rate = part.split("=")
+        rates[family.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class _FamilyFile:
+    """The open Parquet file of one family."""
+
+    def __init__(self, directory: str, family: str, seq: int):
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.path = os.path.join(directory, f"{family}-{stamp}-{seq:04d}.parquet")
+        self.writer = None
+        self.schema = None
+        self.rows = 0
+        self.opened_at = time.time()
+
+    def write(self, table) -> bool:
+        """Append a row group; False if the batch doesn't fit this file's schema."""
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = pq.ParquetWriter(f"{self.path}.part", self.schema, compression="zstd")
+        elif table.schema != self.schema:
+            try:
+                table = table.select(self.schema.names).cast(self.schema)
+            except (KeyError, ValueError, TypeError, NotImplementedError):
+                return False
+        self.writer.write_table(table)
+        self.rows += table.num_rows
+        return True
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(f"{self.path}.part", self.path)
+
+
+class PredictionAuditLog:
+    def __init__(self, directory: str, rates: dict = None, default_rate: float = 1.0,
+                 capacity: int = 100_000, batch_rows: int = 5_000, flush_s: float = 2.0,
+                 rotate_rows: int = 500_000, rotate_s: float = 3600.0):
+        self.directory = directory
+        self.rates = rates or {}
+        self.default_rate = default_rate
+        self.capacity = capacity
+        self.batch_rows = batch_rows
+        self.flush_s = flush_s
+        self.rotate_rows = rotate_rows
+        self.rotate_s = rotate_s
+
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._files: dict = {}
+        self._seq = 0
+        # ── counters ──
+        self.enqueued = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.written = 0
+        self.files_closed = 0
+        self.write_errors = 0
+        self.last_flush_ms = 0.0
+
+    # ── Request path ──────────────────────────────────────────────────────────
+    def log(self, family: str, record_id, features: dict, prediction: dict):
+        """Queue one prediction for the writer; never blocks."""
+        rate = self.rates.get(family, self.default_rate)
+        if rate < 1.0 and random.random() >= rate:
+            self.sampled_out += 1
+            return
+        if len(self._queue) >= self.capacity:
+            self.dropped += 1
+            return
+        self._queue.append((family, time.time(), record_id, features, prediction))
+        self.enqueued += 1
+        if len(self._queue) >= self.batch_rows:
+            self._wake.set()
+
+    # ── Writer thread ─────────────────────────────────────────────────────────
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_s)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self) -> int:
+        """Drain the queue into the family files. Returns records written."""
+        import pyarrow as pa
+
+        started = time.perf_counter()
+        batches: dict = {}
+        for _ in range(len(self._queue)):
+            family, ts, record_id, features, prediction = self._queue.popleft()
+            batches.setdefault(family, []).append({
+                "ts": ts,
+                "id": record_id,
+                **features,
+                **{f"pred_{k}": v for k, v in prediction.items()},
+            })
+
+        written = 0
+        for family, rows in batches.items():
+            try:
+                table = pa.Table.from_pylist(rows)
+                if not self._current(family).write(table):
+                    self._rotate(family)                 # schema changed → start a new file
+                    self._current(family).write(table)
+                written += len(rows)
+            except (OSError, pa.ArrowException) as e:
+                self.write_errors += 1
+                logger.warning(f"⚠️  Audit log write failed for {family}: {e}")
+
+        now = time.time()
+        for family, f in list(self._files.items()):
+            if f.rows >= self.rotate_rows or now - f.opened_at >= self.rotate_s:
+                self._rotate(family)
+        self.written += written
+        if written:
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+        return written
+
+    def _current(self, family: str) -> _FamilyFile:
+        f = self._files.get(family)
+        if f is None:
+            directory = os.path.join(self.directory, family)
+            os.makedirs(directory, exist_ok=True)
+            self._seq += 1
+            f = self._files[family] = _FamilyFile(directory, family, self._seq)
+        return f
+
+    def _rotate(self, family: str):
+        f = self._files.pop(family, None)
+        if f is not None and f.writer is not None:
+            f.close()
+            self.files_closed += 1
+
+    def close(self):
+        """Stop the writer, flush what is queued and close every open file."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        else:
+            self.flush()
+        for family in list(self._files):
+            self._rotate(family)
+
+    def stats(self) -> dict:
+        return {
+            "directory": self.directory,
+            "rates": {**self.rates, "default": self.default_rate},
+            "queue_depth": len(self._queue),
+            "capacity": self.capacity,
+            "enqueued": self.enqueued,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "written": self.written,
+            "files_closed": self.files_closed,
+            "open_files": {family: f.rows for family, f in self._files.items()},
+            "write_errors": self.write_errors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
@@ -0,0 +1,182 @@
+"""
+bundle.py — Single-file, versioned model bundles with content checksums.
+────────────────────────────────────────────────────────────────────────
+Every model family (maintenance, fuel, delay, eco) ships as ONE file that holds
+its model(s), encoders, scaler, feature order, metrics and training metadata.
+
+File layout (all integers little-endian):
+
+    ┌──────────────────────────────┐
+    │ magic      b"FFBNDL01"  8 B  │
+    │ header_len uint32       4 B  │
+    │ header     JSON  header_len  │  ← manifest (family, pieces, sha256, …)
+    │ padding    → 64 B boundary   │
+    │ pickle     protocol 5 stream │  ← pieces dict, arrays stored out-of-band
+    │ buffer 0   (64 B aligned)    │  ← raw numpy buffers (tree nodes, …)
+    │ buffer 1 …                   │
+    └──────────────────────────────┘
+
+The sha256 in the header covers everything after the header padding, so a
+truncated or partially overwritten bundle is rejected before unpickling.
+Large numpy arrays live out-of-band and are handed back to ``pickle.loads``
+as slices of the file buffer, which means a bundle loads with one sequential
+read (or from an ``mmap``) and a single unpickle.
+"""
+
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+
+MAGIC = b"FFBNDL01"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+_LEN = struct.Struct("<I")
+
+
+class BundleError(Exception):
+    """Raised when a bundle is corrupt, mismatched or of an unknown format."""
+
+
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+
+def save_bundle(
+    path: str,
+    family: str,
+    pieces: dict,
+    feature_order: list,
+    metrics: dict = None,
+    metadata: dict = None,
+) -> dict:
+    """
+    Write ``pieces`` (e.g. {"model": …, "encoders": …}) to a single bundle file.
+    The file is written to a temp path and atomically renamed into place.
+    Returns the manifest stored in the header.
+    """
+    buffers = []
+    stream = pickle.dumps(pieces, protocol=5, buffer_callback=buffers.append)
+
+    # Lay out the payload: pickle stream, then each out-of-band buffer aligned.
+    segments = [stream]
+    layout = []
+    offset = len(stream)
+    for buf in buffers:
+        raw = buf.raw()
+        pad = _pad(offset)
+        segments.append(b"\0" * pad)
+        offset += pad
+        layout.append([offset, raw.nbytes])
+        segments.append(raw)
+        offset += raw.nbytes
+
+    digest = hashlib.sha256()
+    for seg in segments:
+        digest.update(seg)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "family": family,
+        "pieces": sorted(pieces.keys()),
+        "feature_order": list(feature_order),
+        "metrics": metrics or {},
+        "metadata": {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            **(metadata or {}),
+        },
+        "pickle_len": len(stream),
+        "buffers": layout,
+        "payload_len": offset,
+        "sha256": digest.hexdigest(),
+    }
+    header = json.dumps(manifest, default=str).encode()
+    prefix = MAGIC + _LEN.pack(len(header)) + header
+    prefix += b"\0" * _pad(len(prefix))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        for seg in segments:
+            f.write(seg)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def _parse(data) -> tuple:
+    view = memoryview(data)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise BundleError("not a FleetFlow model bundle (bad magic)")
+    (header_len,) = _LEN.unpack_from(view, len(MAGIC))
+    start = len(MAGIC) + _LEN.size
+    try:
+        manifest = json.loads(bytes(view[start:start + header_len]))
+    except ValueError as e:
+        raise BundleError(f"unreadable bundle header: {e}") from e
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise BundleError(f"unsupported bundle format version {manifest.get('format_version')}")
+
+    body_start = start + header_len
+    body_start += _pad(body_start)
+    payload = view[body_start:body_start + manifest["payload_len"]]
+    if len(payload) != manifest["payload_len"]:
+        raise BundleError("bundle truncated")
+    return manifest, payload
+
+
+def read_manifest(path: str) -> dict:
+    """Read only the JSON header of a bundle (no unpickling, no hashing)."""
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC) + _LEN.size)
+        if head[:len(MAGIC)] != MAGIC:
+            raise BundleError("not a FleetFlow model bundle (bad magic)")
+        (header_len,) = _LEN.unpack_from(head, len(MAGIC))
+        return json.loads(f.read(header_len))
+
+
+def load_bundle(
+    path: str,
+    family: str = None,
+    expected_pieces: list = None,
+    feature_order: list = None,
+    use_mmap: bool = False,
+) -> tuple:
+    """
+    Load a bundle and verify it. Returns ``(pieces, manifest)``.
+
+    Raises BundleError when the checksum fails, the family differs, a required
+    piece is missing, or the stored feature order no longer matches the code.
+    With ``use_mmap=True`` the file is mapped copy-on-write instead of read;
+    numpy arrays are then backed by the page cache.
+    """
+    with open(path, "rb") as f:
+        if use_mmap:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        else:
+            data = bytearray(os.fstat(f.fileno()).st_size)
+            f.readinto(data)
+
+    manifest, payload = _parse(data)
+
+    if hashlib.sha256(payload).hexdigest() != manifest["sha256"]:
+        raise BundleError("checksum mismatch — bundle is corrupt or partially written")
+    if family is not None and manifest["family"] != family:
+        raise BundleError(f"expected a '{family}' bundle, got '{manifest['family']}'")
+    missing = sorted(set(expected_pieces or []) - set(manifest["pieces"]))
+    if missing:
+        raise BundleError(f"bundle is missing pieces: {missing}")
+    if feature_order is not None and manifest["feature_order"] != list(feature_order):
+        raise BundleError("feature order in bundle does not match the service's feature list")
+
+    pickle_len = manifest["pickle_len"]
+    buffers = [payload[off:off + size] for off, size in manifest["buffers"]]
+    pieces = pickle.loads(payload[:pickle_len], buffers=buffers)
+
+    if sorted(pieces.keys()) != manifest["pieces"]:
+        raise BundleError("bundle pieces do not match its manifest")
+    return pieces, manifest
+
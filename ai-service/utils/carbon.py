@@ -0,0 +1,18 @@
+"""
+carbon.py — Emission factors shared by the carbon endpoint and offline jobs.
+"""
+
+# kg CO2 emitted per litre of fuel burned
+EMISSION_FACTORS = {
+    "diesel":  2.68,
+    "petrol":  2.31,
+    "gasoline": 2.31,
+    "cng":     1.97,
+    "lpg":     1.63,
+    "electric": 0.0,
+}
+DEFAULT_EMISSION_FACTOR = EMISSION_FACTORS["diesel"]
+
+
+def emission_factor(fuel_type: str) -> float:
+    return EMISSION_FACTORS.get(fuel_type.lower(), DEFAULT_EMISSION_FACTOR)
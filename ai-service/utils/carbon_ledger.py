@@ -0,0 +1,227 @@
+"""
+carbon_ledger.py — Append-only carbon ledger with pre-aggregated rollups.
+──────────────────────────────────────────────────────────────────────────
+Every recorded /predict/carbon result is appended as one JSON line to a ledger
+file and, at the same time, folded into running totals:
+
+    granularity (hour / day / month) → bucket start → (dimension, key) → totals
+
+where the dimension is ``fleet`` (key "all"), ``vehicle``, ``driver`` or
+``fuel_type`` and the totals are [trips, fuel_litres, distance_km, co2_kg].
+
+A rollup over [start, end) is answered by covering the range with the fewest
+buckets — whole months in the middle, whole days and then hours at the ragged
+edges — and adding up their totals. Any range inside a year is at most ~100
+bucket reads, however many trips it holds. Ranges are resolved to the hour.
+
+The ledger file is the source of truth: on startup it is replayed once to
+rebuild the totals; a torn last line (crash mid-write) is skipped.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+GRANULARITIES = ("hour", "day", "month")
+DIMENSIONS = ("vehicle", "driver", "fuel_type")
+
+
+# ─── Bucket arithmetic (UTC) ──────────────────────────────────────────────────
+def bucket_start(ts: float, granularity: str) -> int:
+    """Unix start of the hour / day / month containing ``ts``."""
+    dt = datetime.fromtimestamp(ts, tz=timezone.utc)
+    if granularity == "hour":
+        dt = dt.replace(minute=0, second=0, microsecond=0)
+    elif granularity == "day":
+        dt = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        dt = dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return int(dt.timestamp())
+
+
+def bucket_end(start: int, granularity: str) -> int:
+    dt = datetime.fromtimestamp(start, tz=timezone.utc)
+    if granularity == "hour":
+        return start + 3600
+    if granularity == "day":
+        return start + 86400
+    nxt = (dt.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return int(nxt.timestamp())
+
+
+def cover(start: float, end: float) -> list:
+    """
+    Fewest [(granularity, bucket start)] tiling [start, end), both ends
+    floored to the hour: take a whole month when one fits, else a day, else
+    an hour.
+    """
+    t, end = bucket_start(start, "hour"), bucket_start(end, "hour")
+    pieces = []
+    while t < end:
+        for granularity in ("month", "day", "hour"):
+            if bucket_start(t, granularity) == t and bucket_end(t, granularity) <= end:
+                pieces.append((granularity, t))
+                t = bucket_end(t, granularity)
+                break
+    return pieces
+
+
+def totals_dict(totals) -> dict:
+    trips, litres, km, co2 = totals
+    return {
+        "trips": int(trips),
+        "fuel_litres": round(litres, 3),
+        "distance_km": round(km, 3),
+        "co2_kg": round(co2, 3),
+        "co2_per_km": round(co2 / km, 4) if km > 0 else 0.0,
+    }
+
+
+# ─── Ledger ───────────────────────────────────────────────────────────────────
+class CarbonLedger:
+    def __init__(self, path: str):
+        self.path = path
+        self._buckets = {g: {} for g in GRANULARITIES}
+        self._lock = threading.Lock()
+        self._file = None
+        self.records = 0
+        self.first_ts = None
+        self.last_ts = None
+
+    # ── Aggregation ───────────────────────────────────────────────────────────
+    def _fold(self, entry: dict):
+        values = (1, entry["fuel_litres"], entry["distance_km"], entry["co2_kg"])
+        keys = [("fleet", "all")] + [
+            (dim, entry[dim]) for dim in DIMENSIONS if entry.get(dim) is not None
+        ]
+        ts = entry["ts"]
+        for granularity in GRANULARITIES:
+            bucket = self._buckets[granularity].setdefault(bucket_start(ts, granularity), {})
+            for key in keys:
+                totals = bucket.get(key)
+                if totals is None:
+                    bucket[key] = list(values)
+                else:
+                    for i, v in enumerate(values):
+                        totals[i] += v
+        self.records += 1
+        self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+        self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+
+    # ── Public API ────────────────────────────────────────────────────────────
+    def load(self) -> int:
+        """Rebuild the totals from the ledger file. Returns records replayed."""
+        with self._lock:
+            self._buckets = {g: {} for g in GRANULARITIES}
+            self.records, self.first_ts, self.last_ts = 0, None, None
+            if not os.path.exists(self.path):
+                return 0
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._fold(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+            return self.records
+
+    def record(self, vehicle_id: str, driver_id: str, trip_id: str, fuel_type: str,
+               fuel_litres: float, distance_km: float, co2_kg: float, ts: float = None) -> dict:
+        """Append one computation to the ledger and fold it into the rollups."""
+        entry = {
+            "ts": float(ts if ts is not None else time.time()),
+            "vehicle": vehicle_id,
+            "driver": driver_id,
+            "trip_id": trip_id,
+            "fuel_type": fuel_type.lower(),
+            "fuel_litres": float(fuel_litres),
+            "distance_km": float(distance_km),
+            "co2_kg": float(co2_kg),
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            self._fold(entry)
+        return entry
+
+    def rollup(self, start: float, end: float, group_by: str = None, key: str = None,
+               interval: str = None) -> dict:
+        """
+        Totals over [start, end). ``group_by`` (vehicle / driver / fuel_type)
+        adds per-key totals, optionally restricted to one ``key``; ``interval``
+        (hour / day / month) adds a time series of that granularity; edge
+        buckets only count the part of them inside the range.
+        """
+        if group_by is not None and group_by not in DIMENSIONS:
+            raise ValueError(f"group_by must be one of {', '.join(DIMENSIONS)}")
+        if interval is not None and interval not in GRANULARITIES:
+            raise ValueError(f"interval must be one of {', '.join(GRANULARITIES)}")
+        wanted = ("fleet", "all") if group_by is None or key is None else (group_by, key)
+
+        pieces = cover(start, end)
+        total = [0, 0.0, 0.0, 0.0]
+        groups = {}
+        with self._lock:
+            for granularity, t in pieces:
+                bucket = self._buckets[granularity].get(t)
+                if not bucket:
+                    continue
+                _add(total, bucket.get(wanted))
+                if group_by is not None:
+                    for (dim, k), totals in bucket.items():
+                        if dim == group_by and (key is None or k == key):
+                            _add(groups.setdefault(k, [0, 0.0, 0.0, 0.0]), totals)
+
+            series = None
+            if interval is not None:
+                series = {}
+                rank = GRANULARITIES.index(interval)
+                for granularity, t in pieces:
+                    if GRANULARITIES.index(granularity) <= rank:
+                        steps = [(granularity, t)]
+                    else:       # a coarser piece: read its interval-sized buckets
+                        steps, end_t = [], bucket_end(t, granularity)
+                        while t < end_t:
+                            steps.append((interval, t))
+                            t = bucket_end(t, interval)
+                    for g, b in steps:
+                        totals = self._buckets[g].get(b, {}).get(wanted)
+                        if totals:
+                            _add(series.setdefault(bucket_start(b, interval), [0, 0.0, 0.0, 0.0]), totals)
+
+        out = {"buckets_read": len(pieces), **totals_dict(total)}
+        if group_by is not None:
+            out["groups"] = [
+                {"key": k, **totals_dict(v)}
+                for k, v in sorted(groups.items(), key=lambda kv: kv[1][3], reverse=True)
+            ]
+        if series is not None:
+            out["series"] = [{"bucket_start": t, **totals_dict(v)} for t, v in sorted(series.items())]
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "records": self.records,
+                "first_ts": self.first_ts,
+                "last_ts": self.last_ts,
+                "buckets": {g: len(b) for g, b in self._buckets.items()},
+            }
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _add(acc: list, totals):
+    if totals:
+        for i, v in enumerate(totals):
+            acc[i] += v
@@ -0,0 +1,207 @@
+"""
+driver_events.py — Event-driven incremental driver scoring.
+────────────────────────────────────────────────────────────
+Drivers are scored from running event counts instead of client-side totals:
+
+    score = 100 − Σ weight × count   (on-time deliveries carry a negative weight)
+
+clipped to 0–100. The weights and the grade bands are shared with the
+stateless /predict/driver-score endpoint.
+
+Per driver the store keeps, in preallocated arrays:
+  • all-time counts                         (capacity × events)
+  • a ring of daily counts, one slot per day (capacity × days × events)
+
+Batches are applied with np.add.at, so ingest is vectorized. A windowed
+score ("last 7 days") sums at most ``days`` slots of one row — constant work
+however many events the driver has. A ring slot is reset the first time a
+newer day lands on it; events older than the ring still count all-time.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+# ─── Scoring (shared with /predict/driver-score) ──────────────────────────────
+EVENT_TYPES = ("overspeed", "harsh_brake", "harsh_accel", "idle_minutes", "late_delivery", "on_time_delivery")
+PENALTY_WEIGHTS = np.array([2.0, 3.0, 2.5, 0.3, 5.0, -1.0])   # points per event (idle: per minute)
+PENALTY_KEYS = ("overspeed", "harsh_brake", "harsh_accel", "idle", "late_delivery", "on_time_bonus")
+
+GRADE_BANDS = [
+    (90, "A", "LOW", "⭐ Excellent Driver",
+     "🏆 Outstanding performance. Eligible for driver incentive bonus."),
+    (75, "B", "LOW", "✅ Good Driver",
+     "👍 Good driving habits. Watch idle time and minor speeding events."),
+    (60, "C", "MEDIUM", "⚠️ Average Driver",
+     "⚠️ Needs improvement. Schedule driver training for braking and speed control."),
+    (40, "D", "HIGH", "🚨 At-Risk Driver",
+     "🚨 High-risk behaviour detected. Mandatory safety training required."),
+    (0, "F", "CRITICAL", "🔴 Unsafe Driver",
+     "🔴 CRITICAL: Immediately suspend pending full safety review."),
+]
+
+
+def score_counts(counts) -> tuple:
+    """(score, penalty breakdown) for event counts in EVENT_TYPES order."""
+    points = np.asarray(counts, dtype=float) * PENALTY_WEIGHTS
+    score = round(max(0.0, min(100.0, 100.0 - float(points.sum()))), 1)
+    return score, {key: round(abs(float(p)), 1) for key, p in zip(PENALTY_KEYS, points)}
+
+
+def grade_for(score: float) -> tuple:
+    """(grade, risk_level, badge, recommendation) for a 0–100 score."""
+    for floor, *band in GRADE_BANDS:
+        if score >= floor:
+            return tuple(band)
+    return tuple(GRADE_BANDS[-1][1:])
+
+
+# ─── Store ────────────────────────────────────────────────────────────────────
+class DriverEventStore:
+    def __init__(self, capacity: int = 1024, ring_days: int = 32):
+        self.ring_days = ring_days
+        self._event_pos = {e: i for i, e in enumerate(EVENT_TYPES)}
+        self._index: dict = {}
+        self._ids: list = []
+        self._lock = threading.Lock()
+        self.events = 0
+        self._alloc(capacity)
+
+    # ── Storage ───────────────────────────────────────────────────────────────
+    def _alloc(self, capacity: int):
+        n_events = len(EVENT_TYPES)
+        self._totals = np.zeros((capacity, n_events))
+        self._daily = np.zeros((capacity, self.ring_days, n_events), dtype=np.float32)
+        self._day_of = np.full((capacity, self.ring_days), -1, dtype=np.int32)
+        self._last_event = np.zeros(capacity)
+
+    def _arrays(self) -> tuple:
+        return self._totals, self._daily, self._day_of, self._last_event
+
+    def _grow(self, needed: int):
+        old = self._arrays()
+        capacity = n = len(old[0])          # ids may already run past the old arrays
+        while capacity < needed:
+            capacity *= 2
+        self._alloc(capacity)
+        for new, prev in zip(self._arrays(), old):
+            new[:n] = prev[:n]
+
+    def _rows_for(self, driver_ids: list) -> np.ndarray:
+        rows = np.empty(len(driver_ids), dtype=np.int64)
+        for i, driver_id in enumerate(driver_ids):
+            row = self._index.get(driver_id)
+            if row is None:
+                row = self._index[driver_id] = len(self._ids)
+                self._ids.append(driver_id)
+            rows[i] = row
+        if len(self._ids) > len(self._totals):
+            self._grow(len(self._ids))
+        return rows
+
+    # ── Public API ────────────────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, driver_id: str) -> bool:
+        return driver_id in self._index
+
+    def ingest(self, driver_ids: list, events: list, values=None, ts=None) -> int:
+        """
+        Apply a batch of events. ``values`` (default 1 each) are counts, or
+        minutes for idle_minutes; ``ts`` is one Unix time or one per event.
+        Returns the number of events applied.
+        """
+        unknown = set(events) - self._event_pos.keys()
+        if unknown:
+            raise ValueError(f"Unknown event type(s): {sorted(unknown)}; expected one of {list(EVENT_TYPES)}")
+        n = len(driver_ids)
+        codes = np.fromiter((self._event_pos[e] for e in events), dtype=np.int64, count=n)
+        values = np.ones(n) if values is None else np.asarray(values, dtype=float)
+        ts = np.broadcast_to(np.asarray(time.time() if ts is None else ts, dtype=float), (n,))
+        days = (ts // 86400).astype(np.int32)
+        slots = days % self.ring_days
+
+        with self._lock:
+            rows = self._rows_for(driver_ids)
+            np.add.at(self._totals, (rows, codes), values)
+            np.maximum.at(self._last_event, rows, ts)
+
+            # Claim ring slots for newer days (zeroing them), then add the
+            # events whose day now owns its slot
+            before = self._day_of[rows, slots]
+            np.maximum.at(self._day_of, (rows, slots), days)
+            after = self._day_of[rows, slots]
+            claimed = after != before
+            self._daily[rows[claimed], slots[claimed]] = 0.0
+            live = days == after
+            np.add.at(self._daily, (rows[live], slots[live], codes[live]), values[live])
+            self.events += n
+        return n
+
+    def counts(self, driver_id: str, window_days: int = None, now: float = None) -> np.ndarray:
+        """Event counts for a driver — all-time, or over the last ``window_days`` days (today included)."""
+        with self._lock:
+            row = self._index.get(driver_id)
+            if row is None:
+                return None
+            if window_days is None:
+                return self._totals[row].copy()
+            today = int((time.time() if now is None else now) // 86400)
+            day_of = self._day_of[row]
+            in_window = (day_of > today - window_days) & (day_of <= today)
+            return self._daily[row, in_window].sum(axis=0, dtype=float)
+
+    def last_event_at(self, driver_id: str) -> float:
+        row = self._index.get(driver_id)
+        return None if row is None else float(self._last_event[row])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "drivers": len(self._ids),
+                "events": self.events,
+                "ring_days": self.ring_days,
+                "memory_mb": round(sum(a.nbytes for a in self._arrays()) / 1e6, 2),
+            }
+
+    # ── Snapshot / restore ────────────────────────────────────────────────────
+    def snapshot(self, path: str) -> int:
+        """Write the store to ``path`` (.npz) atomically. Returns driver count."""
+        with self._lock:
+            n = len(self._ids)
+            arrays = {
+                "ids": np.array(self._ids, dtype=str),
+                "event_types": np.array(EVENT_TYPES, dtype=str),
+                "totals": self._totals[:n].copy(),
+                "daily": self._daily[:n].copy(),
+                "day_of": self._day_of[:n].copy(),
+                "last_event": self._last_event[:n].copy(),
+                "events": np.array(self.events),
+            }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        return n
+
+    def restore(self, path: str) -> int:
+        """Load a snapshot written by ``snapshot``. Returns driver count."""
+        with np.load(path, allow_pickle=False) as data:
+            if tuple(data["event_types"]) != EVENT_TYPES or data["daily"].shape[1] != self.ring_days:
+                raise ValueError("driver event snapshot has a different layout")
+            ids = [str(v) for v in data["ids"]]
+            with self._lock:
+                n = len(ids)
+                self._alloc(max(n * 2, 1024))
+                self._totals[:n] = data["totals"]
+                self._daily[:n] = data["daily"]
+                self._day_of[:n] = data["day_of"]
+                self._last_event[:n] = data["last_event"]
+                self.events = int(data["events"])
+                self._ids = ids
+                self._index = {d: i for i, d in enumerate(ids)}
+        return n
@@ -0,0 +1,226 @@
+"""
+feature_store.py — In-memory per-vehicle online feature store.
+───────────────────────────────────────────────────────────────
+Keeps the latest value of every maintenance feature per Vehicle_ID so clients
+only need to send the fields that changed since their last call.
+
+Storage is column-oriented: one preallocated float64 matrix for numeric
+features (plus the previous value and an EWMA for server-side derived
+features), and one int16 matrix of category codes with a small vocabulary per
+categorical column. A dict maps Vehicle_ID → row; rows are never freed, and
+the arrays double in size when full.
+
+Category values come from clients, so each vocabulary is bounded: once the
+model's encoder classes are known (``restrict``), any other value is stored
+as UNKNOWN, which the encoder maps to -1 exactly like the raw unseen value.
+Without a restriction, values past MAX_CATEGORIES also become UNKNOWN.
+
+State can be snapshotted to / restored from a single .npz file on local disk.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+UNKNOWN = "__unknown__"
+MAX_CATEGORIES = 1024      # per column; int16 codes
+
+
+
+class VehicleFeatureStore:
+    def __init__(
+        self,
+        numeric_features: list,
+        cat_features: list,
+        capacity: int = 1024,
+        ewma_alpha: float = 0.2,
+    ):
+        self.numeric_features = list(numeric_features)
+        self.cat_features = list(cat_features)
+        self.ewma_alpha = ewma_alpha
+
+        self._num_pos = {f: i for i, f in enumerate(self.numeric_features)}
+        self._cat_pos = {f: i for i, f in enumerate(self.cat_features)}
+        self._index: dict = {}
+        self._ids: list = []
+        self._vocab = [dict() for _ in self.cat_features]    # value → code
+        self._labels = [list() for _ in self.cat_features]   # code → value
+        self._allowed = [None for _ in self.cat_features]    # encoder classes, once known
+        self._lock = threading.Lock()
+        self._alloc(capacity)
+
+    # ── Storage ───────────────────────────────────────────────────────────────
+    def _alloc(self, capacity: int):
+        n_num, n_cat = len(self.numeric_features), len(self.cat_features)
+        self._values = np.full((capacity, n_num), np.nan)
+        self._prev = np.full((capacity, n_num), np.nan)
+        self._ewma = np.full((capacity, n_num), np.nan)
+        self._codes = np.full((capacity, n_cat), -1, dtype=np.int16)
+        self._updates = np.zeros(capacity, dtype=np.int64)
+        self._updated_at = np.zeros(capacity)
+
+    def _grow(self):
+        old = (self._values, self._prev, self._ewma, self._codes, self._updates, self._updated_at)
+        n = len(self._ids)
+        self._alloc(max(2 * len(old[0]), 1))
+        for new, prev in zip(
+            (self._values, self._prev, self._ewma, self._codes, self._updates, self._updated_at), old
+        ):
+            new[:n] = prev[:n]
+
+    def _row_for(self, vehicle_id: str) -> int:
+        row = self._index.get(vehicle_id)
+        if row is None:
+            if len(self._ids) == len(self._values):
+                self._grow()
+            row = len(self._ids)
+            self._index[vehicle_id] = row
+            self._ids.append(vehicle_id)
+        return row
+
+    def _code(self, col: int, value: str) -> int:
+        vocab = self._vocab[col]
+        code = vocab.get(value)
+        if code is None:
+            allowed = self._allowed[col]
+            rejected = len(vocab) >= MAX_CATEGORIES if allowed is None else value not in allowed
+            if rejected:
+                value = UNKNOWN
+                code = vocab.get(value)
+            if code is None:
+                code = vocab[value] = len(self._labels[col])
+                self._labels[col].append(value)
+        return code
+
+    def restrict(self, classes: dict):
+        """Limit each categorical column to ``{feature: encoder classes}``; other values → UNKNOWN."""
+        with self._lock:
+            for name, values in classes.items():
+                if name in self._cat_pos:
+                    self._allowed[self._cat_pos[name]] = {str(v) for v in values}
+
+    # ── Public API ────────────────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, vehicle_id: str) -> bool:
+        return vehicle_id in self._index
+
+    def merge(self, vehicle_id: str, fields: dict) -> dict:
+        """
+        Merge the changed ``fields`` into the stored state for ``vehicle_id``
+        and return the full merged feature row. Fields never seen for this
+        vehicle are absent from the result (see ``missing``).
+        """
+        with self._lock:
+            row = self._row_for(vehicle_id)
+            values = self._values[row]
+            self._prev[row] = values
+            for name, value in fields.items():
+                if value is None:
+                    continue
+                if name in self._num_pos:
+                    values[self._num_pos[name]] = float(value)
+                elif name in self._cat_pos:
+                    col = self._cat_pos[name]
+                    self._codes[row, col] = self._code(col, str(value))
+
+            ewma = self._ewma[row]
+            fresh = np.isnan(ewma)
+            ewma[fresh] = values[fresh]
+            ewma[~fresh] += self.ewma_alpha * (values[~fresh] - ewma[~fresh])
+            self._updates[row] += 1
+            self._updated_at[row] = time.time()
+            return self._row_dict(row)
+
+    def get(self, vehicle_id: str) -> dict:
+        """Current merged feature row for a vehicle, or None if unknown."""
+        with self._lock:
+            row = self._index.get(vehicle_id)
+            return None if row is None else self._row_dict(row)
+
+    def missing(self, features: dict) -> list:
+        """Feature names a merged row still lacks before it can be scored."""
+        return [f for f in self.numeric_features + self.cat_features if f not in features]
+
+    def derived(self, vehicle_id: str) -> dict:
+        """Server-side derived features: last-update deltas and EWMA means."""
+        with self._lock:
+            row = self._index.get(vehicle_id)
+            if row is None:
+                return None
+            deltas = self._values[row] - self._prev[row]
+            return {
+                "updates": int(self._updates[row]),
+                "updated_at": float(self._updated_at[row]),
+                "deltas": self._numeric_dict(deltas),
+                "rolling_means": self._numeric_dict(self._ewma[row]),
+            }
+
+    def _numeric_dict(self, arr) -> dict:
+        return {f: float(v) for f, v in zip(self.numeric_features, arr) if not np.isnan(v)}
+
+    def _row_dict(self, row: int) -> dict:
+        out = self._numeric_dict(self._values[row])
+        for col, name in enumerate(self.cat_features):
+            code = self._codes[row, col]
+            if code >= 0:
+                out[name] = self._labels[col][code]
+        return out
+
+    # ── Snapshot / restore ────────────────────────────────────────────────────
+    def snapshot(self, path: str) -> int:
+        """Write the store to ``path`` (.npz) atomically. Returns vehicle count."""
+        with self._lock:
+            n = len(self._ids)
+            arrays = {
+                "ids": np.array(self._ids, dtype=str),
+                "numeric_features": np.array(self.numeric_features, dtype=str),
+                "cat_features": np.array(self.cat_features, dtype=str),
+                "values": self._values[:n].copy(),
+                "prev": self._prev[:n].copy(),
+                "ewma": self._ewma[:n].copy(),
+                "codes": self._codes[:n].copy(),
+                "updates": self._updates[:n].copy(),
+                "updated_at": self._updated_at[:n].copy(),
+            }
+            for col in range(len(self.cat_features)):
+                arrays[f"vocab_{col}"] = np.array(self._labels[col], dtype=str)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        return n
+
+    def restore(self, path: str) -> int:
+        """Load a snapshot written by ``snapshot``. Returns vehicle count."""
+        with np.load(path, allow_pickle=False) as data:
+            if (list(data["numeric_features"]) != self.numeric_features
+                    or list(data["cat_features"]) != self.cat_features):
+                raise ValueError("feature store snapshot has a different feature layout")
+            ids = [str(v) for v in data["ids"]]
+            with self._lock:
+                self._alloc(max(len(ids) * 2, 1024))
+                n = len(ids)
+                self._values[:n] = data["values"]
+                self._prev[:n] = data["prev"]
+                self._ewma[:n] = data["ewma"]
+                self._codes[:n] = data["codes"]
+                self._updates[:n] = data["updates"]
+                self._updated_at[:n] = data["updated_at"]
+                self._ids = ids
+                self._index = {vid: i for i, vid in enumerate(ids)}
+                self._labels = [
+                    [str(v) for v in data[f"vocab_{col}"]]
+                    for col in range(len(self.cat_features))
+                ]
+                for col, allowed in enumerate(self._allowed):
+                    if allowed is not None:
+                        # Labels stored before the restriction read back as UNKNOWN
+                        self._labels[col] = [v if v in allowed else UNKNOWN for v in self._labels[col]]
+                self._vocab = [{v: code for code, v in enumerate(labels)} for labels in self._labels]
+        return n
@@ -0,0 +1,75 @@
+"""
+inference.py — Thread policy for model inference.
+──────────────────────────────────────────────────
+The forests are trained with ``n_jobs=-1`` and that setting is pickled into
+the bundles. In the service every request already runs on its own threadpool
+thread, so a single-row ``predict`` that also fans out to one joblib thread
+per core — with BLAS / OpenMP pools on top — gives cores × concurrent
+requests threads fighting over the same cores.
+
+The policy, applied once when the bundles load:
+
+  • model ``n_jobs`` → None: one thread per call unless a scope says otherwise
+  • native pools (BLAS / OpenMP, via threadpoolctl) → ``native_threads``
+    (default 1): request concurrency is what fills the cores
+  • batches of at least ``parallel_min_rows`` rows run their trees on
+    ``batch_threads`` threads (cores per worker process ÷ concurrent batches),
+    through joblib's thread-local ``parallel_config`` — other requests are
+    unaffected
+"""
+
+import os
+from contextlib import nullcontext
+
+from joblib import parallel_config
+from threadpoolctl import threadpool_info, threadpool_limits
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects CPU affinity / cgroup pinning)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class InferencePolicy:
+    def __init__(self, workers: int = 1, batch_concurrency: int = 1, native_threads: int = 1,
+                 batch_threads: int = None, parallel_min_rows: int = 2_000):
+        self.cores = available_cores()
+        self.workers = max(1, workers)
+        per_worker = max(1, self.cores // self.workers)
+        self.native_threads = max(1, native_threads)
+        self.batch_threads = batch_threads or max(1, per_worker // max(1, batch_concurrency))
+        self.parallel_min_rows = parallel_min_rows
+        self.models_pinned = 0
+
+    def apply(self, models: dict) -> int:
+        """Pin every loaded model's ``n_jobs`` and cap native pools. Returns models pinned."""
+        threadpool_limits(limits=self.native_threads)
+        pinned = 0
+        for model in models.values():
+            if model is not None and hasattr(model, "n_jobs"):
+                model.n_jobs = None
+                pinned += 1
+        self.models_pinned = pinned
+        return pinned
+
+    def scope(self, rows: int):
+        """Context for one model pass over ``rows`` rows — parallel only for big batches."""
+        if rows >= self.parallel_min_rows and self.batch_threads > 1:
+            return parallel_config(backend="threading", n_jobs=self.batch_threads)
+        return nullcontext()
+
+    def stats(self) -> dict:
+        return {
+            "cores": self.cores,
+            "workers": self.workers,
+            "native_threads": self.native_threads,
+            "batch_threads": self.batch_threads,
+            "parallel_min_rows": self.parallel_min_rows,
+            "models_pinned": self.models_pinned,
+            "native_pools": [
+                {"api": p["internal_api"], "num_threads": p["num_threads"]} for p in threadpool_info()
+            ],
+        }
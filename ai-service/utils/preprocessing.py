@@ -11,6 +11,15 @@ import os
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 
 
+def encode_labels(series: pd.Series, le: LabelEncoder) -> pd.Series:
+    """
+    Map labels to a fitted encoder's codes in one vectorized pass.
+    Labels unseen during training become -1 (same as the per-row path it replaces).
+    """
+    codes = {label: code for code, label in enumerate(le.classes_)}
+    return series.astype(str).map(codes).fillna(-1).astype(int)
+
+
 # ─────────────────────────────────────────────
 # Maintenance Feature Engineering
 # ─────────────────────────────────────────────
@@ -55,11 +64,7 @@ def preprocess_maintenance(df: pd.DataFrame, fit: bool = True, encoders: dict =
         if fit:
             df[col] = le.fit_transform(df[col].astype(str))
         else:
-            df[col] = df[col].astype(str).map(
-                lambda x, le=le: le.transform([x])[0]
-                if x in le.classes_
-                else -1
-            )
+            df[col] = encode_labels(df[col], le)
         encoders[col] = le
 
     all_features = MAINTENANCE_FEATURES + MAINTENANCE_CAT_FEATURES
@@ -115,11 +120,7 @@ def preprocess_fuel(df: pd.DataFrame, fit: bool = True, encoders: dict = None):
         if fit:
             df[col] = le.fit_transform(df[col].astype(str))
         else:
-            df[col] = df[col].astype(str).map(
-                lambda x, le=le: le.transform([x])[0]
-                if x in le.classes_
-                else -1
-            )
+            df[col] = encode_labels(df[col], le)
         encoders[col] = le
 
     all_features = FUEL_FEATURES + FUEL_CAT_FEATURES
@@ -144,6 +145,19 @@ def preprocess_fuel(df: pd.DataFrame, fit: bool = True, encoders: dict = None):
     return X_scaled, y, encoders
 
 
+# ─────────────────────────────────────────────
+# Delivery Delay Features (logistics dataset)
+# ─────────────────────────────────────────────
+
+DELAY_FEATURES = [
+    "Usage_Hours", "Actual_Load", "Load_Capacity",
+    "Downtime_Maintenance", "Impact_on_Efficiency",
+    "Fuel_Consumption", "Vibration_Levels",
+]
+DELAY_CAT_FEATURES = ["Route_Info", "Weather_Conditions", "Road_Conditions"]
+DELAY_TARGET = "Delivery_Times"
+
+
 # ─────────────────────────────────────────────
 # Vehicle Eco Score Feature Engineering (database.csv)
 # ─────────────────────────────────────────────
@@ -180,11 +194,7 @@ def preprocess_eco(df: pd.DataFrame, fit: bool = True, encoders: dict = None):
         if fit:
             df[col] = le.fit_transform(df[col].astype(str))
         else:
-            df[col] = df[col].astype(str).map(
-                lambda x, le=le: le.transform([x])[0]
-                if x in le.classes_
-                else -1
-            )
+            df[col] = encode_labels(df[col], le)
         encoders[col] = le
 
     all_features = ECO_FEATURES + ECO_CAT_FEATURES
@@ -0,0 +1,132 @@
+"""
+quantiles.py — Prediction intervals for forest regressors from leaf histograms.
+────────────────────────────────────────────────────────────────────────────────
+Quantile-regression-forest style: a forest's conditional distribution of the
+target is the average, over trees, of the distribution of training targets in
+the leaf the row lands in. Only those leaf distributions are needed, so they
+are precomputed at training time and no training rows are kept:
+
+  • targets are binned on shared edges (training quantiles, so the bins are
+    equal-mass overall and finest where most deliveries are)
+  • every training row is dropped down every tree; each leaf keeps the share
+    of its rows per bin
+  • all leaves of the forest go into one sparse (all nodes × bins) table,
+    stored in the bundle next to the model as compact integer counts
+    (uint8 bin ids, uint16 counts) and expanded to float shares at load
+
+Serving is one ``forest.apply`` (the traversal ``predict`` already does) and
+one sparse product of the (rows × nodes) leaf indicator with the table, the
+same shape of work as utils/attribution.py. The point prediction is read off
+the same leaves, so intervals cost no second pass over the trees. Quantiles
+come from the merged histogram's CDF, interpolated linearly inside the bin.
+
+A fast tier (first k trees, see utils/tiers.py) uses the first k trees' rows
+of the same table.
+"""
+
+import numpy as np
+from scipy import sparse
+
+DEFAULT_BINS = 64
+
+
+def _offsets(trees: list) -> np.ndarray:
+    return np.cumsum([0] + [t.node_count for t in trees[:-1]])
+
+
+class LeafQuantiles:
+    def __init__(self, forest, X: np.ndarray, y, bins: int = DEFAULT_BINS):
+        """Build the leaf table from the training rows (training time only)."""
+        y = np.asarray(y, dtype=float)
+        trees = [est.tree_ for est in forest.estimators_]
+        self.n_trees = len(trees)
+        self.offsets = _offsets(trees)
+        self.n_nodes = int(sum(t.node_count for t in trees))
+        self.edges = np.unique(np.quantile(y, np.linspace(0, 1, bins + 1)))
+        n_bins = len(self.edges) - 1
+        codes = np.clip(np.searchsorted(self.edges, y, side="right") - 1, 0, n_bins - 1)
+
+        # One tree at a time: (node, bin) keys → counts, already sorted by node
+        leaves = forest.apply(X)
+        keys, counts = zip(*(
+            np.unique((leaves[:, t] + self.offsets[t]) * n_bins + codes, return_counts=True)
+            for t in range(self.n_trees)
+        ))
+        keys, counts = np.concatenate(keys), np.concatenate(counts)
+        per_node = np.bincount(keys // n_bins, minlength=self.n_nodes)
+
+        # Stored compact: per node a run of (bin, count) pairs; shares are built at load
+        indptr = np.concatenate(([0], np.cumsum(per_node)))
+        self.indptr = indptr.astype(np.int32 if len(keys) < 2**31 else np.int64)
+        self.bins = (keys % n_bins).astype(np.uint8 if n_bins <= 256 else np.uint16)
+        self.counts = counts.astype(np.uint16 if counts.max(initial=0) < 2**16 else np.uint32)
+        self.table = None
+        self.values = None
+
+    def __getstate__(self):
+        # The float table and leaf values are rebuilt at load time (see attach)
+        return {k: v for k, v in self.__dict__.items() if k not in ("table", "values")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, table=None, values=None)
+
+    def attach(self, forest):
+        """Bind to the served forest: check it is the one the table was built from, build shares + leaf values."""
+        trees = [est.tree_ for est in forest.estimators_]
+        if len(trees) != self.n_trees or sum(t.node_count for t in trees) != self.n_nodes:
+            raise ValueError("leaf quantile table does not match the forest")
+        counts = sparse.csr_matrix(
+            (self.counts.astype(np.float32), self.bins, self.indptr), shape=(self.n_nodes, len(self.edges) - 1),
+        )
+        totals = np.asarray(counts.sum(axis=1)).ravel()
+        self.table = (sparse.diags((1.0 / np.maximum(totals, 1)).astype(np.float32)) @ counts).tocsr()
+        self.values = np.concatenate([t.value[:, 0, 0] for t in trees])
+        return self
+
+    def predict(self, X: np.ndarray, forest, quantiles: tuple) -> tuple:
+        """
+        (mean, quantiles) for a batch — mean equals ``forest.predict(X)``,
+        quantiles are (rows × len(quantiles)). ``forest`` may be a truncated
+        copy (fast tier) of the attached forest.
+        """
+        k = len(forest.estimators_)
+        leaves = forest.apply(X) + self.offsets[:k]               # (rows, k) global node ids
+        mean = self.values[leaves].mean(axis=1)
+        return mean, self.quantiles_for(leaves, quantiles)
+
+    def quantiles_for(self, leaves: np.ndarray, quantiles: tuple) -> np.ndarray:
+        """Quantiles of the merged leaf histograms, from (rows, k) global node ids."""
+        rows, k = leaves.shape
+        indicator = sparse.csr_matrix(
+            (np.full(leaves.size, 1.0 / k, dtype=np.float32), leaves.ravel(),
+             np.arange(0, leaves.size + 1, k)),
+            shape=(rows, self.n_nodes),
+        )
+        hist = (indicator @ self.table).toarray()                 # (rows × bins), rows sum to 1
+        cdf = np.cumsum(hist, axis=1)
+        out = np.empty((rows, len(quantiles)))
+        last = hist.shape[1] - 1
+        for j, q in enumerate(quantiles):
+            idx = np.minimum((cdf < q - 1e-9).sum(axis=1), last)[:, None]
+            below = np.take_along_axis(cdf, idx, axis=1) - np.take_along_axis(hist, idx, axis=1)
+            mass = np.take_along_axis(hist, idx, axis=1)
+            frac = np.clip((q - below) / np.maximum(mass, 1e-12), 0.0, 1.0)
+            lo, hi = self.edges[idx], self.edges[idx + 1]
+            out[:, j] = (lo + frac * (hi - lo))[:, 0]
+        return out
+
+    def coverage(self, forest, X: np.ndarray, y, quantiles: tuple) -> dict:
+        """{"p90": share of held-out targets at or below the predicted P90, …} (needs attach)."""
+        _, predicted = self.predict(X, forest, quantiles)
+        y = np.asarray(y, dtype=float)
+        return {f"p{round(q * 100)}": round(float(np.mean(y <= predicted[:, j])), 4) for j, q in enumerate(quantiles)}
+
+    def stats(self) -> dict:
+        return {
+            "trees": self.n_trees,
+            "bins": len(self.edges) - 1,
+            "leaf_entries": int(len(self.counts)),
+            "stored_mb": round((self.indptr.nbytes + self.bins.nbytes + self.counts.nbytes) / 1e6, 1),
+            "served_mb": round((self.table.data.nbytes + self.table.indices.nbytes + self.table.indptr.nbytes)
+                               / 1e6, 1) if self.table is not None else None,
+        }
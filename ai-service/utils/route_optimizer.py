@@ -0,0 +1,148 @@
+"""
+route_optimizer.py — Time-bounded multi-stop sequencing (depot + stops).
+────────────────────────────────────────────────────────────────────────
+Orders the stops of one vehicle's trip to minimise a cost matrix (free-flow
+hours or km between places, from utils.routing):
+
+  1. Nearest-neighbour construction from the depot.
+  2. Local search until no move improves the route or the time budget runs out:
+       • 2-opt  — reverse a stretch of the route (removes crossings)
+       • Or-opt — move a run of 1–3 consecutive stops elsewhere, either way round
+
+Each move is scored against every candidate position with one NumPy
+expression, so a pass over a few hundred stops costs a few hundred small
+array operations rather than O(n²) Python steps.
+
+The route is held as [depot, stops…, end]. For a round trip ``end`` is the
+depot again; for an open trip it is a virtual node that costs nothing to
+reach, so the last stop is free to be anywhere. Moves assume the cost
+matrix is symmetric; it is averaged with its transpose first.
+"""
+
+import time
+
+import numpy as np
+
+EPS = 1e-9
+MAX_SEGMENT = 3      # longest run of stops Or-opt moves at once
+
+
+def route_cost(cost: np.ndarray, route) -> float:
+    route = np.asarray(route)
+    return float(cost[route[:-1], route[1:]].sum())
+
+
+def nearest_neighbour(cost: np.ndarray, start: int, nodes) -> list:
+    """Greedy tour from ``start`` over ``nodes`` (always go to the closest unvisited)."""
+    nodes = np.asarray(nodes)
+    remaining = np.ones(len(nodes), dtype=bool)
+    order, current = [], start
+    for _ in range(len(nodes)):
+        d = np.where(remaining, cost[current, nodes], np.inf)
+        k = int(np.argmin(d))
+        remaining[k] = False
+        current = int(nodes[k])
+        order.append(current)
+    return order
+
+
+def two_opt_pass(cost: np.ndarray, route: np.ndarray, deadline: float) -> int:
+    """
+    One sweep of 2-opt over ``route`` (modified in place). For each edge p the
+    best partner edge q is found in one vectorized step. Returns moves made.
+    """
+    moves = 0
+    m = len(route) - 1                      # number of edges
+    for p in range(m - 2):
+        if time.perf_counter() > deadline:
+            break
+        a, b = route[p], route[p + 1]
+        q = np.arange(p + 2, m)
+        c, d = route[q], route[q + 1]
+        delta = cost[a, c] + cost[b, d] - cost[a, b] - cost[c, d]
+        k = int(np.argmin(delta))
+        if delta[k] < -EPS:
+            i, j = p + 1, int(q[k])
+            route[i:j + 1] = route[i:j + 1][::-1].copy()
+            moves += 1
+    return moves
+
+
+def or_opt_pass(cost: np.ndarray, route: np.ndarray, deadline: float) -> tuple:
+    """
+    One sweep of Or-opt: relocate runs of 1..MAX_SEGMENT stops to the best
+    edge elsewhere, forwards or reversed. Returns (new route, moves made).
+    """
+    moves = 0
+    for length in range(1, MAX_SEGMENT + 1):
+        i = 1
+        while i + length < len(route):          # the end node never moves
+            if time.perf_counter() > deadline:
+                return route, moves
+            seg = route[i:i + length]
+            prev, nxt = route[i - 1], route[i + length]
+            first, last = seg[0], seg[-1]
+            removal = cost[prev, first] + cost[last, nxt] - cost[prev, nxt]
+
+            rest = np.concatenate((route[:i], route[i + length:]))
+            a, b = rest[:-1], rest[1:]
+            base = cost[a, b]
+            forward = cost[a, first] + cost[last, b] - base
+            reverse = cost[a, last] + cost[first, b] - base
+            forward[i - 1] = reverse[i - 1] = np.inf     # its current place
+            best = np.minimum(forward, reverse)
+            k = int(np.argmin(best))
+            if best[k] - removal < -EPS:
+                piece = seg if forward[k] <= reverse[k] else seg[::-1]
+                route = np.concatenate((rest[:k + 1], piece, rest[k + 1:]))
+                moves += 1
+            else:
+                i += 1
+    return route, moves
+
+
+def solve(cost: np.ndarray, closed: bool = True, time_budget_s: float = 0.5) -> tuple:
+    """
+    Best stop order found within ``time_budget_s``.
+
+    ``cost`` is (n × n) with the depot at index 0 and stops at 1..n-1.
+    Returns (order of stop indices, stats) — the depot is not in ``order``.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget_s
+    n = len(cost)
+    stats = {"stops": n - 1, "two_opt_moves": 0, "or_opt_moves": 0, "passes": 0, "converged": True}
+    if n <= 2:
+        c = route_cost(cost, [0, *range(1, n), 0]) if closed else route_cost(cost, list(range(n)))
+        c = round(c, 4)
+        return list(range(1, n)), {**stats, "initial_cost": c, "final_cost": c,
+                                   "improvement_pct": 0.0, "elapsed_ms": 0.0}
+
+    # Symmetrise, and for open trips add a zero-cost end node
+    work = np.zeros((n + 1, n + 1)) if not closed else np.empty((n, n))
+    work[:n, :n] = (cost + cost.T) / 2
+    end = 0 if closed else n
+
+    order = nearest_neighbour(work, 0, np.arange(1, n))
+    route = np.array([0, *order, end], dtype=np.int64)
+    initial = route_cost(work, route)
+
+    while time.perf_counter() < deadline:
+        stats["passes"] += 1
+        moved = two_opt_pass(work, route, deadline)
+        route, relocated = or_opt_pass(work, route, deadline)
+        stats["two_opt_moves"] += moved
+        stats["or_opt_moves"] += relocated
+        if not moved and not relocated:
+            break
+    else:
+        stats["converged"] = False
+
+    final = route_cost(work, route)
+    stats.update(
+        initial_cost=round(initial, 4),
+        final_cost=round(final, 4),
+        improvement_pct=round(100 * (initial - final) / initial, 2) if initial > 0 else 0.0,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+    return [int(s) for s in route[1:-1]], stats
@@ -0,0 +1,364 @@
+"""
+routing.py — Local road-graph routing engine and shared trip physics.
+─────────────────────────────────────────────────────────────────────
+Trip physics: the speed / traffic / weather / load multipliers, stop
+buffer and fuel formula used by /predict/route (and the route and
+assignment optimizers). The helpers are plain arithmetic, so they accept
+floats or NumPy arrays alike.
+
+RoadGraph: a small road network loaded from datasets/road_graph.json
+(nodes with coordinates, edges with road type, distance and optional
+speed). Shortest free-flow-time paths come from A* with a straight-line
+time heuristic. Paths between every pair of hub cities are computed once
+at load time (one Dijkstra per hub), so those lookups are a dict hit;
+other pairs go through an LRU cache.
+
+Traffic, weather and load scale every edge by the same factor, so they
+never change which path is fastest — cached paths stay valid and the
+multipliers are applied afterwards.
+"""
+
+import heapq
+import json
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+# ─── Trip physics ─────────────────────────────────────────────────────────────
+# Base speed by road type (km/h)
+BASE_SPEED = {
+    "highway": 90.0,
+    "urban":   35.0,
+    "rural":   60.0,
+    "mixed":   55.0,
+}
+DEFAULT_BASE_SPEED = BASE_SPEED["mixed"]
+
+# Traffic multiplier (slows down speed)
+TRAFFIC_MULT = {"low": 1.0, "medium": 0.80, "high": 0.60, "jam": 0.35}
+DEFAULT_TRAFFIC_MULT = 0.80
+
+# Weather multiplier
+WEATHER_MULT = {"clear": 1.0, "rain": 0.85, "fog": 0.70, "snow": 0.55, "storm": 0.40}
+DEFAULT_WEATHER_MULT = 0.90
+
+MAX_LOAD_PENALTY = 0.15    # speed penalty at full load
+LOAD_FUEL_PENALTY = 0.20   # extra fuel at full load
+
+
+def base_speed(road_type: str) -> float:
+    return BASE_SPEED.get(road_type.lower(), DEFAULT_BASE_SPEED)
+
+
+def traffic_mult(level: str) -> float:
+    return TRAFFIC_MULT.get(level.lower(), DEFAULT_TRAFFIC_MULT)
+
+
+def weather_mult(weather: str) -> float:
+    return WEATHER_MULT.get(weather.lower(), DEFAULT_WEATHER_MULT)
+
+
+def load_ratio(current_load_kg, max_load_kg):
+    """Cargo fill ratio; 0.5 when the capacity is unknown (0)."""
+    if isinstance(max_load_kg, np.ndarray):
+        return np.where(max_load_kg > 0, current_load_kg / np.where(max_load_kg > 0, max_load_kg, 1), 0.5)
+    return current_load_kg / max_load_kg if max_load_kg > 0 else 0.5
+
+
+def load_mult(ratio):
+    """Heavy load = slower (max 15% penalty at full load)."""
+    return 1.0 - ratio * MAX_LOAD_PENALTY
+
+
+def driving_hours(base_hours):
+    """Add a buffer for stops/breaks (15 min per 4 hours driving)."""
+    return base_hours + np.floor(base_hours / 4) * (15 / 60)
+
+
+def fuel_litres(base_l100km, distance_km, ratio):
+    """Base consumption adjusted for load."""
+    return base_l100km * distance_km / 100 * (1 + ratio * LOAD_FUEL_PENALTY)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km (floats or broadcastable arrays)."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+# Straight-line → road distance for haversine-only estimates
+ROAD_DETOUR = 1.2
+
+
+def _unit_vectors(lat, lon) -> np.ndarray:
+    lat, lon = np.radians(lat), np.radians(lon)
+    c = np.cos(lat)
+    return np.stack([c * np.cos(lon), c * np.sin(lon), np.sin(lat)], axis=1)
+
+
+def great_circle_matrix(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    n × m great-circle km between two point sets. Points become unit vectors,
+    so the pairwise part is one matrix product plus one arcsin (chord form,
+    well within a metre of haversine_km) instead of the full trig per pair.
+    """
+    u = _unit_vectors(np.asarray(lat1, dtype=float), np.asarray(lon1, dtype=float))
+    v = _unit_vectors(np.asarray(lat2, dtype=float), np.asarray(lon2, dtype=float))
+    d = u @ v.T                          # cos(angle); (1 - cos) / 2 = (chord / 2)²
+    np.subtract(1.0, d, out=d)
+    d *= 0.5
+    np.clip(d, 0.0, 1.0, out=d)
+    np.sqrt(d, out=d)
+    np.arcsin(d, out=d)
+    d *= 6371.0 * 2
+    return d
+
+
+def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Pairwise great-circle km between points (n × n, one vectorized pass)."""
+    d = great_circle_matrix(lat, lon, lat, lon)
+    np.fill_diagonal(d, 0.0)
+    return d
+
+
+# ─── Road graph ───────────────────────────────────────────────────────────────
+# Off-graph coordinates join the nearest node by a local road this much
+# longer than the straight line, at the "mixed" base speed
+ACCESS_DETOUR = 1.3
+
+
+@dataclass(frozen=True)
+class RoutePath:
+    nodes: tuple            # node names, origin → destination
+    distance_km: float
+    hours: float            # free-flow driving time (no traffic / weather / load)
+    road_km: tuple          # ((road_type, km), …)
+
+    @property
+    def speed_kmh(self) -> float:
+        return self.distance_km / self.hours if self.hours > 0 else DEFAULT_BASE_SPEED
+
+
+class RoutingError(ValueError):
+    """Unknown place or no path between two places."""
+
+
+class RoadGraph:
+    def __init__(self, nodes: list, edges: list, name: str = "road graph", cache_size: int = 65_536):
+        self.name = name
+        self.names = [n["name"] for n in nodes]
+        self.index = {n.lower(): i for i, n in enumerate(self.names)}
+        self.lat = np.array([n["lat"] for n in nodes], dtype=float)
+        self.lon = np.array([n["lon"] for n in nodes], dtype=float)
+        self.hubs = [i for i, n in enumerate(nodes) if n.get("hub")]
+
+        # adjacency: node → [(neighbour, km, hours, road_type)]
+        self.adj = [[] for _ in nodes]
+        self.max_speed = 1.0
+        for e in edges:
+            a, b = self._node(e["from"]), self._node(e["to"])
+            speed = float(e.get("speed_kmh") or base_speed(e["road_type"]))
+            km = float(e["distance_km"])
+            self.adj[a].append((b, km, km / speed, e["road_type"]))
+            self.adj[b].append((a, km, km / speed, e["road_type"]))
+            self.max_speed = max(self.max_speed, speed)
+        self.n_edges = len(edges)
+
+        self._hub_paths: dict = {}
+        self._path = lru_cache(maxsize=cache_size)(self._astar)
+        self._node_km = None
+        self._node_hours = None
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["nodes"], data["edges"], name=data.get("name", "road graph"))
+
+    def _node(self, name: str) -> int:
+        i = self.index.get(name.strip().lower())
+        if i is None:
+            raise RoutingError(f"Unknown place '{name}'")
+        return i
+
+    # ── Search ────────────────────────────────────────────────────────────────
+    def _heuristic(self, goal: int) -> np.ndarray:
+        """Admissible lower bound on hours to ``goal`` from every node."""
+        return haversine_km(self.lat, self.lon, self.lat[goal], self.lon[goal]) / self.max_speed
+
+    def _build(self, prev: list, src: int, dst: int) -> RoutePath:
+        nodes, km, hours, road = [dst], 0.0, 0.0, {}
+        while nodes[-1] != src:
+            node = nodes[-1]
+            parent, edge = prev[node]
+            _, e_km, e_hours, e_road = edge
+            km += e_km
+            hours += e_hours
+            road[e_road] = road.get(e_road, 0.0) + e_km
+            nodes.append(parent)
+        return RoutePath(
+            nodes=tuple(self.names[i] for i in reversed(nodes)),
+            distance_km=round(km, 1),
+            hours=hours,
+            road_km=tuple(sorted((k, round(v, 1)) for k, v in road.items())),
+        )
+
+    def _astar(self, src: int, dst: int) -> RoutePath:
+        if src == dst:
+            return RoutePath((self.names[src],), 0.0, 0.0, ())
+        h = self._heuristic(dst)
+        best = {src: 0.0}
+        prev = [None] * len(self.names)
+        heap = [(h[src], 0.0, src)]
+        while heap:
+            _, g, node = heapq.heappop(heap)
+            if node == dst:
+                return self._build(prev, src, dst)
+            if g > best[node]:
+                continue
+            for edge in self.adj[node]:
+                nxt, _, e_hours, _ = edge
+                cost = g + e_hours
+                if cost < best.get(nxt, math.inf):
+                    best[nxt] = cost
+                    prev[nxt] = (node, edge)
+                    heapq.heappush(heap, (cost + h[nxt], cost, nxt))
+        raise RoutingError(f"No road path from {self.names[src]} to {self.names[dst]}")
+
+    def _dijkstra_all(self, src: int) -> tuple:
+        """
+        Free-flow-time shortest paths from ``src`` to every node:
+        (predecessor tree, hours, km along those paths).
+        """
+        best = [math.inf] * len(self.names)
+        km = [math.inf] * len(self.names)
+        prev = [None] * len(self.names)
+        best[src] = km[src] = 0.0
+        heap = [(0.0, src)]
+        while heap:
+            g, node = heapq.heappop(heap)
+            if g > best[node]:
+                continue
+            for edge in self.adj[node]:
+                nxt, e_km, e_hours, _ = edge
+                if g + e_hours < best[nxt]:
+                    best[nxt] = g + e_hours
+                    km[nxt] = km[node] + e_km
+                    prev[nxt] = (node, edge)
+                    heapq.heappush(heap, (best[nxt], nxt))
+        return prev, best, km
+
+    def precompute_hubs(self) -> int:
+        """Cache paths between every pair of hub cities. Returns pairs cached."""
+        for src in self.hubs:
+            prev, _, _ = self._dijkstra_all(src)
+            for dst in self.hubs:
+                if dst == src:
+                    self._hub_paths[(src, dst)] = RoutePath((self.names[src],), 0.0, 0.0, ())
+                elif prev[dst] is not None:
+                    self._hub_paths[(src, dst)] = self._build(prev, src, dst)
+        return len(self._hub_paths)
+
+    def path(self, src: int, dst: int) -> RoutePath:
+        cached = self._hub_paths.get((src, dst))
+        return cached if cached is not None else self._path(src, dst)
+
+    def node_matrices(self) -> tuple:
+        """All-pairs (km, hours) node matrices, built on first use (one Dijkstra per node)."""
+        if self._node_km is None:
+            rows = [self._dijkstra_all(src) for src in range(len(self.names))]
+            self._node_hours = np.array([hours for _, hours, _ in rows])
+            self._node_km = np.array([km for _, _, km in rows])
+        return self._node_km, self._node_hours
+
+    # ── Places ────────────────────────────────────────────────────────────────
+    def nearest(self, lat: float, lon: float) -> tuple:
+        """(node index, straight-line km) of the node closest to a coordinate."""
+        d = haversine_km(self.lat, self.lon, lat, lon)
+        i = int(np.argmin(d))
+        return i, float(d[i])
+
+    def resolve(self, place) -> tuple:
+        """
+        Name or (lat, lon) → (node index, access km, label). Access km is the
+        local-road distance from an off-graph coordinate to its nearest node.
+        """
+        if isinstance(place, str):
+            i = self._node(place)
+            return i, 0.0, self.names[i]
+        lat, lon = place
+        i, km = self.nearest(lat, lon)
+        return i, km * ACCESS_DETOUR, f"({lat:.4f}, {lon:.4f}) via {self.names[i]}"
+
+    def route(self, origin, destination) -> tuple:
+        """
+        Fastest free-flow route between two places (names or coordinates).
+        Returns (RoutePath, origin label, destination label).
+        """
+        src, src_km, src_label = self.resolve(origin)
+        dst, dst_km, dst_label = self.resolve(destination)
+        if src == dst and not isinstance(origin, str) and not isinstance(destination, str):
+            # Both ends snap to the same node: one local leg between them
+            km = float(haversine_km(origin[0], origin[1], destination[0], destination[1])) * ACCESS_DETOUR
+            path = RoutePath((src_label, dst_label), round(km, 1), km / DEFAULT_BASE_SPEED, (("mixed", round(km, 1)),))
+            return path, src_label, dst_label
+
+        path = self.path(src, dst)
+        access = src_km + dst_km
+        if access:
+            road = dict(path.road_km)
+            road["mixed"] = round(road.get("mixed", 0.0) + access, 1)
+            path = RoutePath(
+                nodes=path.nodes,
+                distance_km=round(path.distance_km + access, 1),
+                hours=path.hours + access / DEFAULT_BASE_SPEED,
+                road_km=tuple(sorted(road.items())),
+            )
+        return path, src_label, dst_label
+
+    def place_matrices(self, places: list) -> tuple:
+        """
+        (km, free-flow hours, labels) between arbitrary places (names or
+        (lat, lon)), built by snapping each place to its nearest node: access
+        leg + all-pairs node path + access leg. Places that snap to the same
+        node are joined by a direct local leg instead.
+        """
+        node_km, node_hours = self.node_matrices()
+        nodes = np.empty(len(places), dtype=np.int64)
+        access = np.zeros(len(places))
+        lat = np.empty(len(places))
+        lon = np.empty(len(places))
+        labels = []
+        for i, place in enumerate(places):
+            nodes[i], access[i], label = self.resolve(place)
+            labels.append(label)
+            lat[i], lon[i] = (self.lat[nodes[i]], self.lon[nodes[i]]) if isinstance(place, str) else place
+
+        km = access[:, None] + node_km[nodes[:, None], nodes[None, :]] + access[None, :]
+        hours = ((access[:, None] + access[None, :]) / DEFAULT_BASE_SPEED
+                 + node_hours[nodes[:, None], nodes[None, :]])
+        same = nodes[:, None] == nodes[None, :]
+        local = haversine_matrix(lat, lon) * ACCESS_DETOUR
+        km = np.where(same, local, km)
+        hours = np.where(same, local / DEFAULT_BASE_SPEED, hours)
+        np.fill_diagonal(km, 0.0)
+        np.fill_diagonal(hours, 0.0)
+        if not np.isfinite(hours).all():
+            raise RoutingError("Some places are not connected on the road graph")
+        return km, hours, labels
+
+    def summary(self) -> dict:
+        info = self._path.cache_info()
+        return {
+            "name": self.name,
+            "nodes": len(self.names),
+            "edges": self.n_edges,
+            "hubs": len(self.hubs),
+            "hub_pairs_cached": len(self._hub_paths),
+            "lru_hits": info.hits,
+            "lru_misses": info.misses,
+            "lru_size": info.currsize,
+        }
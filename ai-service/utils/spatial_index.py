@@ -0,0 +1,305 @@
+"""
+spatial_index.py — Live vehicle positions in a lat/lon grid index.
+──────────────────────────────────────────────────────────────────
+Keeps the latest position (plus vehicle type and engine status) per vehicle
+and answers k-nearest and radius queries without scanning the whole fleet.
+
+The globe is cut into fixed ``cell_deg`` × ``cell_deg`` cells (a geohash-style
+grid, cell key = row × columns + column). Each cell holds a set of vehicle
+rows, so an update is a few array writes — plus one set move when a vehicle
+crosses into another cell.
+
+  • radius  — visit only the cells overlapping the circle's bounding box
+  • nearest — visit rings of cells around the query cell, outward, until the
+              k-th best distance is closer than anything the next ring can
+              hold (an exact great-circle lower bound, so results are exact)
+
+Query cost depends on how many vehicles sit near the query point, not on the
+fleet size. Very sparse regions, where the rings would cover much of the
+grid, fall back to one vectorized scan over every vehicle.
+
+Per-vehicle attributes are column arrays that double when full (as in
+feature_store.py); type and status are small vocabularies of int16 codes,
+capped at MAX_CATEGORIES values each — an update that would go past the cap
+is rejected whole (ValueError) before anything is written.
+"""
+
+import itertools
+import math
+import threading
+import time
+
+import numpy as np
+
+from utils.routing import haversine_km
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180
+ATTRIBUTES = ["vehicle_type", "engine_status"]
+MAX_CATEGORIES = 1024      # per attribute; int16 codes
+
+
+class FleetSpatialIndex:
+    def __init__(self, cell_deg: float = 0.25, capacity: int = 1024, max_scan_cells: int = 4096):
+        self.cell_deg = cell_deg
+        self.n_rows = math.ceil(180 / cell_deg)
+        self.n_cols = math.ceil(360 / cell_deg)
+        self.max_scan_cells = max_scan_cells
+
+        self._index: dict = {}
+        self._ids: list = []
+        self._cells: dict = {}                              # cell key → {row, …}
+        self._vocab = {a: {} for a in ATTRIBUTES}           # value → code
+        self._labels = {a: [] for a in ATTRIBUTES}          # code → value
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.fallback_scans = 0
+        self._alloc(capacity)
+
+    # ── Storage ───────────────────────────────────────────────────────────────
+    def _alloc(self, capacity: int):
+        self._lat = np.zeros(capacity)
+        self._lon = np.zeros(capacity)
+        self._cell = np.full(capacity, -1, dtype=np.int64)
+        self._codes = {a: np.full(capacity, -1, dtype=np.int16) for a in ATTRIBUTES}
+        self._updated_at = np.zeros(capacity)
+
+    def _grow(self, needed: int):
+        old_lat, old_lon, old_cell = self._lat, self._lon, self._cell
+        old_codes, old_updated = self._codes, self._updated_at
+        capacity = n = len(old_lat)
+        while capacity < needed:
+            capacity *= 2
+        self._alloc(capacity)
+        self._lat[:n], self._lon[:n], self._cell[:n] = old_lat[:n], old_lon[:n], old_cell[:n]
+        self._updated_at[:n] = old_updated[:n]
+        for a in ATTRIBUTES:
+            self._codes[a][:n] = old_codes[a][:n]
+
+    def _rows_for(self, vehicle_ids: list) -> np.ndarray:
+        rows = np.empty(len(vehicle_ids), dtype=np.int64)
+        for i, vid in enumerate(vehicle_ids):
+            row = self._index.get(vid)
+            if row is None:
+                row = self._index[vid] = len(self._ids)
+                self._ids.append(vid)
+            rows[i] = row
+        if len(self._ids) > len(self._lat):
+            self._grow(len(self._ids))
+        return rows
+
+    def _check_vocab(self, attr: str, values: list):
+        vocab = self._vocab[attr]
+        new = {v for v in values if v not in vocab}
+        if len(vocab) + len(new) > MAX_CATEGORIES:
+            raise ValueError(f"{attr} would exceed {MAX_CATEGORIES} distinct values")
+
+    def _encode(self, attr: str, values: list) -> np.ndarray:
+        vocab, labels = self._vocab[attr], self._labels[attr]
+        codes = np.empty(len(values), dtype=np.int16)
+        for i, v in enumerate(values):
+            code = vocab.get(v)
+            if code is None:
+                code = vocab[v] = len(labels)
+                labels.append(v)
+            codes[i] = code
+        return codes
+
+    def _cell_rc(self, lat, lon) -> tuple:
+        r = np.clip(np.floor((np.asarray(lat) + 90) / self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+        c = np.floor((np.asarray(lon) + 180) / self.cell_deg).astype(np.int64) % self.n_cols
+        return r, c
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+    def update(self, vehicle_ids: list, lat, lon, vehicle_type: list = None,
+               engine_status: list = None, ts: float = None) -> int:
+        """Upsert the latest positions (aligned lists). Returns vehicles that changed cell."""
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        r, c = self._cell_rc(lat, lon)
+        keys = r * self.n_cols + c
+        with self._lock:
+            for attr, values in (("vehicle_type", vehicle_type), ("engine_status", engine_status)):
+                if values is not None:
+                    self._check_vocab(attr, values)
+            rows = self._rows_for(vehicle_ids)
+            if len(np.unique(rows)) < len(rows):
+                # A vehicle listed twice: keep its last entry, so it sits in exactly one cell
+                _, first_reversed = np.unique(rows[::-1], return_index=True)
+                keep = np.sort(len(rows) - 1 - first_reversed)
+                rows, lat, lon, keys = rows[keep], lat[keep], lon[keep], keys[keep]
+                vehicle_type = None if vehicle_type is None else [vehicle_type[i] for i in keep]
+                engine_status = None if engine_status is None else [engine_status[i] for i in keep]
+            self._lat[rows] = lat
+            self._lon[rows] = lon
+            self._updated_at[rows] = time.time() if ts is None else ts
+            for attr, values in (("vehicle_type", vehicle_type), ("engine_status", engine_status)):
+                if values is not None:
+                    self._codes[attr][rows] = self._encode(attr, values)
+
+            old = self._cell[rows]
+            moved = np.nonzero(old != keys)[0]
+            for i in moved.tolist():
+                row, key = int(rows[i]), int(keys[i])
+                if old[i] >= 0:
+                    bucket = self._cells[int(old[i])]
+                    bucket.discard(row)
+                    if not bucket:
+                        del self._cells[int(old[i])]
+                self._cells.setdefault(key, set()).add(row)
+            self._cell[rows] = keys
+        return len(moved)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+    def _gather(self, cell_keys) -> np.ndarray:
+        buckets = [self._cells[k] for k in cell_keys if k in self._cells]
+        return np.fromiter(itertools.chain.from_iterable(buckets), dtype=np.int64)
+
+    def _filter(self, rows: np.ndarray, vehicle_type, engine_status, max_age_s) -> np.ndarray:
+        keep = np.ones(len(rows), dtype=bool)
+        for attr, wanted in (("vehicle_type", vehicle_type), ("engine_status", engine_status)):
+            if wanted:
+                codes = [self._vocab[attr][v] for v in wanted if v in self._vocab[attr]]
+                keep &= np.isin(self._codes[attr][rows], codes)
+        if max_age_s is not None:
+            keep &= self._updated_at[rows] >= time.time() - max_age_s
+        return rows[keep]
+
+    def _ring_keys(self, r0: int, c0: int, ring: int) -> list:
+        """Cell keys on the square ring at Chebyshev distance ``ring`` (rows clipped, columns wrap)."""
+        if ring == 0:
+            return [r0 * self.n_cols + c0]
+        keys = []
+        cols = range(c0 - ring, c0 + ring + 1)
+        for r in (r0 - ring, r0 + ring):
+            if 0 <= r < self.n_rows:
+                keys.extend(r * self.n_cols + c % self.n_cols for c in cols)
+        for r in range(max(r0 - ring + 1, 0), min(r0 + ring, self.n_rows)):
+            keys.append(r * self.n_cols + (c0 - ring) % self.n_cols)
+            keys.append(r * self.n_cols + (c0 + ring) % self.n_cols)
+        return keys
+
+    def _outside_bound(self, lat: float, lon: float, r0: int, c0: int, ring: int) -> float:
+        """Lower bound (km) on the distance to any point outside rings 0..ring."""
+        lo_lat = (r0 - ring) * self.cell_deg - 90
+        hi_lat = (r0 + ring + 1) * self.cell_deg - 90
+        lat_km = min(lat - lo_lat if lo_lat > -90 else math.inf,
+                     hi_lat - lat if hi_lat < 90 else math.inf) * KM_PER_DEG
+        if 2 * ring + 1 >= self.n_cols:
+            return lat_km
+        lo_lon = (c0 - ring) * self.cell_deg - 180
+        hi_lon = (c0 + ring + 1) * self.cell_deg - 180
+        dlon = math.radians(min(lon - lo_lon, hi_lon - lon))
+        # Closest approach to a meridian dlon away: sin(d / R) = cos(lat) · sin(dlon)
+        lon_km = EARTH_RADIUS_KM * math.asin(min(1.0, math.cos(math.radians(lat)) * math.sin(min(dlon, math.pi / 2))))
+        return min(lat_km, lon_km)
+
+    def _result(self, rows: np.ndarray, dist: np.ndarray) -> list:
+        now = time.time()
+        types = self._labels["vehicle_type"] + [None]       # code -1 → None
+        statuses = self._labels["engine_status"] + [None]
+        return [
+            {
+                "vehicle_id": self._ids[row],
+                "lat": la,
+                "lon": lo,
+                "distance_km": d,
+                "vehicle_type": types[t],
+                "engine_status": statuses[st],
+                "age_s": age,
+            }
+            for row, la, lo, d, t, st, age in zip(
+                rows.tolist(), self._lat[rows].tolist(), self._lon[rows].tolist(), np.round(dist, 3).tolist(),
+                self._codes["vehicle_type"][rows].tolist(), self._codes["engine_status"][rows].tolist(),
+                np.round(now - self._updated_at[rows], 1).tolist(),
+            )
+        ]
+
+    def _scan(self, lat, lon, vehicle_type, engine_status, max_age_s) -> tuple:
+        self.fallback_scans += 1
+        rows = self._filter(np.arange(len(self._ids)), vehicle_type, engine_status, max_age_s)
+        return rows, haversine_km(self._lat[rows], self._lon[rows], lat, lon)
+
+    def nearest(self, lat: float, lon: float, k: int = 10, vehicle_type: list = None,
+                engine_status: list = None, max_km: float = None, max_age_s: float = None) -> list:
+        """The ``k`` closest matching vehicles, nearest first."""
+        with self._lock:
+            self.queries += 1
+            r0, c0 = (int(x) for x in self._cell_rc(lat, lon))
+            rows_parts, dist_parts, found = [], [], 0
+            visited, ring = set(), 0
+            while True:
+                keys = [k for k in self._ring_keys(r0, c0, ring) if k not in visited]    # columns wrap
+                visited.update(keys)
+                rows = self._filter(self._gather(keys), vehicle_type, engine_status, max_age_s)
+                if len(rows):
+                    rows_parts.append(rows)
+                    dist_parts.append(haversine_km(self._lat[rows], self._lon[rows], lat, lon))
+                    found += len(rows)
+                bound = self._outside_bound(lat, lon, r0, c0, ring)
+                if found >= k and np.partition(np.concatenate(dist_parts), k - 1)[k - 1] <= bound:
+                    break
+                if max_km is not None and bound >= max_km:
+                    break
+                if bound == math.inf or (ring >= self.n_rows and 2 * ring + 1 >= self.n_cols):
+                    break
+                if len(visited) > self.max_scan_cells:
+                    rows, dist = self._scan(lat, lon, vehicle_type, engine_status, max_age_s)
+                    rows_parts, dist_parts = [rows], [dist]
+                    break
+                ring += 1
+
+            if not rows_parts:
+                return []
+            rows, dist = np.concatenate(rows_parts), np.concatenate(dist_parts)
+            if max_km is not None:
+                rows, dist = rows[dist <= max_km], dist[dist <= max_km]
+            top = np.argsort(dist, kind="stable")[:k]
+            return self._result(rows[top], dist[top])
+
+    def within(self, lat: float, lon: float, radius_km: float, vehicle_type: list = None,
+               engine_status: list = None, max_age_s: float = None, limit: int = None) -> list:
+        """Matching vehicles within ``radius_km``, nearest first."""
+        with self._lock:
+            self.queries += 1
+            r0, c0 = (int(x) for x in self._cell_rc(lat, lon))
+            span_r = math.ceil(radius_km / KM_PER_DEG / self.cell_deg) + 1
+            angle = radius_km / EARTH_RADIUS_KM
+            cos_lat = math.cos(math.radians(lat))
+            if angle < math.pi / 2 and math.sin(angle) < cos_lat:
+                span_c = math.ceil(math.degrees(math.asin(math.sin(angle) / cos_lat)) / self.cell_deg) + 1
+            else:
+                span_c = self.n_cols
+            span_c = min(span_c, (self.n_cols - 1) // 2)
+            n_cells = (2 * span_r + 1) * (2 * span_c + 1)
+
+            if n_cells > self.max_scan_cells or n_cells > len(self._cells):
+                rows, dist = self._scan(lat, lon, vehicle_type, engine_status, max_age_s)
+            else:
+                keys = [r * self.n_cols + c % self.n_cols
+                        for r in range(max(r0 - span_r, 0), min(r0 + span_r, self.n_rows - 1) + 1)
+                        for c in range(c0 - span_c, c0 + span_c + 1)]
+                rows = self._filter(self._gather(keys), vehicle_type, engine_status, max_age_s)
+                dist = haversine_km(self._lat[rows], self._lon[rows], lat, lon)
+            inside = dist <= radius_km
+            rows, dist = rows[inside], dist[inside]
+            order = np.argsort(dist, kind="stable")[:limit]
+            return self._result(rows[order], dist[order])
+
+    def stats(self) -> dict:
+        with self._lock:
+            sizes = [len(b) for b in self._cells.values()]
+            return {
+                "vehicles": len(self._ids),
+                "cell_deg": self.cell_deg,
+                "occupied_cells": len(sizes),
+                "max_per_cell": max(sizes, default=0),
+                "mean_per_cell": round(float(np.mean(sizes)), 2) if sizes else 0.0,
+                "queries": self.queries,
+                "fallback_scans": self.fallback_scans,
+                "vehicle_types": [str(v) for v in self._labels["vehicle_type"]],
+                "engine_statuses": [str(v) for v in self._labels["engine_status"]],
+            }
@@ -0,0 +1,220 @@
+"""
+stream_anomaly.py — Streaming windowed anomaly detection across the fleet.
+──────────────────────────────────────────────────────────────────────────
+Keeps a fixed-size ring buffer per vehicle for engine temperature, vibration,
+fuel level and tire pressure (plus the derived fuel-level delta) and scores
+every new reading against:
+
+  • a rolling window mean / std  (running sums, O(1) per reading)
+  • an EWMA mean / variance      (exponentially weighted, O(1) per reading)
+
+A reading raises an event only when both z-scores cross the threshold, which
+keeps the false-positive rate of a 100k-vehicle fleet manageable.
+
+All state lives in preallocated numpy arrays sized at construction time
+(capacity × window × channels), so memory is bounded no matter how long the
+stream runs. A tick for the whole fleet is a handful of vectorized array ops;
+the only per-vehicle Python work is the Vehicle_ID → slot lookup.
+
+Default sizing (100k vehicles, 32-sample window) uses ~80 MB in total.
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Raw channels accepted per reading, in order
+CHANNELS = ["engine_temp_c", "vibration", "fuel_level_l", "tire_pressure_psi"]
+
+# Scored channels: the raw ones plus the per-reading fuel level delta
+SCORED = CHANNELS + ["fuel_delta_l"]
+
+# Which deviations count as anomalous: +1 spikes only, -1 drops only, 0 both.
+# Fuel level itself is not scored (refuelling would look like a spike); its
+# delta is, downward only, which catches sudden fuel-level drops (leak / theft).
+DIRECTION = {
+    "engine_temp_c":     +1,
+    "vibration":         +1,
+    "fuel_level_l":      None,
+    "tire_pressure_psi": 0,
+    "fuel_delta_l":      -1,
+}
+
+# Std floor per channel — sensors are rounded, so a flat window would
+# otherwise turn a single 0.1 PSI step into an enormous z-score.
+MIN_STD = {
+    "engine_temp_c":     0.5,
+    "vibration":         0.05,
+    "fuel_level_l":      0.5,
+    "tire_pressure_psi": 0.1,
+    "fuel_delta_l":      0.5,
+}
+
+_SCORE_MASK = np.array([DIRECTION[c] is not None for c in SCORED])
+_SIGN = np.array([DIRECTION[c] or 0 for c in SCORED], dtype=np.int8)
+_MIN_STD = np.array([MIN_STD[c] for c in SCORED])
+
+_FUEL = CHANNELS.index("fuel_level_l")
+
+
+class FleetAnomalyDetector:
+    def __init__(
+        self,
+        capacity: int = 100_000,
+        window: int = 32,
+        ewma_alpha: float = 0.1,
+        z_threshold: float = 4.0,
+        min_fuel_drop_l: float = 2.0,
+        warmup: int = 8,
+        max_events: int = 10_000,
+    ):
+        self.capacity = capacity
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self.z_threshold = z_threshold
+        self.min_fuel_drop_l = min_fuel_drop_l
+        self.warmup = warmup
+
+        c = len(SCORED)
+        self._buf = np.zeros((capacity, window, c), dtype=np.float32)
+        self._sum = np.zeros((capacity, c))
+        self._sumsq = np.zeros((capacity, c))
+        self._ewm = np.zeros((capacity, c))
+        self._ewv = np.zeros((capacity, c))
+        self._last_fuel = np.full(capacity, np.nan)
+        self._count = np.zeros(capacity, dtype=np.int64)     # readings seen
+        self._pos = np.zeros(capacity, dtype=np.int32)       # next ring slot
+
+        self._slots: dict = {}
+        self._ids: list = []
+        self._lock = threading.Lock()
+
+        self.events = deque(maxlen=max_events)
+        self.stats = {"readings": 0, "ticks": 0, "events": 0, "rejected_vehicles": 0}
+
+    # ── Slots ─────────────────────────────────────────────────────────────────
+    def _slots_for(self, vehicle_ids) -> np.ndarray:
+        """Map ids to slots, registering new vehicles; -1 once capacity is reached."""
+        slots = np.empty(len(vehicle_ids), dtype=np.int64)
+        get = self._slots.get
+        for i, vid in enumerate(vehicle_ids):
+            slot = get(vid)
+            if slot is None:
+                if len(self._ids) >= self.capacity:
+                    slot = -1
+                else:
+                    slot = self._slots[vid] = len(self._ids)
+                    self._ids.append(vid)
+            slots[i] = slot
+        return slots
+
+    # ── Ingest ────────────────────────────────────────────────────────────────
+    def ingest(self, vehicle_ids: list, values: np.ndarray, ts: float = None) -> list:
+        """
+        Score one tick of readings. ``values`` is (n, len(CHANNELS)) in CHANNELS
+        order; each vehicle should appear at most once per call. Returns the list
+        of anomaly events raised by this tick (also appended to ``self.events``).
+        """
+        ts = time.time() if ts is None else ts
+        values = np.asarray(values, dtype=np.float64)
+
+        with self._lock:
+            slots = self._slots_for(vehicle_ids)
+            ok = slots >= 0
+            self.stats["rejected_vehicles"] += int((~ok).sum())
+            slots, values = slots[ok], values[ok]
+            ids = np.asarray(vehicle_ids, dtype=object)[ok]
+            if len(slots) == 0:
+                return []
+
+            # Derived channel: fuel level change since the previous reading
+            prev_fuel = self._last_fuel[slots]
+            fuel_delta = np.where(np.isnan(prev_fuel), 0.0, values[:, _FUEL] - prev_fuel)
+            self._last_fuel[slots] = values[:, _FUEL]
+            # Round to the ring buffer's float32 so evicted values cancel exactly
+            x = np.column_stack([values, fuel_delta]).astype(np.float32).astype(np.float64)
+
+            count = self._count[slots]
+            n = np.minimum(count, self.window)[:, None].astype(np.float64)
+
+            # Rolling z-score against the window *before* this reading
+            s, sq = self._sum[slots], self._sumsq[slots]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = s / n
+                std = np.sqrt(np.maximum(sq / n - mean * mean, 0.0))
+            z = np.nan_to_num((x - mean) / np.maximum(std, _MIN_STD))
+            ewm_old, ewv_old = self._ewm[slots], self._ewv[slots]
+            z_ewm = (x - ewm_old) / np.maximum(np.sqrt(ewv_old), _MIN_STD)
+
+            # Anomaly test (vectorized over vehicles × channels)
+            signed = np.where(_SIGN == 0, np.abs(z), z * _SIGN)
+            signed_ewm = np.where(_SIGN == 0, np.abs(z_ewm), z_ewm * _SIGN)
+            hit = (
+                (signed >= self.z_threshold)
+                & (signed_ewm >= self.z_threshold)
+                & _SCORE_MASK
+                & (count >= self.warmup)[:, None]
+            )
+            fuel_col = len(CHANNELS)
+            hit[:, fuel_col] &= fuel_delta <= -self.min_fuel_drop_l
+
+            # Update the ring buffer and running sums
+            pos = self._pos[slots]
+            full = count >= self.window
+            evicted = self._buf[slots, pos].astype(np.float64)
+            evicted[~full] = 0.0
+            self._sum[slots] = s + x - evicted
+            self._sumsq[slots] = sq + x * x - evicted * evicted
+            self._buf[slots, pos] = x
+            self._pos[slots] = (pos + 1) % self.window
+            self._count[slots] = count + 1
+
+            # EWMA mean / variance (first reading seeds the mean)
+            first = (count == 0)[:, None]
+            diff = x - ewm_old
+            a = self.ewma_alpha
+            self._ewm[slots] = np.where(first, x, ewm_old + a * diff)
+            self._ewv[slots] = np.where(first, 0.0, (1 - a) * (ewv_old + a * diff * diff))
+
+            self.stats["readings"] += len(slots)
+            self.stats["ticks"] += 1
+
+            rows, cols = np.nonzero(hit)
+            new_events = [
+                {
+                    "ts": ts,
+                    "vehicle_id": ids[r],
+                    "channel": SCORED[c],
+                    "kind": "drop" if z[r, c] < 0 else "spike",
+                    "value": round(float(x[r, c]), 3),
+                    "zscore": round(float(z[r, c]), 2),
+                    "ewma_zscore": round(float(z_ewm[r, c]), 2),
+                    "window_mean": round(float(mean[r, c]), 3),
+                }
+                for r, c in zip(rows, cols)
+            ]
+            self.events.extend(new_events)
+            self.stats["events"] += len(new_events)
+            return new_events
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+    def recent(self, limit: int = 100, vehicle_id: str = None) -> list:
+        with self._lock:
+            events = list(self.events)
+        if vehicle_id is not None:
+            events = [e for e in events if e["vehicle_id"] == vehicle_id]
+        return events[-limit:]
+
+    def summary(self) -> dict:
+        return {
+            **self.stats,
+            "vehicles": len(self._ids),
+            "capacity": self.capacity,
+            "window": self.window,
+            "buffer_mb": round(
+                (self._buf.nbytes + self._sum.nbytes + self._sumsq.nbytes
+                 + self._ewm.nbytes + self._ewv.nbytes) / 1e6, 1
+            ),
+        }
@@ -0,0 +1,111 @@
+"""
+tiers.py — Fast inference tiers from truncated tree ensembles.
+───────────────────────────────────────────────────────────────
+Forest and boosting predictions cost roughly one tree walk per estimator, so
+the first k trees (RandomForest) or boosting stages (GradientBoosting) make a
+cheaper model of the same family. At training time the held-out metric is
+measured for a ladder of k values, and the smallest k whose loss against the
+full model stays within a relative budget becomes the "fast" tier. The curve
+and the chosen k are stored in the bundle metadata; at load time the service
+builds the truncated copy next to the full model.
+
+The budget is relative to the full model's score by default. Boosted models
+can drive their held-out error close to zero, so a percentage of it is never
+met by any truncation; they pass ``scale`` (the spread of the target) and the
+budget is read against that instead. When no k below the full count fits,
+there is no fast tier and "fast" requests are served by the full model.
+
+Truncated copies share the fitted trees with the full model — no extra memory
+beyond the list of references.
+"""
+
+import copy
+import os
+import time
+
+DEFAULT_BUDGET = float(os.getenv("FAST_TIER_BUDGET", "0.01"))   # max relative metric loss
+LATENCY_ROWS = 256           # batch size for the latency column of the curve
+
+
+def n_trees(model) -> int:
+    return len(model.estimators_)
+
+
+def truncate(model, k: int):
+    """Shallow copy of a fitted forest / boosting model using only its first k estimators."""
+    fast = copy.copy(model)
+    fast.estimators_ = model.estimators_[:k]
+    if hasattr(model, "n_estimators"):
+        fast.n_estimators = k
+    if hasattr(model, "train_score_"):
+        fast.train_score_ = model.train_score_[:k]
+    return fast
+
+
+def _ladder(total: int) -> list:
+    ks = sorted({max(1, int(round(total * f))) for f in (0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.6, 0.75)})
+    return [k for k in ks if k < total] + [total]
+
+
+def accuracy_curve(model, X_test, y_test, metric) -> list:
+    """[{k, score, latency_ms}] over a ladder of k, on held-out data."""
+    X_lat = X_test[:LATENCY_ROWS]
+    curve = []
+    for k in _ladder(n_trees(model)):
+        fast = truncate(model, k)
+        score = float(metric(y_test, fast.predict(X_test)))
+        started = time.perf_counter()
+        for _ in range(3):
+            fast.predict(X_lat)
+        latency = (time.perf_counter() - started) / 3 * 1000
+        curve.append({"k": k, "score": round(score, 5), "latency_ms": round(latency, 2)})
+    return curve
+
+
+def pick_k(curve: list, higher_is_better: bool, budget: float = DEFAULT_BUDGET, scale: float = None) -> int:
+    """Smallest k whose loss against the full model is within ``budget`` × ``scale`` (default: |full score|)."""
+    full = curve[-1]["score"]
+    allowed = budget * (abs(full) if scale is None else scale)
+    for point in curve:
+        loss = (full - point["score"]) if higher_is_better else (point["score"] - full)
+        if loss <= allowed:
+            return point["k"]
+    return curve[-1]["k"]
+
+
+def fast_tier(model, X_test, y_test, metric, higher_is_better: bool, metric_name: str,
+              budget: float = DEFAULT_BUDGET, scale: float = None) -> dict:
+    """Measure the curve, pick k, print the table and return the bundle metadata entry."""
+    curve = accuracy_curve(model, X_test, y_test, metric)
+    k = pick_k(curve, higher_is_better, budget, scale)
+    full = curve[-1]
+    against = "relative loss" if scale is None else f"of target spread {scale:.4g}"
+    print(f"\n⚡ Fast tier — {metric_name} vs trees (budget {budget:.1%} {against})")
+    print(f"   {'k':>5}  {metric_name:>10}  {'ms/' + str(LATENCY_ROWS) + ' rows':>14}")
+    for point in curve:
+        mark = "  ← fast" if point["k"] == k else ""
+        print(f"   {point['k']:>5}  {point['score']:>10.4f}  {point['latency_ms']:>14.2f}{mark}")
+    if k < full["k"]:
+        speedup = full["latency_ms"] / max(next(p for p in curve if p["k"] == k)["latency_ms"], 1e-9)
+        print(f"   → k = {k} of {full['k']} (~{speedup:.1f}× faster)")
+    else:
+        print(f"   → no k below {full['k']} fits the budget: no fast tier")
+    return {
+        "k": int(k),
+        "n_estimators": int(full["k"]),
+        "metric": metric_name,
+        "budget": budget,
+        "scale": scale,
+        "curve": curve,
+    }
+
+
+def fast_models(pieces: dict, metadata: dict) -> dict:
+    """{piece: truncated model} for every piece whose stored fast tier has fewer trees than the model."""
+    tiers = (metadata or {}).get("fast_tier") or {}
+    return {
+        piece: truncate(pieces[piece], spec["k"])
+        for piece, spec in tiers.items()
+        if piece in pieces and 0 < spec.get("k", 0) < n_trees(pieces[piece])
+    }
+
@@ -0,0 +1,271 @@
+"""
+fleet_engine.py — Structure-of-arrays vectorized fleet engine
+══════════════════════════════════════════════════════════════
+Holds the state of every simulated vehicle in NumPy arrays (one array per
+attribute) and advances the whole fleet per tick with vectorized RNG draws
+and haversine math, so a single process can simulate 100k+ vehicles.
+
+Per-vehicle semantics are the same as VehicleState.tick() in
+vehicleSimulator.py — same probabilities, drift ranges, clamps, rounding,
+trip completion and status rules — only evaluated for all vehicles at once.
+Strings (cities, weather, road, make, …) are stored as small integer codes
+into the simulator's constant tables.
+
+Requires numpy (the threaded simulator itself stays stdlib-only).
+
+    engine = FleetEngine(100_000, seed=42)
+    cols = engine.tick()              # dict of column arrays for this tick
+    tel  = engine.telemetry(cols, 0)  # one row as a VehicleTelemetry
+"""
+
+import datetime
+
+import numpy as np
+
+from vehicleSimulator import (
+    CITY_NODES,
+    CITY_NAMES,
+    VEHICLE_PROFILES,
+    WEATHER_OPTIONS,
+    ROAD_OPTIONS,
+    FUEL_TYPES,
+    TICK_INTERVAL,
+    VehicleTelemetry,
+)
+
+EARTH_RADIUS_KM = 6371.0
+
+BRAKE_OPTIONS = ["Good", "Good", "Fair", "Poor"]     # same weights as VehicleState
+BRAKE_NAMES = ["Good", "Fair", "Poor"]
+ENGINE_STATUS = np.array(["OK", "WARNING", "CRITICAL"])
+DELIVERY = ["", "on_time", "late"]
+
+# Per-road speed cap, aligned with ROAD_OPTIONS (Highway / Urban / Rural)
+_ROAD_CAP = np.array([{"Highway": 1.0, "Urban": 0.4, "Rural": 0.7}[r] for r in ROAD_OPTIONS])
+# 10 % consumption penalty in rain / fog, aligned with WEATHER_OPTIONS
+_WEATHER_PEN = np.array([1.1 if w in ("Rain", "Fog") else 1.0 for w in WEATHER_OPTIONS])
+
+_FUEL_NAMES = sorted(set(FUEL_TYPES))
+_FUEL_CODES = np.array([_FUEL_NAMES.index(f) for f in FUEL_TYPES])
+_FUEL_EF = np.array([2.68 if f == "diesel" else 2.31 for f in _FUEL_NAMES])
+
+_CITY_LATLON = np.array([CITY_NODES[c] for c in CITY_NAMES])
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in km (arrays or scalars)."""
+    φ1, φ2 = np.radians(lat1), np.radians(lat2)
+    dφ = φ2 - φ1
+    dλ = np.radians(lon2) - np.radians(lon1)
+    a = np.sin(dφ / 2) ** 2 + np.cos(φ1) * np.cos(φ2) * np.sin(dλ / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+# City × city route lengths, computed once
+CITY_DIST = haversine(
+    _CITY_LATLON[:, None, 0], _CITY_LATLON[:, None, 1],
+    _CITY_LATLON[None, :, 0], _CITY_LATLON[None, :, 1],
+)
+
+
+class FleetEngine:
+    def __init__(self, n_vehicles: int, seed: int = None, tick_interval: float = TICK_INTERVAL,
+                 id_offset: int = 0):
+        n = n_vehicles
+        rng = self.rng = np.random.default_rng(seed)
+        self.n = n
+        self.tick_interval = tick_interval
+
+        idx = np.arange(n) + id_offset
+        self.vehicle_ids = np.char.add("V-", (1000 + idx).astype(str))
+        self.driver_ids = np.char.add("D-", (200 + idx).astype(str))
+
+        # Static profile attributes
+        self.profile = rng.integers(0, len(VEHICLE_PROFILES), n)
+        self.max_speed = np.array([p["max_speed"] for p in VEHICLE_PROFILES], float)[self.profile]
+        self.fuel_tank = np.array([p["fuel_tank"] for p in VEHICLE_PROFILES], float)[self.profile]
+        self.base_cons = np.array([p["base_consumption"] for p in VEHICLE_PROFILES])[self.profile]
+        self.fuel_type = _FUEL_CODES[rng.integers(0, len(FUEL_TYPES), n)]
+
+        # Route
+        self.origin = rng.integers(0, len(CITY_NAMES), n)
+        self.destination = self._other_city(self.origin)
+        self.total_dist = CITY_DIST[self.origin, self.destination]
+        self.progress = rng.uniform(0.0, 0.8, n)
+
+        # Sensors
+        self.fuel_level = rng.uniform(0.4, 1.0, n) * self.fuel_tank
+        self.engine_temp = rng.uniform(75.0, 90.0, n)
+        self.tire_psi = rng.uniform(30.0, 36.0, n)
+        self.battery_pct = rng.uniform(70.0, 100.0, n)
+        self.oil_quality = rng.uniform(50.0, 95.0, n)
+        self.vibration = rng.uniform(0.5, 2.0, n)
+        self.brake_cond = np.array([BRAKE_NAMES.index(b) for b in BRAKE_OPTIONS])[
+            rng.integers(0, len(BRAKE_OPTIONS), n)
+        ]
+
+        self.idle_min = np.zeros(n)
+        self.failure_history = rng.integers(0, 4, n)
+        self.weather = rng.integers(0, len(WEATHER_OPTIONS), n)
+        self.road_type = rng.integers(0, len(ROAD_OPTIONS), n)
+
+        self.actual_load = rng.uniform(3.0, 8.0, n)
+        self.tick_count = 0
+
+    def _other_city(self, city: np.ndarray) -> np.ndarray:
+        """Uniformly random city different from ``city`` (elementwise)."""
+        step = self.rng.integers(1, len(CITY_NAMES), len(city))
+        return (city + step) % len(CITY_NAMES)
+
+    def tick(self, now: datetime.datetime = None) -> dict:
+        """Advance every vehicle by one tick; returns this tick's columns."""
+        rng, n = self.rng, self.n
+        self.tick_count += 1
+        dt_hours = self.tick_interval / 3600.0
+
+        # ── Random events ────────────────────────────────────────────────────
+        change = rng.random(n) < 0.03
+        self.weather[change] = rng.integers(0, len(WEATHER_OPTIONS), int(change.sum()))
+        change = rng.random(n) < 0.02
+        self.road_type[change] = rng.integers(0, len(ROAD_OPTIONS), int(change.sum()))
+
+        # Speed (respects road type); 8 % chance idle
+        cap = _ROAD_CAP[self.road_type]
+        idle = rng.random(n) < 0.08
+        base = self.max_speed * cap * rng.uniform(0.6, 1.0, n)
+        speed = np.where(idle, 0.0, np.round(np.minimum(base, self.max_speed), 1))
+        self.idle_min = np.where(idle, self.idle_min + self.tick_interval / 60.0, 0.0)
+
+        is_speeding = speed > self.max_speed * cap * 1.05
+
+        harsh_brake = rng.random(n) < 0.04
+        harsh_accel = rng.random(n) < 0.05
+
+        # Engine temperature drift
+        moving = speed > 0
+        self.engine_temp += np.where(moving, rng.uniform(-1.0, 2.5, n), -rng.uniform(0.5, 1.5, n))
+        self.engine_temp = np.round(np.clip(self.engine_temp, 60.0, 130.0), 1)
+
+        # Fuel consumption
+        load_factor = rng.uniform(0.7, 1.3, n)
+        self.actual_load = rng.uniform(3.0, 8.0, n)
+        l100 = np.round(self.base_cons * load_factor * _WEATHER_PEN[self.weather], 2)
+        dist_this_tick = speed * dt_hours
+        self.fuel_level = np.round(np.maximum(0.0, self.fuel_level - l100 / 100.0 * dist_this_tick), 2)
+
+        self.tire_psi = np.round(np.clip(self.tire_psi + rng.uniform(-0.05, 0.02, n), 20.0, 40.0), 1)
+        self.battery_pct = np.round(np.clip(self.battery_pct + rng.uniform(-0.3, 0.1, n), 20.0, 100.0), 1)
+        self.oil_quality = np.round(np.maximum(0.0, self.oil_quality - rng.uniform(0.0, 0.05, n)), 1)
+
+        harsh = harsh_brake | harsh_accel
+        self.vibration += np.where(harsh, rng.uniform(0.5, 1.5, n), -rng.uniform(0.0, 0.1, n))
+        self.vibration = np.round(np.clip(self.vibration, 0.0, 10.0), 2)
+
+        # Progress along route; completed trips pick a new destination
+        advance = moving & (self.total_dist > 0)
+        self.progress[advance] += dist_this_tick[advance] / self.total_dist[advance]
+        done = self.progress >= 1.0
+        delivery = np.zeros(n, np.int8)                    # codes into DELIVERY
+        if done.any():
+            k = int(done.sum())
+            self.origin[done] = self.destination[done]
+            self.destination[done] = self._other_city(self.origin[done])
+            self.total_dist[done] = CITY_DIST[self.origin[done], self.destination[done]]
+            self.progress[done] = 0.0
+            delivery[done] = np.where(rng.random(k) < 0.1, 2, 1)
+
+        # Interpolated GPS with jitter
+        o, d = _CITY_LATLON[self.origin], _CITY_LATLON[self.destination]
+        pos = o + (d - o) * self.progress[:, None] + rng.uniform(-0.005, 0.005, (n, 2))
+        pos = np.round(pos, 6)
+        dist_remaining = np.round(self.total_dist * (1.0 - self.progress), 1)
+
+        co2_per_km = np.where(moving, np.round(l100 / 100.0 * _FUEL_EF[self.fuel_type], 4), 0.0)
+
+        critical = (self.engine_temp >= 120) | (self.tire_psi < 25) | (self.oil_quality < 20)
+        warning = (self.engine_temp >= 105) | (self.tire_psi < 28) | (self.battery_pct < 30)
+        status = np.where(critical, 2, np.where(warning, 1, 0))
+
+        anomaly = (
+            (self.fuel_level < 0.1 * self.fuel_tank)
+            | (self.engine_temp >= 115)
+            | (self.vibration >= 7.0)
+        )
+
+        return {
+            "timestamp": (now or datetime.datetime.now()).isoformat(),
+            "lat": pos[:, 0],
+            "lon": pos[:, 1],
+            "distance_remaining_km": dist_remaining,
+            "speed_kmh": speed,
+            "engine_temp_c": self.engine_temp.copy(),
+            "fuel_level_l": self.fuel_level.copy(),
+            "fuel_consumption_l100km": l100,
+            "battery_pct": self.battery_pct.copy(),
+            "tire_pressure_psi": self.tire_psi.copy(),
+            "vibration": self.vibration.copy(),
+            "oil_quality": self.oil_quality.copy(),
+            "is_speeding": is_speeding,
+            "harsh_brake": harsh_brake,
+            "harsh_accel": harsh_accel,
+            "idle_since_min": np.round(self.idle_min, 1),
+            "co2_per_km": co2_per_km,
+            "engine_status": status,
+            "anomaly_flag": anomaly,
+            "delivery": delivery,
+            "actual_load": np.round(self.actual_load, 2),
+            # Codes snapshotted for this tick (decoded lazily by telemetry())
+            "origin": self.origin.copy(),
+            "destination": self.destination.copy(),
+            "weather": self.weather.copy(),
+            "road_type": self.road_type.copy(),
+        }
+
+    def telemetry(self, cols: dict, i: int) -> VehicleTelemetry:
+        """Materialize vehicle ``i`` of a tick's columns as a VehicleTelemetry."""
+        profile = VEHICLE_PROFILES[self.profile[i]]
+        return VehicleTelemetry(
+            timestamp=cols["timestamp"],
+            vehicle_id=str(self.vehicle_ids[i]),
+            make=profile["make"],
+            vehicle_type=profile["type"],
+            driver_id=str(self.driver_ids[i]),
+            lat=float(cols["lat"][i]),
+            lon=float(cols["lon"][i]),
+            origin_city=CITY_NAMES[cols["origin"][i]],
+            destination_city=CITY_NAMES[cols["destination"][i]],
+            distance_remaining_km=float(cols["distance_remaining_km"][i]),
+            speed_kmh=float(cols["speed_kmh"][i]),
+            engine_temp_c=float(cols["engine_temp_c"][i]),
+            fuel_level_l=float(cols["fuel_level_l"][i]),
+            fuel_consumption_l100km=float(cols["fuel_consumption_l100km"][i]),
+            fuel_type=_FUEL_NAMES[self.fuel_type[i]],
+            battery_pct=float(cols["battery_pct"][i]),
+            tire_pressure_psi=float(cols["tire_pressure_psi"][i]),
+            vibration=float(cols["vibration"][i]),
+            oil_quality=float(cols["oil_quality"][i]),
+            brake_condition=BRAKE_NAMES[self.brake_cond[i]],
+            is_speeding=bool(cols["is_speeding"][i]),
+            harsh_brake=bool(cols["harsh_brake"][i]),
+            harsh_accel=bool(cols["harsh_accel"][i]),
+            idle_since_min=float(cols["idle_since_min"][i]),
+            weather=WEATHER_OPTIONS[cols["weather"][i]],
+            road_type=ROAD_OPTIONS[cols["road_type"][i]],
+            co2_per_km=float(cols["co2_per_km"][i]),
+            engine_status=str(ENGINE_STATUS[cols["engine_status"][i]]),
+            anomaly_flag=bool(cols["anomaly_flag"][i]),
+            delivery=DELIVERY[cols["delivery"][i]],
+            actual_load=float(cols["actual_load"][i]),
+            failure_history=int(self.failure_history[i]),
+        )
+
+    def state_view(self, i: int) -> "VehicleView":
+        """The per-vehicle state push_to_ai_service() reads from a VehicleState."""
+        return VehicleView(self, i)
+
+
+class VehicleView:
+    """Read-only VehicleState look-alike for one row of a FleetEngine."""
+
+    def __init__(self, engine: FleetEngine, i: int):
+        self.tick_count = engine.tick_count
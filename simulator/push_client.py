@@ -0,0 +1,258 @@
+"""
+push_client.py — Asyncio push pipeline with pooled keep-alive connections
+══════════════════════════════════════════════════════════════════════════
+Stdlib-only HTTP/1.1 client for pushing simulator telemetry to the AI service.
+
+  • AsyncPushClient  — bounded pool of keep-alive connections to one host plus
+                        a concurrency limit on in-flight requests.
+  • PushPipeline     — runs the client on a background event loop; vehicle
+                        threads call submit() and never block on the network.
+                        All calls for one telemetry tick are dispatched
+                        concurrently.
+
+Requests beyond ``max_pending`` are dropped (and counted) instead of queueing
+without bound, so a slow server degrades the push rate, not the simulation.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from collections import deque
+
+
+class PushError(Exception):
+    """Raised for malformed or unexpected HTTP responses."""
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncPushClient:
+    def __init__(self, host: str, port: int, max_connections: int = 8,
+                 concurrency: int = 64, timeout: float = 3.0):
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._idle: deque = deque()
+        self._open = 0
+        self._slots = asyncio.Semaphore(concurrency)
+        self._conn_freed = asyncio.Condition()
+
+    # ── Connection pool ───────────────────────────────────────────────────────
+    async def _acquire(self) -> _Connection:
+        async with self._conn_freed:
+            while True:
+                while self._idle:
+                    conn = self._idle.pop()
+                    if not conn.writer.is_closing():
+                        return conn
+                    self._open -= 1
+                if self._open < self.max_connections:
+                    self._open += 1
+                    break
+                await self._conn_freed.wait()
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except BaseException:
+            await self._release(None)
+            raise
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return _Connection(reader, writer)
+
+    async def _release(self, conn):
+        async with self._conn_freed:
+            if conn is not None and not conn.writer.is_closing():
+                self._idle.append(conn)
+            else:
+                self._open -= 1
+                if conn is not None:
+                    conn.close()
+            self._conn_freed.notify()
+
+    # ── HTTP ──────────────────────────────────────────────────────────────────
+    async def _exchange(self, conn: _Connection, request: bytes) -> tuple:
+        conn.writer.write(request)
+        await conn.writer.drain()
+
+        status_line = await conn.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/1."):
+            raise PushError(f"bad status line: {status_line!r}")
+        status = int(parts[1])
+
+        headers = {}
+        while True:
+            line = await conn.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await conn.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await conn.reader.readline()
+                    break
+                chunks.append(await conn.reader.readexactly(size))
+                await conn.reader.readline()
+            data = b"".join(chunks)
+        else:
+            data = await conn.reader.readexactly(int(headers.get("content-length", 0)))
+
+        conn.requests += 1
+        if headers.get("connection", "").lower() == "close":
+            conn.close()
+        return status, (json.loads(data) if data else {})
+
+    async def post(self, path: str, body: dict) -> tuple:
+        """POST JSON; returns (status, parsed_body) or (None, {"error": …})."""
+        payload = json.dumps(body).encode()
+        request = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode() + payload
+
+        async with self._slots:
+            for attempt in range(2):
+                conn = None
+                try:
+                    conn = await asyncio.wait_for(self._acquire(), self.timeout)
+                    reused = conn.requests > 0
+                    result = await asyncio.wait_for(self._exchange(conn, request), self.timeout)
+                    await self._release(conn)
+                    return result
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    if conn is not None:
+                        conn.close()
+                        await self._release(conn)
+                    # A reused keep-alive socket may have been closed server-side: retry once fresh
+                    if attempt == 0 and conn is not None and reused:
+                        continue
+                    return None, {"error": str(e) or type(e).__name__}
+                except (asyncio.TimeoutError, OSError, PushError, ValueError) as e:
+                    if conn is not None:
+                        conn.close()
+                        await self._release(conn)
+                    return None, {"error": str(e) or type(e).__name__}
+
+    async def close(self):
+        async with self._conn_freed:
+            while self._idle:
+                self._idle.pop().close()
+                self._open -= 1
+
+
+class PushPipeline:
+    """
+    Background asyncio loop that owns an AsyncPushClient.
+
+    ``build(tel, state)`` returns the [(path, body), …] calls for one tick and
+    runs in the submitting thread (so mutable vehicle state is read there);
+    ``on_result(tel, path, status, result)`` runs on the loop thread.
+    """
+
+    def __init__(self, host: str, port: int, build, on_result=None,
+                 max_connections: int = 8, concurrency: int = 64,
+                 max_pending: int = 10_000, timeout: float = 3.0, latency_window: int = 10_000):
+        self._build = build
+        self._on_result = on_result
+        self._max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self.stats = {"submitted": 0, "requests": 0, "ok": 0, "failed": 0, "dropped": 0, "cancelled": 0}
+        self._latencies = deque(maxlen=latency_window)
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._client = self._call(self._make_client(host, port, max_connections, concurrency, timeout))
+
+    async def _make_client(self, *args) -> AsyncPushClient:
+        # Semaphores / conditions must be created on the loop that uses them
+        return AsyncPushClient(*args)
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def submit(self, tel, state, block: bool = False) -> bool:
+        """
+        Queue this tick's calls. When the pipeline is full, drop them (returns
+        False) — or with ``block`` wait for room, which gives backpressure.
+        """
+        return self.submit_calls(self._build(tel, state), tel, block)
+
+    def submit_calls(self, calls: list, tel=None, block: bool = False) -> bool:
+        """Queue ready-made [(path, body), …] calls, e.g. one batched call for a whole fleet tick."""
+        with self._space:
+            while self._pending + len(calls) > self._max_pending:
+                if not block:
+                    self.stats["dropped"] += len(calls)
+                    return False
+                self._space.wait()
+            self._pending += len(calls)
+            self.stats["submitted"] += 1
+        asyncio.run_coroutine_threadsafe(self._dispatch(tel, calls), self._loop)
+        return True
+
+    async def _dispatch(self, tel, calls: list):
+        await asyncio.gather(*(self._send(tel, path, body) for path, body in calls))
+
+    async def _send(self, tel, path: str, body: dict):
+        started = time.perf_counter()
+        try:
+            status, result = await self._client.post(path, body)
+        except asyncio.CancelledError:
+            with self._space:
+                self._pending -= 1
+                self.stats["cancelled"] += 1
+                self._space.notify_all()
+            raise
+        self._latencies.append(time.perf_counter() - started)
+        with self._space:
+            self._pending -= 1
+            self._space.notify_all()
+            self.stats["requests"] += 1
+            self.stats["ok" if status == 200 else "failed"] += 1
+        if self._on_result is not None:
+            self._on_result(tel, path, status, result)
+
+    def summary(self) -> dict:
+        lat = sorted(self._latencies)
+        pct = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000, 1) if lat else None
+        return {**self.stats, "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+    async def _cancel_outstanding(self):
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._client.close()
+
+    def close(self, drain_timeout: float = 5.0):
+        """Wait up to ``drain_timeout`` for in-flight calls, then cancel the rest."""
+        deadline = time.monotonic() + drain_timeout
+        while self._pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._call(self._cancel_outstanding())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2)
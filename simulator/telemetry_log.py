@@ -0,0 +1,283 @@
+"""
+telemetry_log.py — Compact binary columnar telemetry log (.ftl)
+═══════════════════════════════════════════════════════════════
+A session log of VehicleTelemetry rows stored column by column:
+
+  • numeric columns are fixed width (float32 sensors, float64 GPS, uint8 flags)
+  • timestamps are int64 microseconds since the epoch (read as datetime64[us])
+  • string columns are dictionary-encoded to uint32 codes; each chunk carries
+    only the dictionary entries that first appear in it
+  • rows are grouped into chunks of ``chunk_rows``; within a chunk every
+    column is one contiguous, 8-byte aligned block
+
+File layout (little-endian):
+
+    b"FFTLOG01" | u32 header_len | header JSON (columns, kinds, chunk_rows)
+    then per chunk, 8-byte aligned:
+    b"CHNK" | u32 n_rows | u32 meta_len | meta JSON (new dictionary entries)
+    | column 0 block | column 1 block | …
+
+TelemetryLog memory-maps a file and returns NumPy views straight into the
+mapping — nothing is parsed or copied until a column spans several chunks
+and you ask for it as one array. A log still being written can be opened at
+any time: the reader stops at the last complete chunk.
+
+Requires numpy (pandas only for ``to_pandas``).
+
+    with TelemetryLog("logs/session_20260101_000000.ftl") as log:
+        for chunk in log.iter_chunks(["vehicle_id", "engine_temp_c"]):
+            temps = chunk["engine_temp_c"]          # float32 view, zero-copy
+        df = log.to_pandas(chunk=0)
+"""
+
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from telemetry_writer import TelemetryWriter
+
+MAGIC = b"FFTLOG01"
+CHUNK_MAGIC = b"CHNK"
+VERSION = 1
+ALIGN = 8
+
+# Storage dtype per column kind
+KIND_DTYPES = {
+    "ts":   "<i8",     # microseconds since 1970-01-01 (naive, as logged)
+    "f8":   "<f8",
+    "f4":   "<f4",
+    "i8":   "<i8",
+    "bool": "u1",
+    "str":  "<u4",     # dictionary code
+}
+
+# Columns that need more than the default float32 precision
+F8_COLUMNS = {"lat", "lon"}
+TS_COLUMNS = {"timestamp"}
+
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+
+def schema_for(row_type) -> list:
+    """[(column, kind), …] for a dataclass such as VehicleTelemetry."""
+    from dataclasses import fields
+
+    schema = []
+    for f in fields(row_type):
+        t = f.type if isinstance(f.type, str) else f.type.__name__
+        if f.name in TS_COLUMNS:
+            kind = "ts"
+        elif t == "str":
+            kind = "str"
+        elif t == "bool":
+            kind = "bool"
+        elif t == "int":
+            kind = "i8"
+        elif t == "float":
+            kind = "f8" if f.name in F8_COLUMNS else "f4"
+        else:
+            raise TypeError(f"unsupported field type for {f.name}: {t}")
+        schema.append((f.name, kind))
+    return schema
+
+
+# ─── Writer ───────────────────────────────────────────────────────────────────
+class BinaryTelemetryWriter(TelemetryWriter):
+    """
+    TelemetryWriter that writes .ftl parts instead of CSV. Same queueing,
+    batching and rotation; rows are held until a full chunk is ready (or the
+    part closes), so up to ``chunk_rows`` rows live in memory at a time.
+    """
+
+    suffix = ".ftl"
+    label = "Binary"
+
+    def __init__(self, directory: str, session_ts: str, row_type, chunk_rows: int = 65_536, **kwargs):
+        if kwargs.get("compress"):
+            raise ValueError("binary telemetry logs are not compressed (they are memory-mapped)")
+        self.schema = schema_for(row_type)
+        self.chunk_rows = chunk_rows
+        super().__init__(directory, session_ts, row_type, **kwargs)
+
+    def _begin(self, raw):
+        self._vocab = {name: {} for name, kind in self.schema if kind == "str"}
+        self._pending: list = []
+        header = json.dumps({
+            "version": VERSION,
+            "columns": self.schema,
+            "chunk_rows": self.chunk_rows,
+        }).encode()
+        head = MAGIC + struct.pack("<I", len(header)) + header
+        raw.write(head + b"\0" * _pad(len(head)))
+
+    def _write_rows(self, rows: list):
+        self._pending.extend(rows)
+        while len(self._pending) >= self.chunk_rows:
+            self._write_chunk(self._pending[:self.chunk_rows])
+            del self._pending[:self.chunk_rows]
+        self._raw.flush()
+
+    def _end(self):
+        if self._pending:
+            self._write_chunk(self._pending)
+            self._pending = []
+        self._raw.close()
+
+    def _write_chunk(self, rows: list):
+        columns = list(zip(*rows))
+        new_entries = {}
+        blocks = []
+        for (name, kind), values in zip(self.schema, columns):
+            if kind == "str":
+                vocab = self._vocab[name]
+                added = []
+                codes = []
+                for v in values:
+                    code = vocab.get(v)
+                    if code is None:
+                        code = vocab[v] = len(vocab)
+                        added.append(v)
+                    codes.append(code)
+                if added:
+                    new_entries[name] = added
+                arr = np.array(codes, dtype=KIND_DTYPES["str"])
+            elif kind == "ts":
+                arr = np.array(values, dtype="datetime64[us]").view(KIND_DTYPES["ts"])
+            elif kind == "bool":
+                arr = np.array(values, dtype=bool).view(np.uint8)
+            else:
+                arr = np.array(values, dtype=KIND_DTYPES[kind])
+            data = arr.tobytes()
+            blocks.append(data + b"\0" * _pad(len(data)))
+
+        meta = json.dumps({"dict": new_entries}).encode()
+        head = CHUNK_MAGIC + struct.pack("<II", len(rows), len(meta)) + meta
+        self._raw.write(head + b"\0" * _pad(len(head)) + b"".join(blocks))
+
+
+# ─── Reader ───────────────────────────────────────────────────────────────────
+class TelemetryLog:
+    """Memory-mapped, read-only view of one .ftl file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC) + 4:
+            self._file.close()
+            raise ValueError(f"{path}: not a telemetry log (too short)")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not a telemetry log (bad magic)")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mm[start:start + header_len])
+        self.schema = [tuple(c) for c in header["columns"]]
+        self.columns = [name for name, _ in self.schema]
+        self.kinds = dict(self.schema)
+        self.chunk_rows = header["chunk_rows"]
+
+        self._dicts = {name: [] for name, kind in self.schema if kind == "str"}
+        self._chunks = []     # [(n_rows, {column: offset})]
+        self._scan(start + header_len + _pad(start + header_len), size)
+        self.n_rows = sum(n for n, _ in self._chunks)
+
+    def _scan(self, pos: int, size: int):
+        """Index chunk headers; stops at the first incomplete chunk."""
+        mm = self._mm
+        while pos + 12 <= size:
+            if mm[pos:pos + 4] != CHUNK_MAGIC:
+                raise ValueError(f"{self.path}: corrupt chunk header at byte {pos}")
+            n_rows, meta_len = struct.unpack_from("<II", mm, pos + 4)
+            meta_end = pos + 12 + meta_len
+            offset = meta_end + _pad(meta_end)
+            offsets = {}
+            for name, kind in self.schema:
+                offsets[name] = offset
+                nbytes = n_rows * np.dtype(KIND_DTYPES[kind]).itemsize
+                offset += nbytes + _pad(nbytes)
+            if offset > size:
+                break
+            meta = json.loads(mm[pos + 12:meta_end])
+            for name, added in meta["dict"].items():
+                self._dicts[name].extend(added)
+            self._chunks.append((n_rows, offsets))
+            pos = offset
+
+    # ── Columns ───────────────────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return self.n_rows
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self._chunks)
+
+    def _view(self, name: str, n_rows: int, offset: int) -> np.ndarray:
+        kind = self.kinds[name]
+        arr = np.frombuffer(self._mm, dtype=KIND_DTYPES[kind], count=n_rows, offset=offset)
+        if kind == "ts":
+            return arr.view("datetime64[us]")
+        if kind == "bool":
+            return arr.view(bool)
+        return arr
+
+    def chunk(self, i: int, columns: list = None) -> dict:
+        """{column: zero-copy array} for chunk ``i``. String columns are codes."""
+        n_rows, offsets = self._chunks[i]
+        return {name: self._view(name, n_rows, offsets[name]) for name in (columns or self.columns)}
+
+    def iter_chunks(self, columns: list = None):
+        for i in range(len(self._chunks)):
+            yield self.chunk(i, columns)
+
+    def column(self, name: str) -> np.ndarray:
+        """Whole column: a view for single-chunk logs, otherwise one concatenated copy."""
+        parts = [self._view(name, n, offsets[name]) for n, offsets in self._chunks]
+        if not parts:
+            return self._view(name, 0, 0)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def dictionary(self, name: str) -> list:
+        """Code → string table for a string column (valid for every chunk)."""
+        return self._dicts[name]
+
+    def decode(self, name: str, codes: np.ndarray) -> np.ndarray:
+        """String codes → object array of labels."""
+        return np.asarray(self._dicts[name], dtype=object)[codes]
+
+    def to_pandas(self, columns: list = None, chunk: int = None):
+        """DataFrame of the whole log (or one chunk); strings become Categoricals."""
+        import pandas as pd
+
+        if chunk is not None:
+            data = self.chunk(chunk, columns)
+        else:
+            data = {name: self.column(name) for name in (columns or self.columns)}
+        out = {}
+        for name, arr in data.items():
+            if self.kinds[name] == "str":
+                out[name] = pd.Categorical.from_codes(arr.astype(np.int32), categories=self._dicts[name])
+            else:
+                out[name] = arr
+        return pd.DataFrame(out)
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    def close(self):
+        try:
+            self._mm.close()
+        except BufferError:
+            pass     # views still alive; the mapping is released with them
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
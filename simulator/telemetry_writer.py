@@ -0,0 +1,183 @@
+"""
+telemetry_writer.py — Buffered, thread-safe, rotating telemetry log writer
+══════════════════════════════════════════════════════════════════════════
+Vehicle threads hand rows to a queue; one background thread drains it and
+writes large batches, so disk I/O never runs on a simulation thread and rows
+from different vehicles can never interleave mid-line.
+
+  • Batching   — up to ``batch_size`` rows per write, flushed at least every
+                 ``flush_interval`` seconds.
+  • Rotation   — start a new part after ``max_bytes`` on disk and/or
+                 ``rotate_seconds`` of wall time. Parts are named
+                 session_<ts>_part0001.csv, session_<ts>_part0002.csv, …
+  • Compression— optional gzip (``.csv.gz``); pandas reads it transparently.
+
+Rows are dataclass instances (VehicleTelemetry) turned into tuples with an
+attrgetter over the fields, which is much cheaper than ``asdict`` per row.
+The queue is bounded: if the disk really can't keep up, writers block rather
+than growing memory without limit or dropping telemetry.
+
+The on-disk format lives in three hooks (_begin / _write_rows / _end) so other
+formats reuse the queueing and rotation — see telemetry_log.py.
+"""
+
+import csv
+import gzip
+import io
+import os
+import queue
+import threading
+import time
+from dataclasses import fields
+from operator import attrgetter
+
+_STOP = object()
+
+
+class TelemetryWriter:
+    suffix = ".csv"
+    label = "CSV"
+
+    def __init__(
+        self,
+        directory: str,
+        session_ts: str,
+        row_type,
+        batch_size: int = 5_000,
+        flush_interval: float = 1.0,
+        max_bytes: int = 0,
+        rotate_seconds: float = 0,
+        compress: bool = False,
+        max_queue: int = 1_000,
+    ):
+        self.directory = directory
+        self.session_ts = session_ts
+        self.fieldnames = [f.name for f in fields(row_type)]
+        self._row = attrgetter(*self.fieldnames)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compress = compress
+        self.rotating = bool(max_bytes or rotate_seconds)
+
+        self.paths: list = []
+        self.rows_written = 0
+        self.error = None
+        self._part = 0
+        self._raw = None
+        self._opened_at = 0.0
+
+        # Items are lists of row tuples (one per write()/write_many() call)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        os.makedirs(directory, exist_ok=True)
+        self._open_part()
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    # ── Producer side (any thread) ────────────────────────────────────────────
+    def write(self, tel):
+        """Queue one row."""
+        self._put([self._row(tel)])
+
+    def write_many(self, rows: list):
+        """Queue many rows as one item (e.g. a whole fleet tick)."""
+        if rows:
+            self._put([self._row(tel) for tel in rows])
+
+    def _put(self, batch: list):
+        if self.error is not None:
+            raise RuntimeError(f"telemetry writer failed: {self.error}") from self.error
+        self._queue.put(batch)
+
+    def close(self):
+        """Flush everything queued so far and close the current part."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.error is not None:
+            print(f"❌ Telemetry log writer failed: {self.error}")
+        print(f"\n✅ {self.label} log saved: {self.rows_written:,} rows in {len(self.paths)} file(s)")
+        for path in self.paths:
+            print(f"   {path}")
+
+    # ── File handling (writer thread) ─────────────────────────────────────────
+    def _part_path(self) -> str:
+        name = f"session_{self.session_ts}"
+        if self.rotating:
+            name += f"_part{self._part:04d}"
+        return os.path.join(self.directory, name + self.suffix + (".gz" if self.compress else ""))
+
+    def _open_part(self):
+        self._part += 1
+        path = self._part_path()
+        self._raw = open(path, "wb")
+        self._begin(self._raw)
+        self._opened_at = time.monotonic()
+        self.paths.append(path)
+        print(f"📁 {self.label} log: {path}")
+
+    def _close_part(self):
+        self._end()
+        if not self._raw.closed:      # GzipFile leaves its fileobj open
+            self._raw.close()
+
+    # ── Format hooks ──────────────────────────────────────────────────────────
+    def _begin(self, raw):
+        """Start a new part on the open binary file ``raw``."""
+        binary = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) if self.compress else raw
+        self._text = io.TextIOWrapper(binary, encoding="utf-8", newline="", write_through=False)
+        self._csv = csv.writer(self._text)
+        self._csv.writerow(self.fieldnames)
+
+    def _write_rows(self, rows: list):
+        """Write a batch of row tuples and flush it to the OS."""
+        self._csv.writerows(rows)
+        self._text.flush()
+
+    def _end(self):
+        """Finish the current part (closes the gzip stream, if any)."""
+        self._text.close()
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes and self._raw.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.monotonic() - self._opened_at >= self.rotate_seconds
+
+    # ── Writer loop ───────────────────────────────────────────────────────────
+    def _run(self):
+        stopping = False
+        while not stopping:
+            rows = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            # Drain whatever else is already queued, up to one batch
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                    break
+                rows.extend(item)
+                if len(rows) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            if self.error is not None:
+                continue    # keep draining so producers never block forever
+            try:
+                if rows:
+                    self._write_rows(rows)
+                    self.rows_written += len(rows)
+                if self._should_rotate() and not stopping:
+                    self._close_part()
+                    self._open_part()
+            except Exception as e:
+                self.error = e
+
+        try:
+            self._close_part()
+        except Exception as e:
+            self.error = self.error or e
@@ -15,26 +15,36 @@ Modes:
   1. Console mode   → prints live JSON to terminal
   2. API Push mode  → POSTs telemetry to AI Service + Backend
   3. CSV Export     → saves a session log to simulator/logs/
+  4. Replay         → re-sends recorded session logs to the AI Service at N× speed
 
 Usage:
     py vehicleSimulator.py                       # 3 vehicles, console mode
     py vehicleSimulator.py --vehicles 5          # 5 vehicles
     py vehicleSimulator.py --push-api            # push to AI service
+    py vehicleSimulator.py --push-api --snapshot # one /predict/vehicle-snapshot per tick instead of a call per model
     py vehicleSimulator.py --export-csv          # save CSV log
     py vehicleSimulator.py --vehicles 5 --push-api --export-csv
+    py vehicleSimulator.py --engine vectorized --vehicles 100000   # needs numpy
+    py vehicleSimulator.py --seed 42 --as-fast-as-possible --ticks 28800 --export-csv   # one day, reproducible
+    py vehicleSimulator.py --speedup 60                               # one simulated minute per second
+    py vehicleSimulator.py --replay "logs/session_*.csv" --replay-speed 10   # load-test from recorded logs
 """
 
 import argparse
 import csv
+import glob
+import gzip
+import heapq
 import json
 import math
 import os
 import random
+import sys
 import time
 import datetime
 import http.client
 import threading
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from typing import Optional
 
 # ─── Config ───────────────────────────────────────────────────────────────────
@@ -44,6 +54,9 @@ BACKEND_HOST  = "localhost"
 BACKEND_PORT  = 3000
 
 TICK_INTERVAL = 3.0          # seconds between updates
+CONSOLE_VEHICLE_LIMIT = 20   # above this, the vectorized engine prints one summary per tick
+FAST_SUMMARY_EVERY = 100     # --as-fast-as-possible: fleet summary every N ticks
+SEEDED_START  = datetime.datetime(2026, 1, 1)   # --seed without --start: fixed, reproducible timestamps
 LOG_DIR       = os.path.join(os.path.dirname(__file__), "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -124,13 +137,24 @@ class VehicleTelemetry:
     engine_status:      str    # OK / WARNING / CRITICAL
     anomaly_flag:       bool
 
+    # Outcome of a trip completed on this tick: on_time / late ("" otherwise)
+    delivery:           str = ""
+
+    # Maintenance model inputs (defaults fill logs written before they were logged)
+    actual_load:        float = 5.5   # tonnes on board; midpoint of the 3–8 t draw
+    failure_history:    int = 0
+
 
 # ─── Vehicle state (between ticks) ────────────────────────────────────────────
 class VehicleState:
-    def __init__(self, vid: int):
-        profile = random.choice(VEHICLE_PROFILES)
-        origin  = random.choice(CITY_NAMES)
-        dest    = random.choice([c for c in CITY_NAMES if c != origin])
+    def __init__(self, vid: int, seed: Optional[int] = None):
+        # Independent stream per vehicle: reproducible for a given --seed no
+        # matter how vehicle threads interleave
+        self.rng = random.Random(f"{seed}:{vid}" if seed is not None else None)
+
+        profile = self.rng.choice(VEHICLE_PROFILES)
+        origin  = self.rng.choice(CITY_NAMES)
+        dest    = self.rng.choice([c for c in CITY_NAMES if c != origin])
 
         self.vehicle_id  = f"V-{1000 + vid}"
         self.driver_id   = f"D-{200 + vid}"
@@ -139,7 +163,7 @@ class VehicleState:
         self.max_speed   = profile["max_speed"]
         self.fuel_tank   = profile["fuel_tank"]
         self.base_cons   = profile["base_consumption"]   # L/100km
-        self.fuel_type   = random.choice(FUEL_TYPES)
+        self.fuel_type   = self.rng.choice(FUEL_TYPES)
 
         self.origin      = origin
         self.destination = dest
@@ -147,29 +171,23 @@ class VehicleState:
         olat, olon = CITY_NODES[origin]
         dlat, dlon = CITY_NODES[dest]
         self.total_dist  = self._haversine(olat, olon, dlat, dlon)
-        self.progress    = random.uniform(0.0, 0.8)   # start mid-journey
+        self.progress    = self.rng.uniform(0.0, 0.8)   # start mid-journey
 
-        self.fuel_level  = random.uniform(0.4, 1.0) * self.fuel_tank
-        self.engine_temp = random.uniform(75.0, 90.0)
-        self.tire_psi    = random.uniform(30.0, 36.0)
-        self.battery_pct = random.uniform(70.0, 100.0)
-        self.oil_quality = random.uniform(50.0, 95.0)
-        self.vibration   = random.uniform(0.5, 2.0)
-        self.brake_cond  = random.choice(["Good", "Good", "Fair", "Poor"])
+        self.fuel_level  = self.rng.uniform(0.4, 1.0) * self.fuel_tank
+        self.engine_temp = self.rng.uniform(75.0, 90.0)
+        self.tire_psi    = self.rng.uniform(30.0, 36.0)
+        self.battery_pct = self.rng.uniform(70.0, 100.0)
+        self.oil_quality = self.rng.uniform(50.0, 95.0)
+        self.vibration   = self.rng.uniform(0.5, 2.0)
+        self.brake_cond  = self.rng.choice(["Good", "Good", "Fair", "Poor"])
 
         self.idle_min    = 0.0
         self.is_idle     = False
-        self.failure_history = random.randint(0, 3)
-        self.weather     = random.choice(WEATHER_OPTIONS)
-        self.road_type   = random.choice(ROAD_OPTIONS)
-
-        # Harsh event counters (for driver scoring via API)
-        self.overspeed_events  = 0
-        self.harsh_brake_count = 0
-        self.harsh_accel_count = 0
-        self.late_deliveries   = random.randint(0, 2)
-        self.on_time_deliveries= random.randint(5, 20)
+        self.failure_history = self.rng.randint(0, 3)
+        self.weather     = self.rng.choice(WEATHER_OPTIONS)
+        self.road_type   = self.rng.choice(ROAD_OPTIONS)
 
+        self.actual_load = self.rng.uniform(3.0, 8.0)   # tonnes on board
         self.tick_count  = 0
 
     @staticmethod
@@ -188,56 +206,54 @@ class VehicleState:
         dlat, dlon = CITY_NODES[self.destination]
         t = self.progress
         return (
-            round(olat + (dlat - olat) * t + random.uniform(-0.005, 0.005), 6),
-            round(olon + (dlon - olon) * t + random.uniform(-0.005, 0.005), 6),
+            round(olat + (dlat - olat) * t + self.rng.uniform(-0.005, 0.005), 6),
+            round(olon + (dlon - olon) * t + self.rng.uniform(-0.005, 0.005), 6),
         )
 
-    def tick(self) -> VehicleTelemetry:
+    def tick(self, now: Optional[datetime.datetime] = None) -> VehicleTelemetry:
+        """Advance one tick. ``now`` stamps the telemetry (default: wall clock)."""
         self.tick_count += 1
         dt_hours = TICK_INTERVAL / 3600.0
 
         # ── Random events ────────────────────────────────────────────────────
         # Occasionally change weather / road
-        if random.random() < 0.03:
-            self.weather   = random.choice(WEATHER_OPTIONS)
-        if random.random() < 0.02:
-            self.road_type = random.choice(ROAD_OPTIONS)
+        if self.rng.random() < 0.03:
+            self.weather   = self.rng.choice(WEATHER_OPTIONS)
+        if self.rng.random() < 0.02:
+            self.road_type = self.rng.choice(ROAD_OPTIONS)
 
         # Speed (respects road type)
         road_speed_cap = {"Highway": 1.0, "Urban": 0.4, "Rural": 0.7}
         cap = road_speed_cap.get(self.road_type, 0.7)
 
-        if random.random() < 0.08:   # 8% chance idle
+        if self.rng.random() < 0.08:   # 8% chance idle
             speed = 0.0
             self.is_idle = True
             self.idle_min += TICK_INTERVAL / 60.0
         else:
             self.is_idle = False
             self.idle_min = 0.0
-            base = self.max_speed * cap * random.uniform(0.6, 1.0)
+            base = self.max_speed * cap * self.rng.uniform(0.6, 1.0)
             speed = round(min(base, self.max_speed), 1)
 
         # Speeding (5% over limit by >10 km/h)
         speed_limit = self.max_speed * cap
         is_speeding = speed > speed_limit * 1.05
-        if is_speeding:
-            self.overspeed_events += 1
 
         # Harsh events (low probability)
-        harsh_brake = random.random() < 0.04
-        harsh_accel = random.random() < 0.05
-        if harsh_brake: self.harsh_brake_count += 1
-        if harsh_accel: self.harsh_accel_count += 1
+        harsh_brake = self.rng.random() < 0.04
+        harsh_accel = self.rng.random() < 0.05
 
         # Engine temperature drift
         if speed > 0:
-            self.engine_temp += random.uniform(-1.0, 2.5)
+            self.engine_temp += self.rng.uniform(-1.0, 2.5)
         else:
-            self.engine_temp -= random.uniform(0.5, 1.5)
+            self.engine_temp -= self.rng.uniform(0.5, 1.5)
         self.engine_temp = round(max(60.0, min(130.0, self.engine_temp)), 1)
 
         # Fuel consumption
-        load_factor = random.uniform(0.7, 1.3)
+        load_factor = self.rng.uniform(0.7, 1.3)
+        self.actual_load = self.rng.uniform(3.0, 8.0)
         weather_pen = 1.1 if self.weather in ("Rain", "Fog") else 1.0
         l100 = round(self.base_cons * load_factor * weather_pen, 2)
         dist_this_tick = speed * dt_hours   # km
@@ -245,37 +261,37 @@ class VehicleState:
         self.fuel_level = round(max(0.0, self.fuel_level - fuel_used), 2)
 
         # Tyre pressure slow drift
-        self.tire_psi += random.uniform(-0.05, 0.02)
+        self.tire_psi += self.rng.uniform(-0.05, 0.02)
         self.tire_psi = round(max(20.0, min(40.0, self.tire_psi)), 1)
 
         # Battery: slow drain when running, slow charge at idle (alt)
-        self.battery_pct += random.uniform(-0.3, 0.1)
+        self.battery_pct += self.rng.uniform(-0.3, 0.1)
         self.battery_pct = round(max(20.0, min(100.0, self.battery_pct)), 1)
 
         # Oil quality degrades slowly
-        self.oil_quality -= random.uniform(0.0, 0.05)
+        self.oil_quality -= self.rng.uniform(0.0, 0.05)
         self.oil_quality = round(max(0.0, self.oil_quality), 1)
 
         # Vibration
         if harsh_brake or harsh_accel:
-            self.vibration += random.uniform(0.5, 1.5)
+            self.vibration += self.rng.uniform(0.5, 1.5)
         else:
-            self.vibration -= random.uniform(0.0, 0.1)
+            self.vibration -= self.rng.uniform(0.0, 0.1)
         self.vibration = round(max(0.0, min(10.0, self.vibration)), 2)
 
         # Progress along route
         if speed > 0 and self.total_dist > 0:
             self.progress += dist_this_tick / self.total_dist
+        delivery = ""
         if self.progress >= 1.0:
             # Complete trip → pick new destination
             self.origin      = self.destination
-            self.destination = random.choice([c for c in CITY_NAMES if c != self.origin])
+            self.destination = self.rng.choice([c for c in CITY_NAMES if c != self.origin])
             olat, olon = CITY_NODES[self.origin]
             dlat, dlon = CITY_NODES[self.destination]
             self.total_dist  = self._haversine(olat, olon, dlat, dlon)
             self.progress    = 0.0
-            self.on_time_deliveries += (1 if random.random() > 0.2 else 0)
-            self.late_deliveries    += (1 if random.random() < 0.1 else 0)
+            delivery = "late" if self.rng.random() < 0.1 else "on_time"
 
         lat, lon = self._current_coords()
         dist_remaining = round(self.total_dist * (1.0 - self.progress), 1)
@@ -300,7 +316,7 @@ class VehicleState:
         )
 
         return VehicleTelemetry(
-            timestamp=datetime.datetime.now().isoformat(),
+            timestamp=(now or datetime.datetime.now()).isoformat(),
             vehicle_id=self.vehicle_id,
             make=self.make,
             vehicle_type=self.vtype,
@@ -329,6 +345,9 @@ class VehicleState:
             co2_per_km=co2_per_km,
             engine_status=eng_status,
             anomaly_flag=anomaly,
+            delivery=delivery,
+            actual_load=round(self.actual_load, 2),
+            failure_history=self.failure_history,
         )
 
 
@@ -348,20 +367,20 @@ def _http_post(host: str, port: int, path: str, body: dict):
         return None, {"error": str(e)}
 
 
-def push_to_ai_service(tel: VehicleTelemetry, state: VehicleState):
-    """Send relevant telemetry to applicable AI endpoints."""
+def build_ai_payloads(tel: VehicleTelemetry, state: VehicleState) -> list:
+    """The AI calls for one telemetry tick, as [(path, body), …]."""
     # 1. Maintenance prediction
     maint_body = {
         "Vehicle_ID": tel.vehicle_id,
         "Usage_Hours": state.tick_count * TICK_INTERVAL / 3600,
-        "Actual_Load": random.uniform(3.0, 8.0),
+        "Actual_Load": tel.actual_load,
         "Engine_Temperature": tel.engine_temp_c,
         "Tire_Pressure": tel.tire_pressure_psi,
         "Fuel_Consumption": tel.fuel_consumption_l100km,
         "Battery_Status": tel.battery_pct,
         "Vibration_Levels": tel.vibration,
         "Oil_Quality": tel.oil_quality,
-        "Failure_History": state.failure_history,
+        "Failure_History": tel.failure_history,
         "Anomalies_Detected": 1 if tel.anomaly_flag else 0,
         "Predictive_Score": min(1.0, tel.vibration / 10.0 + (tel.engine_temp_c - 80) / 100),
         "Downtime_Maintenance": 0.0,
@@ -370,9 +389,7 @@ def push_to_ai_service(tel: VehicleTelemetry, state: VehicleState):
         "Weather_Conditions": tel.weather,
         "Road_Conditions": tel.road_type,
     }
-    status, result = _http_post(AI_HOST, AI_PORT, "/predict/maintenance", maint_body)
-    if status == 200 and result.get("risk_level") in ("MEDIUM", "HIGH"):
-        print(f"  ⚠️  [{tel.vehicle_id}] Maintenance Risk: {result['risk_level']} — {result['recommendation']}")
+    calls = [("/predict/maintenance", maint_body)]
 
     # 2. Carbon tracking
     carbon_body = {
@@ -381,69 +398,261 @@ def push_to_ai_service(tel: VehicleTelemetry, state: VehicleState):
         "fuel_litres": round(tel.fuel_consumption_l100km / 100 * 10, 3),  # per 10 km
         "distance_km": 10.0,
     }
-    _http_post(AI_HOST, AI_PORT, "/predict/carbon", carbon_body)
-
-    # 3. Driver score push every 20 ticks
-    if state.tick_count % 20 == 0:
-        driver_body = {
-            "Driver_ID": tel.driver_id,
-            "overspeed_events": state.overspeed_events,
-            "harsh_brake_events": state.harsh_brake_count,
-            "harsh_accel_events": state.harsh_accel_count,
-            "idle_minutes": tel.idle_since_min,
-            "late_deliveries": state.late_deliveries,
-            "on_time_deliveries": state.on_time_deliveries,
-        }
-        status, result = _http_post(AI_HOST, AI_PORT, "/predict/driver-score", driver_body)
-        if status == 200:
-            print(f"  🚗 [{tel.driver_id}] Driver Score: {result.get('score')}/100 "
-                  f"| Grade: {result.get('grade')} | {result.get('badge')}")
-
-
-# ─── CSV logger ───────────────────────────────────────────────────────────────
-class CsvLogger:
-    def __init__(self, session_ts: str):
-        fname = os.path.join(LOG_DIR, f"session_{session_ts}.csv")
-        self._file = open(fname, "w", newline="", encoding="utf-8")
-        self._writer = None
-        self._path = fname
-        print(f"📁 CSV log: {fname}")
-
-    def write(self, tel: VehicleTelemetry):
-        row = asdict(tel)
-        if self._writer is None:
-            self._writer = csv.DictWriter(self._file, fieldnames=list(row.keys()))
-            self._writer.writeheader()
-        self._writer.writerow(row)
-        self._file.flush()
-
-    def close(self):
-        self._file.close()
-        print(f"\n✅ CSV log saved: {self._path}")
+    calls.append(("/predict/carbon", carbon_body))
+
+    # 3. This tick's driver events (incl. a completed trip's outcome) → GET /drivers/{id}/score
+    events = [name for name, hit in (("overspeed", tel.is_speeding), ("harsh_brake", tel.harsh_brake),
+                                     ("harsh_accel", tel.harsh_accel)) if hit]
+    if tel.delivery:
+        events.append(f"{tel.delivery}_delivery")
+    values = [1.0] * len(events)
+    if tel.idle_since_min > 0:
+        events.append("idle_minutes")
+        values.append(min(tel.idle_since_min, TICK_INTERVAL / 60.0))
+    if events:
+        calls.append(("/drivers/events", {
+            "driver_ids": [tel.driver_id] * len(events),
+            "events":     events,
+            "values":     values,
+        }))
+    return calls
+
+
+# Per-vehicle predictions folded into one /predict/vehicle-snapshot call (--snapshot)
+SNAPSHOT_SECTIONS = {
+    "/predict/maintenance":  "maintenance",
+    "/predict/carbon":       "carbon",
+}
+
+
+def build_snapshot_payloads(tel: VehicleTelemetry, state: VehicleState) -> list:
+    """Same calls as build_ai_payloads, with the prediction calls merged into one snapshot."""
+    snapshot = {"Vehicle_ID": tel.vehicle_id, "Driver_ID": tel.driver_id}
+    calls = []
+    for path, body in build_ai_payloads(tel, state):
+        section = SNAPSHOT_SECTIONS.get(path)
+        if section:
+            snapshot[section] = body
+        else:
+            calls.append((path, body))
+    return [("/predict/vehicle-snapshot", snapshot)] + calls
+
+
+def build_tick_payloads(rows: list) -> list:
+    """
+    One fleet tick (at most one row per vehicle) as a single columnar
+    /stream/telemetry call: anomaly scoring, and positions for the spatial index.
+    """
+    return [("/stream/telemetry", {
+        "vehicle_ids":       [t.vehicle_id for t in rows],
+        "engine_temp_c":     [t.engine_temp_c for t in rows],
+        "vibration":         [t.vibration for t in rows],
+        "fuel_level_l":      [t.fuel_level_l for t in rows],
+        "tire_pressure_psi": [t.tire_pressure_psi for t in rows],
+        "timestamp":         datetime.datetime.fromisoformat(rows[0].timestamp).timestamp(),
+        "lat":               [t.lat for t in rows],
+        "lon":               [t.lon for t in rows],
+        "vehicle_type":      [t.vehicle_type for t in rows],
+        "engine_status":     [t.engine_status for t in rows],
+    })]
+
+
+class TickBatcher:
+    """
+    Collects the vehicle threads' rows per tick; the last vehicle in queues the
+    tick's batched calls (build_tick_payloads). A tick cut short by Ctrl+C is
+    not sent.
+    """
+
+    def __init__(self, pusher, n_vehicles: int):
+        self._pusher = pusher
+        self._n = n_vehicles
+        self._lock = threading.Lock()
+        self._ticks = {}
+
+    def add(self, tick: int, tel: VehicleTelemetry):
+        with self._lock:
+            rows = self._ticks.setdefault(tick, [])
+            rows.append(tel)
+            if len(rows) < self._n:
+                return
+            del self._ticks[tick]
+        self._pusher.submit_calls(build_tick_payloads(rows))
+
+
+def report_ai_result(tel: Optional[VehicleTelemetry], path: str, status, result: dict):
+    """Print the interesting AI responses for one call (``tel`` is None for a batched tick)."""
+    if status != 200:
+        return
+    if path == "/stream/telemetry":
+        for e in result.get("events", []):
+            print(f"  🚨 [{e['vehicle_id']}] {e['channel']} {e['kind']} (z = {e['zscore']:.1f})")
+        return
+    if path == "/predict/vehicle-snapshot":
+        for section_path, section in SNAPSHOT_SECTIONS.items():
+            if result.get(section):
+                report_ai_result(tel, section_path, status, result[section])
+        return
+    if path == "/predict/maintenance" and result.get("risk_level") in ("MEDIUM", "HIGH"):
+        print(f"  ⚠️  [{tel.vehicle_id}] Maintenance Risk: {result['risk_level']} — {result['recommendation']}")
+
+
+def push_to_ai_service(tel: VehicleTelemetry, state: VehicleState, snapshot: bool = False):
+    """Send relevant telemetry to applicable AI endpoints (blocking, one call at a time)."""
+    build = build_snapshot_payloads if snapshot else build_ai_payloads
+    for path, body in build(tel, state):
+        status, result = _http_post(AI_HOST, AI_PORT, path, body)
+        report_ai_result(tel, path, status, result)
+
+
+def make_push_pipeline(connections: int, concurrency: int, on_result=report_ai_result,
+                       snapshot: bool = False, **kwargs):
+    """Asyncio pipeline with pooled keep-alive connections to the AI service."""
+    from push_client import PushPipeline
+
+    return PushPipeline(
+        AI_HOST, AI_PORT,
+        build=build_snapshot_payloads if snapshot else build_ai_payloads,
+        on_result=on_result,
+        max_connections=connections,
+        concurrency=concurrency,
+        **kwargs,
+    )
+
+
+# ─── Session logger ───────────────────────────────────────────────────────────
+def make_session_logger(session_ts: str, fmt: str = "csv", rotate_mb: float = 0,
+                        rotate_minutes: float = 0, compress: bool = False):
+    """
+    Background, batched writer for VehicleTelemetry rows: CSV (telemetry_writer.py)
+    or the binary columnar .ftl format (telemetry_log.py, needs numpy).
+    """
+    if fmt == "binary":
+        from telemetry_log import BinaryTelemetryWriter as Writer
+    else:
+        from telemetry_writer import TelemetryWriter as Writer
+
+    return Writer(
+        LOG_DIR, session_ts, VehicleTelemetry,
+        max_bytes=int(rotate_mb * 1024 * 1024),
+        rotate_seconds=rotate_minutes * 60,
+        compress=compress,
+    )
+
+
+# ─── Simulated clock ──────────────────────────────────────────────────────────
+class SimClock:
+    """
+    Maps tick numbers to timestamps and paces the loops.
+
+    speedup = 1 → real time (default), N → N× faster, 0 → as fast as possible.
+    Without a ``start`` in real time, ticks are stamped with the wall clock as
+    before; otherwise tick k is stamped ``start + k × TICK_INTERVAL``.
+    """
+
+    def __init__(self, speedup: float = 1.0, start: Optional[datetime.datetime] = None):
+        self.speedup = speedup
+        self.simulated = speedup != 1.0 or start is not None
+        self.start = (start or datetime.datetime.now()).replace(microsecond=0)
+
+    @property
+    def fast(self) -> bool:
+        return self.speedup == 0
+
+    def at(self, tick: int) -> Optional[datetime.datetime]:
+        """Timestamp for the tick about to run (None → wall clock)."""
+        if not self.simulated:
+            return None
+        return self.start + datetime.timedelta(seconds=tick * TICK_INTERVAL)
+
+    def pause(self, stop_event: threading.Event, busy: float = 0.0):
+        """Wait out the rest of one tick (``busy`` seconds were already spent)."""
+        if self.speedup > 0:
+            stop_event.wait(max(0.0, TICK_INTERVAL / self.speedup - busy))
 
 
 # ─── Single vehicle loop ──────────────────────────────────────────────────────
 def simulate_vehicle(
     vid: int,
-    push_api: bool,
-    csv_logger: Optional[CsvLogger],
+    pusher,
+    csv_logger,
     stop_event: threading.Event,
+    clock: SimClock,
+    seed: Optional[int] = None,
+    max_ticks: int = 0,
+    batcher: Optional[TickBatcher] = None,
 ):
-    state = VehicleState(vid)
-    print(f"🚛 [{state.vehicle_id}] Started — {state.origin} → {state.destination} "
-          f"({state.total_dist:.0f} km) | {state.make} | {state.vtype}")
+    state = VehicleState(vid, seed)
+    if not clock.fast:
+        print(f"🚛 [{state.vehicle_id}] Started — {state.origin} → {state.destination} "
+              f"({state.total_dist:.0f} km) | {state.make} | {state.vtype}")
 
     while not stop_event.is_set():
-        tel = state.tick()
-        _print_tick(tel)
+        started = time.perf_counter()
+        tel = state.tick(clock.at(state.tick_count))
+        if not clock.fast:
+            _print_tick(tel)
 
-        if push_api:
-            push_to_ai_service(tel, state)
+        if pusher:
+            pusher.submit(tel, state)
+            batcher.add(state.tick_count, tel)
 
         if csv_logger:
             csv_logger.write(tel)
 
-        time.sleep(TICK_INTERVAL)
+        if max_ticks and state.tick_count >= max_ticks:
+            break
+        clock.pause(stop_event, time.perf_counter() - started)
+
+
+# ─── Vectorized fleet loop ────────────────────────────────────────────────────
+def simulate_fleet_vectorized(
+    n_vehicles: int,
+    pusher,
+    csv_logger,
+    stop_event: threading.Event,
+    clock: SimClock,
+    seed: Optional[int] = None,
+    max_ticks: int = 0,
+):
+    """Advance the whole fleet per tick with the NumPy FleetEngine (one thread)."""
+    from fleet_engine import FleetEngine
+
+    engine = FleetEngine(n_vehicles, seed=seed)
+    verbose = n_vehicles <= CONSOLE_VEHICLE_LIMIT and not clock.fast
+    print(f"🚛 Vectorized fleet engine started — {n_vehicles:,} vehicles")
+
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        cols = engine.tick(clock.at(engine.tick_count))
+        if verbose or pusher or csv_logger:
+            rows = [engine.telemetry(cols, i) for i in range(n_vehicles)]
+            if pusher:
+                pusher.submit_calls(build_tick_payloads(rows))   # whole fleet in one call
+            for i, tel in enumerate(rows):
+                if verbose:
+                    _print_tick(tel)
+                if pusher:
+                    pusher.submit(tel, engine.state_view(i))
+            if csv_logger:
+                csv_logger.write_many(rows)
+        elapsed = time.perf_counter() - started
+        if not verbose and (not clock.fast or engine.tick_count % FAST_SUMMARY_EVERY == 0):
+            _print_fleet_summary(engine.tick_count, cols, elapsed)
+
+        if max_ticks and engine.tick_count >= max_ticks:
+            break
+        clock.pause(stop_event, elapsed)
+
+
+def _print_fleet_summary(tick: int, cols: dict, elapsed: float):
+    status = cols["engine_status"]
+    print(
+        f"⏱️  Tick {tick} | {len(status):,} vehicles in {elapsed * 1000:.0f} ms "
+        f"| 🟢 {int((status == 0).sum()):,} 🟡 {int((status == 1).sum()):,} 🔴 {int((status == 2).sum()):,} "
+        f"| 🚨 {int(cols['anomaly_flag'].sum()):,} anomalies "
+        f"| avg {cols['speed_kmh'].mean():.0f} km/h"
+    )
 
 
 def _print_tick(tel: VehicleTelemetry):
@@ -463,47 +672,298 @@ def _print_tick(tel: VehicleTelemetry):
     )
 
 
+# ─── Replay ───────────────────────────────────────────────────────────────────
+REPLAY_REORDER_WINDOW = 100_000   # rows buffered to restore timestamp order
+REPLAY_BATCH_ROWS = 10_000        # max rows per batched /stream/telemetry call
+
+
+class ReplayState:
+    """
+    The VehicleState field build_ai_payloads() reads that the logged rows
+    don't carry: the tick count.
+    """
+
+    def __init__(self):
+        self.tick_count = 0
+
+    def observe(self, tel: VehicleTelemetry):
+        self.tick_count += 1
+
+
+def _telemetry_from_strings(row: dict) -> VehicleTelemetry:
+    values = {}
+    for f in fields(VehicleTelemetry):
+        if f.name not in row:
+            continue                # column added after the log was written → default
+        v = row[f.name]
+        if f.type is bool:
+            v = v in ("True", "true", "1")
+        elif f.type is int:
+            v = int(v)
+        elif f.type is float:
+            v = float(v)
+        values[f.name] = v
+    return VehicleTelemetry(**values)
+
+
+def iter_log_rows(path: str):
+    """Yield VehicleTelemetry rows from a CSV, CSV.gz or binary .ftl session log."""
+    if path.endswith(".ftl"):
+        from telemetry_log import TelemetryLog
+
+        with TelemetryLog(path) as log:
+            names = log.columns
+            for chunk in log.iter_chunks():
+                cols = {}
+                for name in names:
+                    arr = chunk[name]
+                    if log.kinds[name] == "str":
+                        cols[name] = log.decode(name, arr).tolist()
+                    elif log.kinds[name] == "ts":
+                        cols[name] = [t.isoformat() for t in arr.astype(datetime.datetime)]
+                    else:
+                        cols[name] = arr.tolist()
+                for values in zip(*(cols[n] for n in names)):
+                    yield VehicleTelemetry(**dict(zip(names, values)))
+        return
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield _telemetry_from_strings(row)
+
+
+def iter_time_ordered(paths: list, window: int = REPLAY_REORDER_WINDOW):
+    """
+    Rows of all logs in timestamp order, via a bounded reorder heap: vehicle
+    threads (especially in --as-fast-as-possible runs) log slightly out of
+    order, but never by more than ``window`` rows. Ties keep log order.
+    """
+    heap = []
+    seq = 0
+    for path in paths:
+        print(f"▶️  Replaying {path}")
+        for tel in iter_log_rows(path):
+            heapq.heappush(heap, (tel.timestamp, seq, tel))
+            seq += 1
+            if len(heap) > window:
+                yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+def replay_logs(paths: list, speed: float, pusher, stop_event: threading.Event) -> dict:
+    """
+    Push logged telemetry to the AI service, keeping the logged inter-arrival
+    times divided by ``speed`` (0 = as fast as possible). Returns replay stats.
+    """
+    states: dict = {}
+    batch, batch_ids = [], set()
+    lags = []
+    rows = 0
+    ts0 = None
+    last_ts = None
+    due = 0.0
+    started = time.perf_counter()
+
+    for tel in iter_time_ordered(paths):
+        if stop_event.is_set():
+            break
+        if speed > 0 and tel.timestamp != last_ts:
+            # Pace once per distinct timestamp; only sleep when ≥1 ms early
+            last_ts = tel.timestamp
+            ts = datetime.datetime.fromisoformat(tel.timestamp)
+            if ts0 is None:
+                ts0, started = ts, time.perf_counter()   # schedule starts at the first row
+            due = started + (ts - ts0).total_seconds() / speed
+            wait = due - time.perf_counter()
+            if wait >= 0.001:
+                stop_event.wait(wait)
+        if speed > 0:
+            lags.append(max(0.0, time.perf_counter() - due))
+
+        state = states.get(tel.vehicle_id)
+        if state is None:
+            state = states[tel.vehicle_id] = ReplayState()
+        state.observe(tel)
+        pusher.submit(tel, state, block=True)   # backpressure shows up as lag
+        # Stream rows go out batched, one row per vehicle per call
+        if tel.vehicle_id in batch_ids or len(batch) >= REPLAY_BATCH_ROWS:
+            pusher.submit_calls(build_tick_payloads(batch), block=True)
+            batch, batch_ids = [], set()
+        batch.append(tel)
+        batch_ids.add(tel.vehicle_id)
+        rows += 1
+        if rows % 10_000 == 0:
+            lag = f" | lag {lags[-1] * 1000:.0f} ms" if lags else ""
+            print(f"   {rows:>10,} rows | {rows / (time.perf_counter() - started):,.0f} rows/s{lag}", end="\r")
+
+    if batch and not stop_event.is_set():
+        pusher.submit_calls(build_tick_payloads(batch), block=True)
+    elapsed = time.perf_counter() - started
+    lags.sort()
+    pct = lambda q: round(lags[min(len(lags) - 1, int(q * len(lags)))] * 1000, 1) if lags else None
+    return {
+        "rows": rows,
+        "vehicles": len(states),
+        "elapsed_s": round(elapsed, 2),
+        "rows_per_s": round(rows / elapsed, 1) if elapsed else None,
+        "lag_p50_ms": pct(0.50),
+        "lag_p99_ms": pct(0.99),
+        "lag_max_ms": round(lags[-1] * 1000, 1) if lags else None,
+    }
+
+
+def run_replay(args):
+    paths = sorted(glob.glob(args.replay))
+    if not paths:
+        sys.exit(f"❌ No logs match {args.replay}")
+    pace = "as fast as possible" if args.replay_speed == 0 else f"{args.replay_speed:g}×"
+    print("=" * 70)
+    print("  🔁  FleetFlow Telemetry Replay")
+    print(f"  Logs     : {len(paths)} file(s)")
+    print(f"  Speed    : {pace}")
+    print(f"  Calls    : {'one /predict/vehicle-snapshot per row' if args.snapshot else 'one per model'}"
+          " + batched /stream/telemetry")
+    print(f"  Target   : http://{AI_HOST}:{AI_PORT}  ({args.push_connections} connections, "
+          f"{args.push_concurrency} in flight)")
+    print("=" * 70)
+
+    pusher = make_push_pipeline(args.push_connections, args.push_concurrency, on_result=None,
+                                snapshot=args.snapshot, latency_window=200_000)
+    stop_event = threading.Event()
+    try:
+        stats = replay_logs(paths, args.replay_speed, pusher, stop_event)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping replay …")
+        stop_event.set()
+        stats = {}
+    pusher.close()
+    push = pusher.summary()
+
+    elapsed = stats.get("elapsed_s") or 0
+    print("\n📊 Replay report")
+    print(f"   Rows replayed   : {stats.get('rows', 0):,} from {stats.get('vehicles', 0):,} vehicles "
+          f"in {elapsed}s ({stats.get('rows_per_s')} rows/s)")
+    print(f"   Requests        : {push['requests']:,} ({push['ok']:,} ok, {push['failed']:,} failed, "
+          f"{push['dropped']:,} dropped)"
+          + (f" → {push['requests'] / elapsed:,.0f} req/s" if elapsed else ""))
+    print(f"   Latency         : p50 {push['p50_ms']} ms | p95 {push['p95_ms']} ms | p99 {push['p99_ms']} ms")
+    if stats.get("lag_p50_ms") is not None:
+        print(f"   Schedule lag    : p50 {stats['lag_p50_ms']} ms | p99 {stats['lag_p99_ms']} ms "
+              f"| max {stats['lag_max_ms']} ms")
+    print("✅ Replay finished.")
+
+
 # ─── Main ─────────────────────────────────────────────────────────────────────
 def main():
     parser = argparse.ArgumentParser(description="FleetFlow Vehicle IoT Simulator")
     parser.add_argument("--vehicles",   type=int, default=3, help="Number of vehicles to simulate (default: 3)")
     parser.add_argument("--push-api",   action="store_true",  help="Push telemetry to AI service API")
-    parser.add_argument("--export-csv", action="store_true",  help="Export session to CSV in simulator/logs/")
+    parser.add_argument("--export-csv", action="store_true",  help="Export session log to simulator/logs/ (see --log-format)")
     parser.add_argument("--ticks",      type=int, default=0,  help="Stop after N ticks (0 = run forever)")
+    parser.add_argument("--engine",     choices=["threads", "vectorized"], default="threads",
+                        help="threads = one thread per vehicle; vectorized = NumPy fleet engine for 100k+ vehicles")
+    parser.add_argument("--push-connections", type=int, default=8,
+                        help="Keep-alive connections pooled to the AI service (default: 8)")
+    parser.add_argument("--push-concurrency", type=int, default=64,
+                        help="Max in-flight AI requests (default: 64)")
+    parser.add_argument("--rotate-mb",  type=float, default=0,
+                        help="Start a new CSV part after N MB on disk (0 = never)")
+    parser.add_argument("--rotate-minutes", type=float, default=0,
+                        help="Start a new CSV part every N minutes of wall time (0 = never)")
+    parser.add_argument("--compress",   action="store_true", help="gzip the CSV log (.csv.gz)")
+    parser.add_argument("--log-format", choices=["csv", "binary"], default="csv",
+                        help="Session log format: csv, or binary columnar .ftl (needs numpy)")
+    parser.add_argument("--seed",       type=int, default=None,
+                        help="Seed for reproducible runs (independent RNG stream per vehicle)")
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument("--speedup",      type=float, default=1.0,
+                      help="Run simulated time N× faster than real time (default: 1)")
+    pace.add_argument("--as-fast-as-possible", action="store_true",
+                      help="Never sleep between ticks; timestamps use simulated time")
+    parser.add_argument("--start",      type=datetime.datetime.fromisoformat, default=None,
+                        help="Simulated start time, ISO format (default: now; 2026-01-01 with --seed)")
+    parser.add_argument("--replay",     metavar="GLOB", default=None,
+                        help="Replay session logs (CSV, CSV.gz or .ftl) to the AI service instead of simulating")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Replay N× faster than logged (0 = as fast as possible; default: 1)")
+    parser.add_argument("--snapshot",   action="store_true",
+                        help="Push maintenance and carbon as one /predict/vehicle-snapshot call")
     args = parser.parse_args()
+    if args.replay:
+        if args.replay_speed < 0:
+            parser.error("--replay-speed must be >= 0")
+        run_replay(args)
+        return
+    if args.speedup <= 0:
+        parser.error("--speedup must be > 0")
+    if args.compress and args.log_format == "binary":
+        parser.error("--compress applies to CSV logs only")
+    if args.start is None and args.seed is not None:
+        args.start = SEEDED_START
+    clock = SimClock(0 if args.as_fast_as_possible else args.speedup, args.start)
 
     print("=" * 70)
     print("  🚚  FleetFlow Vehicle IoT Simulator")
     print(f"  Vehicles : {args.vehicles}")
-    print(f"  API Push : {'✅ ON (port 8001)' if args.push_api else '❌ OFF'}")
-    print(f"  CSV Log  : {'✅ ON' if args.export_csv else '❌ OFF'}")
+    push = f"✅ ON (port 8001, async keep-alive{', vehicle snapshot' if args.snapshot else ''})"
+    print(f"  API Push : {push if args.push_api else '❌ OFF'}")
+    print(f"  Log      : {f'✅ ON ({args.log_format})' if args.export_csv else '❌ OFF'}")
     print(f"  Interval : {TICK_INTERVAL}s per tick")
+    print(f"  Pace     : {'as fast as possible' if clock.fast else f'{clock.speedup:g}× real time'}"
+          f"{f'  (simulated from {clock.start.isoformat()})' if clock.simulated else ''}")
+    print(f"  Seed     : {args.seed if args.seed is not None else 'random'}")
+    print(f"  Engine   : {args.engine}")
     print("=" * 70)
 
     session_ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    logger = CsvLogger(session_ts) if args.export_csv else None
+    logger = (
+        make_session_logger(session_ts, args.log_format, args.rotate_mb, args.rotate_minutes, args.compress)
+        if args.export_csv else None
+    )
+    pusher = (
+        make_push_pipeline(args.push_connections, args.push_concurrency, snapshot=args.snapshot)
+        if args.push_api else None
+    )
 
     stop_event = threading.Event()
+
+    if args.engine == "vectorized":
+        # fleet_engine imports this module's constants by name
+        sys.modules.setdefault("vehicleSimulator", sys.modules[__name__])
+        try:
+            simulate_fleet_vectorized(args.vehicles, pusher, logger, stop_event, clock,
+                                      args.seed, args.ticks)
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping simulator …")
+        _shutdown(pusher, logger)
+        return
+
     threads = []
+    started = time.perf_counter()
+    batcher = TickBatcher(pusher, args.vehicles) if pusher else None
 
     for i in range(args.vehicles):
         t = threading.Thread(
             target=simulate_vehicle,
-            args=(i, args.push_api, logger, stop_event),
+            args=(i, pusher, logger, stop_event, clock, args.seed, args.ticks, batcher),
             daemon=True,
         )
         threads.append(t)
         t.start()
-        time.sleep(0.5)   # stagger starts
+        if not clock.fast:
+            time.sleep(0.5)   # stagger starts
 
     try:
-        if args.ticks > 0:
-            time.sleep(args.ticks * TICK_INTERVAL + 2)
-            stop_event.set()
-        else:
+        if args.ticks <= 0:
             print("\n⏹️  Press Ctrl+C to stop the simulator.\n")
-            while True:
-                time.sleep(1)
+        while any(t.is_alive() for t in threads):
+            time.sleep(0.2)
+        if clock.simulated:
+            simulated = args.ticks * TICK_INTERVAL
+            print(f"\n⏱️  Simulated {datetime.timedelta(seconds=simulated)} of telemetry "
+                  f"in {time.perf_counter() - started:.1f}s")
     except KeyboardInterrupt:
         print("\n🛑 Stopping simulator …")
         stop_event.set()
@@ -511,9 +971,15 @@ def main():
     for t in threads:
         t.join(timeout=5)
 
+    _shutdown(pusher, logger)
+
+
+def _shutdown(pusher, logger):
+    if pusher:
+        pusher.close()
+        print(f"📡 AI push stats: {pusher.summary()}")
     if logger:
         logger.close()
-
     print("✅ Simulator stopped.")
 
 